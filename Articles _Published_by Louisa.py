@@ -9,13 +9,8 @@ Original file is located at
 
 
 # Load datasets
-import pandas as pd
-# Added encoding='latin-1' to handle the different file encoding
-authors_df = pd.read_csv("data/authors.schistosomiasis.csv",encoding='latin-1')
-relevant_articles_final = pd.read_csv("data/relevant_articles_final.csv",encoding='latin-1')
-
-# Replace missing forenames with a placeholder (e.g., 'Unknown')
-authors_df['AuthorForename'] = authors_df['AuthorForename'].fillna('Unknown')
+from data_cache import load_table
+relevant_articles_final = load_table("data/relevant_articles_final.csv", columns=['PMID', 'Year'])
 
 import matplotlib.pyplot as plt
 # Ensure the 'Year' column exists in the dataset
@@ -1,90 +1,51 @@
-import pandas as pd
-import networkx as nx
-import plotly.graph_objects as go
+import numpy as np
+
+from author_index import attach_author_ids, author_names
+from coauthor_graph import build_coauthor_adjacency
+from data_cache import load_table
+from network_layout import cached_layout, level_of_detail, network_figure
+
+# Level of detail: draw only the TOP_N authors with the highest degree, dropping every other node and
+# its edges, only the K_CORE core and only edges with at least MIN_EDGE_WEIGHT joint papers
+# (None / 1 draws everything)
+TOP_N = None
+K_CORE = None
+MIN_EDGE_WEIGHT = 1
 
 # Load relevant authors data
 relevant_authors_path = "data/relevant_authors.csv"
-relevant_authors = pd.read_csv(relevant_authors_path)
+relevant_authors = load_table(relevant_authors_path,
+                              columns=["PMID", "AuthorForename", "AuthorLastname", "AuthorInitials"])
 
-# Build the co-authorship network
-G = nx.Graph()
+# Key authors by their integer ID; names are only looked up for the labels
+author_index = attach_author_ids(relevant_authors)
 
-# Group by PMID and create edges for co-authors
-for pmid, group in relevant_authors.groupby('PMID'):
-    authors = group['AuthorForename'] + " " + group['AuthorLastname']
-    authors = authors.tolist()
-    for i, author1 in enumerate(authors):
-        for author2 in authors[i + 1:]:
-            if G.has_edge(author1, author2):
-                G[author1][author2]['weight'] += 1
-            else:
-                G.add_edge(author1, author2, weight=1)
+# Build the co-authorship network from a sparse PMID x author incidence matrix
+adjacency, author_ids = build_coauthor_adjacency(relevant_authors, name_column="AuthorID")
 
 # Calculate degree centrality
-degree_centrality = nx.degree_centrality(G)
+n = adjacency.shape[0]
+degree_centrality = np.diff(adjacency.indptr) / (n - 1) if n > 1 else np.ones(n)
 
 # Create the visualization
-pos = nx.spring_layout(G, k=0.15, seed=42)  # Position nodes with spring layout
-node_sizes = [1000 * degree_centrality[node] for node in G.nodes()]
-node_colors = [degree_centrality[node] for node in G.nodes()]
-
-# Build Plotly graph
-edge_x = []
-edge_y = []
-for edge in G.edges():
-    x0, y0 = pos[edge[0]]
-    x1, y1 = pos[edge[1]]
-    edge_x.extend([x0, x1, None])
-    edge_y.extend([y0, y1, None])
-
-edge_trace = go.Scatter(
-    x=edge_x,
-    y=edge_y,
-    line=dict(width=0.5, color='#888'),
-    hoverinfo='none',
-    mode='lines')
-
-node_x = []
-node_y = []
-node_text = []
-for node in G.nodes():
-    x, y = pos[node]
-    node_x.append(x)
-    node_y.append(y)
-    node_text.append(f"{node} (Degree: {degree_centrality[node]:.2f})")
-
-node_trace = go.Scatter(
-    x=node_x,
-    y=node_y,
-    mode='markers+text',
-    text=node_text,
-    marker=dict(
-        showscale=True,
-        colorscale='YlGnBu',
-        size=node_sizes,
-        color=node_colors,
-        colorbar=dict(
-            thickness=15,
-            title='Degree Centrality',
-            xanchor='left',
-            titleside='right'
-        )
-    )
-)
-
-fig = go.Figure(data=[edge_trace, node_trace],
-                layout=go.Layout(
-                    title='Co-authorship Network',
-                    titlefont_size=16,
-                    showlegend=False,
-                    hovermode='closest',
-                    margin=dict(b=0, l=0, r=0, t=40),
-                    xaxis=dict(showgrid=False, zeroline=False),
-                    yaxis=dict(showgrid=False, zeroline=False),
-                    paper_bgcolor='white'  # Set white background
-                ))
+adjacency, kept = level_of_detail(adjacency, scores=degree_centrality, top_n=TOP_N, k_core=K_CORE,
+                                  min_edge_weight=MIN_EDGE_WEIGHT)
+pos = cached_layout(adjacency, author_ids[kept])  # Position nodes with a cached force layout
+node_text = [f"{name} (Degree: {degree:.2f})"
+             for name, degree in zip(author_names(author_ids[kept], author_index), degree_centrality[kept])]
+
+# Build Plotly graph with WebGL traces
+fig = network_figure(adjacency, pos,
+                     node_size=1000 * degree_centrality[kept],
+                     node_color=degree_centrality[kept],
+                     node_text=node_text,
+                     title='Co-authorship Network',
+                     colorscale='YlGnBu',
+                     colorbar_title='Degree Centrality',
+                     edge_color='#888',
+                     mode='markers+text')
+fig.update_layout(paper_bgcolor='white')  # Set white background
 
 # Save and show the graph
 fig.write_html("output/coauthorship_network_interactive.html")
 fig.show()
-
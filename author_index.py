@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Persisted author ID <-> name table
+DEFAULT_INDEX_PATH = 'data/author_index.csv'
+
+INDEX_COLUMNS = ["AuthorID", "AuthorKey", "DisplayName"]
+
+
+def _normalize(names):
+    """Casefold names, strip accents and punctuation and collapse whitespace."""
+    names = names.astype(object).where(names.notna())
+    names = names.str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True)
+    names = names.str.casefold().str.replace("[.,'\\-\u2010]", ' ', regex=True)
+    names = names.str.split().str.join(' ')
+    return names.where(names.str.len() > 0)
+
+
+def author_keys(authors_df, prefix="Author"):
+    """
+    Build the normalized identity key of every author row.
+
+    The key is "lastname|forename"; rows without a forename fall back to their
+    initials, so they are no longer lost or merged under a placeholder name.
+    Rows without a lastname get no key.
+
+    Args:
+        authors_df (pd.DataFrame): Table with '<prefix>Forename', '<prefix>Lastname'
+            and optionally '<prefix>Initials' columns.
+        prefix (str): Column prefix, "FirstAuthor" for the articles table.
+
+    Returns:
+        pd.Series: Identity key of every row.
+    """
+    lastname = _normalize(authors_df[f"{prefix}Lastname"])
+    forename = _normalize(authors_df[f"{prefix}Forename"])
+    if f"{prefix}Initials" in authors_df.columns:
+        forename = forename.fillna(_normalize(authors_df[f"{prefix}Initials"]))
+    return (lastname + "|" + forename.fillna("")).where(lastname.notna())
+
+
+def display_names(authors_df, prefix="Author"):
+    """Return the "Forename Lastname" display name of every row, using initials when the forename is missing."""
+    forename = authors_df[f"{prefix}Forename"].astype(object)
+    if f"{prefix}Initials" in authors_df.columns:
+        forename = forename.fillna(authors_df[f"{prefix}Initials"].astype(object))
+    return (forename.fillna("") + " " + authors_df[f"{prefix}Lastname"].astype(object)).str.strip()
+
+
+def update_author_index(authors_df, index=None, prefix="Author"):
+    """
+    Add the authors of a table that are not in the index yet.
+
+    Existing IDs never change; new authors get the next dense IDs in order of
+    first appearance, displayed under the first spelling seen.
+
+    Args:
+        authors_df (pd.DataFrame): Authors table.
+        index (pd.DataFrame): Existing index, or None to start a new one.
+        prefix (str): See `author_keys`.
+
+    Returns:
+        pd.DataFrame: Index with 'AuthorID', 'AuthorKey' and 'DisplayName' columns,
+            where 'AuthorID' equals the row position.
+    """
+    if index is None:
+        index = pd.DataFrame({"AuthorID": pd.Series(dtype=np.int32), "AuthorKey": pd.Series(dtype=object),
+                              "DisplayName": pd.Series(dtype=object)})
+    new = pd.DataFrame({"AuthorKey": author_keys(authors_df, prefix), "DisplayName": display_names(authors_df, prefix)})
+    new = new.dropna(subset=["AuthorKey"]).drop_duplicates("AuthorKey")
+    new = new[~new["AuthorKey"].isin(index["AuthorKey"])]
+    new.insert(0, "AuthorID", np.arange(len(index), len(index) + len(new), dtype=np.int32))
+    return pd.concat([index, new], ignore_index=True)[INDEX_COLUMNS]
+
+
+def assign_author_ids(authors_df, index, prefix="Author"):
+    """
+    Look up the integer ID of every author row.
+
+    Returns:
+        pd.Series: Nullable int32 IDs; rows without a lastname or missing from
+            the index get <NA>.
+    """
+    positions = pd.Index(index["AuthorKey"]).get_indexer(author_keys(authors_df, prefix))
+    ids = pd.array(positions, dtype="Int32")
+    ids[positions < 0] = pd.NA
+    return pd.Series(ids, index=authors_df.index, name="AuthorID")
+
+
+def lookup_author_id(index, forename, lastname, initials=None):
+    """Return the ID of an author given by name, or None when the author is not in the index."""
+    key = author_keys(pd.DataFrame({"AuthorForename": [forename], "AuthorLastname": [lastname],
+                                    "AuthorInitials": [initials]}))
+    position = pd.Index(index["AuthorKey"]).get_indexer(key)[0]
+    return None if position < 0 else int(index["AuthorID"].iloc[position])
+
+
+def author_names(ids, index):
+    """Convert integer author IDs back to display names."""
+    return index["DisplayName"].to_numpy()[np.asarray(ids, dtype=np.int64)]
+
+
+def load_author_index(path=DEFAULT_INDEX_PATH):
+    """Load a persisted author index, or return None when it does not exist yet."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={"AuthorID": np.int32, "AuthorKey": object, "DisplayName": object},
+                       keep_default_na=False)
+
+
+def save_author_index(index, path=DEFAULT_INDEX_PATH):
+    """Persist an author index as CSV."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    index.to_csv(path, index=False)
+
+
+def attach_author_ids(authors_df, path=DEFAULT_INDEX_PATH, prefix="Author"):
+    """
+    Add an 'AuthorID' column to an authors table using the persisted index.
+
+    Authors not in the index yet are added and the index is saved again, so
+    IDs stay stable across scripts and runs.
+
+    Returns:
+        pd.DataFrame: The author index, for converting IDs back to names.
+    """
+    index = load_author_index(path)
+    updated = update_author_index(authors_df, index, prefix)
+    if index is None or len(updated) > len(index):
+        save_author_index(updated, path)
+    authors_df["AuthorID"] = assign_author_ids(authors_df, updated, prefix)
+    return updated
@@ -0,0 +1,150 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+
+def author_article_table(authors_df, articles_df, id_column="AuthorID"):
+    """
+    Join every author row with its article's year once, sorted by author.
+
+    Args:
+        authors_df (pd.DataFrame): Author rows with 'PMID', 'AuthorN', 'SJR' and integer author IDs.
+        articles_df (pd.DataFrame): Articles with 'PMID' and 'Year'.
+        id_column (str): Column holding the integer author ID.
+
+    Returns:
+        pd.DataFrame: 'AuthorID', 'PMID', 'AuthorN', 'SJR' and 'Year' of every
+            author row with an ID; 'Year' is NaN when the article is unknown.
+    """
+    rows = authors_df[[id_column, "PMID", "AuthorN", "SJR"]].dropna(subset=[id_column])
+    rows = rows.rename(columns={id_column: "AuthorID"})
+    rows["AuthorID"] = rows["AuthorID"].astype(np.int64)
+    years = articles_df[["PMID", "Year"]].drop_duplicates("PMID")
+    table = rows.merge(years, on="PMID", how="left")
+    return table.sort_values("AuthorID", kind="stable").reset_index(drop=True)
+
+
+def trend_fits(table, sjr_min=0, sjr_max=10):
+    """
+    Fit a least-squares SJR-over-year line for every author at once.
+
+    Only points with sjr_min < SJR < sjr_max are used, so extreme journals do
+    not dominate a trend. Authors whose points all share one year get a flat
+    line at their mean SJR.
+
+    Returns:
+        pd.DataFrame: 'TrendSlope', 'TrendIntercept', 'TrendPoints',
+            'FirstYear' and 'LastYear' indexed by 'AuthorID'.
+    """
+    points = table.dropna(subset=["Year", "SJR"])
+    points = points[(points["SJR"] > sjr_min) & (points["SJR"] < sjr_max)]
+    ids, group, counts = np.unique(points["AuthorID"].to_numpy(), return_inverse=True, return_counts=True)
+    x = points["Year"].to_numpy(dtype=float)
+    y = points["SJR"].to_numpy(dtype=float)
+
+    # Grouped simple regression on per-author centred values
+    mean_x = np.bincount(group, weights=x) / counts
+    mean_y = np.bincount(group, weights=y) / counts
+    dx = x - mean_x[group]
+    sxx = np.bincount(group, weights=dx * dx, minlength=len(ids))
+    sxy = np.bincount(group, weights=dx * (y - mean_y[group]), minlength=len(ids))
+    slope = np.divide(sxy, sxx, out=np.zeros(len(ids)), where=sxx > 0)
+
+    years = pd.Series(x).groupby(group).agg(["min", "max"])
+    return pd.DataFrame({
+        "TrendSlope": slope,
+        "TrendIntercept": mean_y - slope * mean_x,
+        "TrendPoints": counts,
+        "FirstYear": years["min"].to_numpy(),
+        "LastYear": years["max"].to_numpy(),
+    }, index=pd.Index(ids, name="AuthorID"))
+
+
+def author_report(table, sjr_min=0, sjr_max=10):
+    """
+    Compute the paper count, mean author position and SJR trend of every author.
+
+    Returns:
+        pd.DataFrame: One row per author indexed by 'AuthorID'.
+    """
+    grouped = table.groupby("AuthorID", sort=True)
+    report = pd.DataFrame({
+        "PaperCount": grouped["PMID"].nunique(),
+        "MeanAuthorRank": grouped["AuthorN"].mean(),
+    })
+    return report.join(trend_fits(table, sjr_min, sjr_max), how="left")
+
+
+def plot_file_name(author_id, title):
+    """
+    Return the PNG file name of an author's trend plot.
+
+    The AuthorID keeps namesakes apart, and every run of characters other than
+    letters, digits and '-' in the title becomes one '_', so names containing
+    '/' or other characters that are unsafe in paths still give a valid file.
+    """
+    slug = re.sub(r"[^\w\-]+", "_", title).strip("_")
+    return f"{author_id}_{slug}_articles_with_trend.png"
+
+
+def _plot_authors(batch, output_dir):
+    """Worker: save the SJR-over-year plot of a batch of authors."""
+    paths = []
+    for author_id, title, years, sjr, fit in batch:
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        # Scatter plot includes all points, even extremes
+        ax.scatter(years, sjr, color='blue', alpha=0.7, label='Data Points')
+        if fit is not None:
+            slope, intercept, first, last = fit
+            trend_years = np.array([first, last])
+            ax.plot(trend_years, intercept + slope * trend_years, color='red', linestyle='--', label='Trend Line')
+
+        ax.set_title(f'{title} Articles: SJR vs Year')
+        ax.set_xlabel('Year')
+        ax.set_ylabel('SJR')
+        ax.grid(True)
+        ax.legend()
+
+        # 42, "Forename Lastname" -> "42_Forename_Lastname_articles_with_trend.png"
+        path = os.path.join(output_dir, plot_file_name(author_id, title))
+        fig.savefig(path)
+        paths.append(path)
+    return paths
+
+
+def plot_author_trends(table, report, titles, output_dir, workers=None, batch_size=50):
+    """
+    Render the SJR trend plot of many authors in a process pool.
+
+    Args:
+        table (pd.DataFrame): Output of `author_article_table`.
+        report (pd.DataFrame): Output of `author_report` (or `trend_fits`).
+        titles (pd.Series): Plot title of every author to plot, indexed by 'AuthorID'.
+        output_dir (str): Directory the PNG files are written to.
+        workers (int): Worker processes (None uses every core, 1 plots in-process).
+        batch_size (int): Authors per task.
+
+    Returns:
+        list: Paths of the saved plots.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    points = table.dropna(subset=["Year"])
+    points = points[points["AuthorID"].isin(titles.index)]
+    tasks = []
+    for author_id, rows in points.groupby("AuthorID", sort=False):
+        fit = report.loc[author_id, ["TrendSlope", "TrendIntercept", "FirstYear", "LastYear"]] \
+            if author_id in report.index else None
+        fit = None if fit is None or fit.isna().any() else tuple(fit)
+        tasks.append((author_id, titles[author_id], rows["Year"].to_numpy(), rows["SJR"].to_numpy(), fit))
+
+    batches = [tasks[start:start + batch_size] for start in range(0, len(tasks), batch_size)]
+    if workers == 1 or len(batches) <= 1:
+        return [path for batch in batches for path in _plot_authors(batch, output_dir)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [path for paths in executor.map(_plot_authors, batches, [output_dir] * len(batches))
+                for path in paths]
@@ -0,0 +1,253 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from author_index import (DEFAULT_INDEX_PATH, assign_author_ids, author_names, load_author_index, save_author_index,
+                          update_author_index)
+from data_cache import CACHE_DIR, load_table
+
+# Relative accuracy of the median SJR sketch: every estimate is within 1% of an SJR of the author
+SJR_RELATIVE_ACCURACY = 0.01
+# Positive SJR values are clipped to this range before bucketing
+SJR_SKETCH_RANGE = (1e-3, 1e3)
+
+# Sentinels of the first and last year accumulators of authors without a dated paper
+_NO_FIRST_YEAR = np.iinfo(np.int32).max
+_NO_LAST_YEAR = np.iinfo(np.int32).min
+
+
+class PaperLookup(NamedTuple):
+    """Field, SJR and year of every article, aligned with `pmids`; `field_codes` index `fields`, -1 for none."""
+    pmids: pd.Index
+    fields: list
+    field_codes: np.ndarray
+    sjr: np.ndarray
+    years: np.ndarray
+
+
+def load_paper_lookup(relevant_articles_final_path, cache_dir=CACHE_DIR):
+    """Load the PMID -> (Field, SJR, Year) lookup of the enriched articles."""
+    articles = load_table(relevant_articles_final_path, columns=['PMID', 'Field', 'SJR', 'Year'], cache_dir=cache_dir)
+    articles = articles.drop_duplicates('PMID')
+    field = articles['Field'].astype('category')
+    return PaperLookup(pd.Index(articles['PMID'].to_numpy()), list(field.cat.categories),
+                       field.cat.codes.to_numpy(dtype=np.int64), articles['SJR'].to_numpy(dtype=float),
+                       articles['Year'].to_numpy(dtype=float, na_value=np.nan))
+
+
+def _sketch_layout():
+    """Return the bucket growth factor, the lowest log bucket and the number of sketch buckets."""
+    gamma = (1 + SJR_RELATIVE_ACCURACY) / (1 - SJR_RELATIVE_ACCURACY)
+    low, high = (int(np.ceil(np.log(bound) / np.log(gamma))) for bound in SJR_SKETCH_RANGE)
+    return gamma, low, high - low + 2
+
+
+def sjr_buckets(sjr):
+    """
+    Return the sketch bucket of every SJR value.
+
+    Bucket 0 holds SJR 0 (articles without a ranked journal); bucket b > 0
+    holds the values in (gamma^(i - 1), gamma^i] with i = b + low - 1, so
+    bucket counts of different chunks can simply be added.
+    """
+    gamma, low, n_buckets = _sketch_layout()
+    clipped = np.clip(sjr, *SJR_SKETCH_RANGE)
+    buckets = np.ceil(np.log(clipped) / np.log(gamma)).astype(np.int64) - low + 1
+    return np.where(sjr > 0, np.clip(buckets, 1, n_buckets - 1), 0)
+
+
+def bucket_values(buckets):
+    """Return the SJR estimate of every sketch bucket."""
+    gamma, low, _ = _sketch_layout()
+    return np.where(buckets > 0, 2 * gamma ** (buckets + low - 1.0) / (gamma + 1), 0.0)
+
+
+class AuthorStatsAccumulator:
+    """
+    Running per-author statistics over chunks of author rows.
+
+    The state is a few arrays indexed by AuthorID and a sparse author x bucket
+    SJR histogram, so memory grows with the number of distinct authors rather
+    than with the author rows. Accumulators of different chunks or files can
+    be merged.
+    """
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.n_buckets = _sketch_layout()[2]
+        self.size = 0
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.sjr_sum = np.zeros(0)
+        self.sjr_count = np.zeros(0, dtype=np.int64)
+        self.first_year = np.zeros(0, dtype=np.int32)
+        self.last_year = np.zeros(0, dtype=np.int32)
+        self.field_counts = np.zeros((0, len(self.fields)), dtype=np.int64)
+        self.sketch = sparse.csr_matrix((0, self.n_buckets), dtype=np.int64)
+
+    def _grow(self, size):
+        """Make room for author IDs below `size`, doubling the capacity to amortize the copies."""
+        self.size = max(self.size, size)
+        capacity = len(self.rows)
+        if size <= capacity:
+            return
+        extra = max(size, 2 * capacity) - capacity
+        self.rows = np.concatenate([self.rows, np.zeros(extra, dtype=np.int64)])
+        self.sjr_sum = np.concatenate([self.sjr_sum, np.zeros(extra)])
+        self.sjr_count = np.concatenate([self.sjr_count, np.zeros(extra, dtype=np.int64)])
+        self.first_year = np.concatenate([self.first_year, np.full(extra, _NO_FIRST_YEAR, dtype=np.int32)])
+        self.last_year = np.concatenate([self.last_year, np.full(extra, _NO_LAST_YEAR, dtype=np.int32)])
+        self.field_counts = np.vstack([self.field_counts, np.zeros((extra, len(self.fields)), dtype=np.int64)])
+        self.sketch.resize((capacity + extra, self.n_buckets))
+
+    def update(self, author_ids, field_codes, sjr, years):
+        """
+        Add a chunk of author rows.
+
+        Args:
+            author_ids (np.ndarray): Integer author ID of every row.
+            field_codes (np.ndarray): Index into `fields` of the paper's field, -1 for none.
+            sjr (np.ndarray): SJR of the paper, NaN when unknown.
+            years (np.ndarray): Publication year of the paper, NaN when unknown.
+        """
+        if len(author_ids) == 0:
+            return
+        self._grow(int(author_ids.max()) + 1)
+        capacity = len(self.rows)
+        self.rows += np.bincount(author_ids, minlength=capacity)
+
+        ranked = ~np.isnan(sjr)
+        self.sjr_sum += np.bincount(author_ids[ranked], weights=sjr[ranked], minlength=capacity)
+        self.sjr_count += np.bincount(author_ids[ranked], minlength=capacity)
+        self.sketch = self.sketch + sparse.csr_matrix(
+            (np.ones(ranked.sum(), dtype=np.int64), (author_ids[ranked], sjr_buckets(sjr[ranked]))),
+            shape=self.sketch.shape)
+
+        dated = ~np.isnan(years)
+        span = pd.Series(years[dated].astype(np.int32)).groupby(author_ids[dated]).agg(["min", "max"])
+        authors = span.index.to_numpy()
+        self.first_year[authors] = np.minimum(self.first_year[authors], span["min"].to_numpy())
+        self.last_year[authors] = np.maximum(self.last_year[authors], span["max"].to_numpy())
+
+        classified = field_codes >= 0
+        pairs = author_ids[classified] * len(self.fields) + field_codes[classified]
+        self.field_counts += np.bincount(pairs, minlength=self.field_counts.size).reshape(self.field_counts.shape)
+
+    def merge(self, other):
+        """Add the statistics of another accumulator over the same fields into this one and return it."""
+        if other.fields != self.fields:
+            raise ValueError(f"Cannot merge accumulators over different fields: {self.fields} and {other.fields}.")
+        self._grow(other.size)
+        n = other.size
+        self.rows[:n] += other.rows[:n]
+        self.sjr_sum[:n] += other.sjr_sum[:n]
+        self.sjr_count[:n] += other.sjr_count[:n]
+        self.first_year[:n] = np.minimum(self.first_year[:n], other.first_year[:n])
+        self.last_year[:n] = np.maximum(self.last_year[:n], other.last_year[:n])
+        self.field_counts[:n] += other.field_counts[:n]
+        other_sketch = other.sketch[:n].copy()
+        other_sketch.resize(self.sketch.shape)
+        self.sketch = self.sketch + other_sketch
+        return self
+
+    def median_sjr(self):
+        """Return the lower median SJR of every author from the sketch, NaN for authors without a ranked paper."""
+        sketch = self.sketch[:self.size].tocsr()
+        sketch.sum_duplicates()
+        sketch.sort_indices()
+        counts, indptr = sketch.data, sketch.indptr
+        row = np.repeat(np.arange(self.size), np.diff(indptr))
+        # Running count of every bucket within its author's row
+        cumulative = np.cumsum(counts)
+        row_offset = np.concatenate([[0], cumulative])[indptr[:-1]]
+        after = cumulative - row_offset[row]
+        before = after - counts
+        target = (self.sjr_count[:self.size][row] + 1) // 2
+        hit = (before < target) & (after >= target)
+        median = np.full(self.size, np.nan)
+        median[row[hit]] = bucket_values(sketch.indices[hit])
+        return median
+
+    def result(self):
+        """
+        Return one row of statistics per author seen.
+
+        Returns:
+            pd.DataFrame: 'AuthorID', 'ArticleCount' (author rows),
+                'AverageImpactFactor', 'MedianImpactFactor', 'FirstYear',
+                'LastYear', 'PrimaryField' (field with most papers) and a
+                'Papers (<field>)' count per field.
+        """
+        n = self.size
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.sjr_sum[:n] / self.sjr_count[:n]
+        dated = self.first_year[:n] != _NO_FIRST_YEAR
+        first_year = pd.array(np.where(dated, self.first_year[:n], np.nan), dtype="Int16")
+        last_year = pd.array(np.where(dated, self.last_year[:n], np.nan), dtype="Int16")
+        field_counts = self.field_counts[:n]
+        classified = field_counts.sum(axis=1) > 0
+        primary = np.full(n, None, dtype=object)
+        primary[classified] = np.array(self.fields, dtype=object)[field_counts[classified].argmax(axis=1)]
+
+        stats = pd.DataFrame({
+            "AuthorID": np.arange(n, dtype=np.int32),
+            "ArticleCount": self.rows[:n],
+            "AverageImpactFactor": mean,
+            "MedianImpactFactor": self.median_sjr(),
+            "FirstYear": first_year,
+            "LastYear": last_year,
+            "PrimaryField": primary,
+        })
+        for position, field in enumerate(self.fields):
+            stats[f"Papers ({field})"] = field_counts[:, position]
+        return stats[stats["ArticleCount"] > 0].reset_index(drop=True)
+
+
+def stream_author_stats(relevant_articles_final_path, relevant_authors_path, index_path=DEFAULT_INDEX_PATH,
+                        chunksize=200000, cache_dir=CACHE_DIR):
+    """
+    Aggregate per-author statistics from the authors table in chunks.
+
+    Each chunk of author rows is keyed by AuthorID through the persisted
+    author index and looked up in an in-memory PMID -> (Field, SJR, Year)
+    table of the articles, so the author rows are never joined and held
+    in memory as a whole. Statistics match the 'AverageImpactFactor' and
+    'ArticleCount' of `prepare_stages.author_field_stats`, but authors are
+    identified by their normalized name key rather than the raw name spelling.
+
+    Args:
+        relevant_articles_final_path (str): Articles with 'Field', 'SJR' and 'Year'.
+        relevant_authors_path (str): Author rows of the relevant articles.
+        index_path (str): Persisted author index; new authors are added to it.
+        chunksize (int): Number of author rows read per chunk.
+        cache_dir (str): Directory of the columnar cache of the articles table.
+
+    Returns:
+        pd.DataFrame: `AuthorStatsAccumulator.result` with the author 'DisplayName'.
+    """
+    papers = load_paper_lookup(relevant_articles_final_path, cache_dir)
+    index = load_author_index(index_path)
+    n_known = 0 if index is None else len(index)
+    accumulator = AuthorStatsAccumulator(papers.fields)
+
+    name_columns = {"PMID", "AuthorForename", "AuthorLastname", "AuthorInitials"}
+    for chunk in pd.read_csv(relevant_authors_path, usecols=lambda column: column in name_columns,
+                             chunksize=chunksize):
+        index = update_author_index(chunk, index)
+        ids = assign_author_ids(chunk, index)
+        keyed = ids.notna().to_numpy()
+        author_ids = ids[keyed].to_numpy(dtype=np.int64)
+        rows = papers.pmids.get_indexer(chunk['PMID'].to_numpy()[keyed])
+        # Authors of articles missing from the articles table count as papers without field, SJR or year
+        found = rows >= 0
+        accumulator.update(author_ids,
+                           np.where(found, papers.field_codes[rows], -1),
+                           np.where(found, papers.sjr[rows], np.nan),
+                           np.where(found, papers.years[rows], np.nan))
+
+    if index is not None and len(index) > n_known:
+        save_author_index(index, index_path)
+    stats = accumulator.result()
+    stats.insert(1, "DisplayName", author_names(stats["AuthorID"], index) if len(stats) else [])
+    return stats
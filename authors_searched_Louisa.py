@@ -10,9 +10,11 @@ Original file is located at
 
 # Load datasets
 import pandas as pd
-articles_data = pd.read_csv("data/articles.schistosomiasis.csv", encoding='latin-1')
-# Added encoding='latin-1' to handle the different file encoding
-authors_data = pd.read_csv("data/authors.schistosomiasis.csv", encoding='latin-1')
+from author_index import attach_author_ids, author_names
+from data_cache import load_table
+# The columnar cache detects the latin-1 encoding of the raw files
+articles_data = load_table("data/articles.schistosomiasis.csv", categorical=False)
+authors_data = load_table("data/authors.schistosomiasis.csv", categorical=False)
 
 
 articles_data
@@ -20,25 +22,13 @@ articles_data
 # Check for missing values
 print(articles_data.isnull().sum())
 
-from collections import Counter
-import re
+from term_counter import DEFAULT_STOPWORDS, count_terms_file, top_terms
 
-# Combine titles and abstracts into a single text
-combined_text = " ".join(articles_data['Title'].dropna().tolist() +
-                         articles_data['Abstract'].dropna().tolist()).lower()
-
-# Tokenize and clean text
-words = re.findall(r'\b\w+\b', combined_text)
-stopwords = set(['the', 'and', 'of', 'to', 'in', 'for', 'with', 'on', 'a', 'by', 'as', 'an', 'at', 'or', 'from', 'that', 'this','among','after',
-          'based','more','than','both','have','these','study','other','between','been','which','were','china','also'])
-filtered_words = [word for word in words if word not in stopwords and len(word) > 3]
-
-# Count word frequencies
-word_counts = Counter(filtered_words)
-top_keywords = word_counts.most_common(50)
-
-# Display the top 20 most frequent words as a pandas DataFrame
-top_keywords_df = pd.DataFrame(top_keywords, columns=["Keyword", "Count"])
+# Stream titles and abstracts in chunks and count their words across all cores
+# (the raw PubMed export is latin-1 encoded)
+stopwords = DEFAULT_STOPWORDS
+term_counts = count_terms_file("data/articles.schistosomiasis.csv", stopwords=stopwords, encoding='latin-1')
+top_keywords_df = top_terms(term_counts.total, k=50)
 
 # Print the DataFrame to the console
 print(top_keywords_df)
@@ -76,13 +66,11 @@ filtered_authors
 # Check for missing values
 print(filtered_authors.isnull().sum())
 
-# Replace missing forenames with a placeholder (e.g., 'Unknown')
-filtered_authors['AuthorForename'] = filtered_authors['AuthorForename'].fillna('Unknown')
-# Check for missing values
-print(filtered_authors.isnull().sum())
+# Identify authors by their integer ID; missing forenames fall back to the initials
+author_index = attach_author_ids(filtered_authors)
 
 key_researchers = (
-    filtered_authors.groupby(['AuthorForename', 'AuthorLastname'])
+    filtered_authors.groupby('AuthorID')
     .size()
     .reset_index(name='ContributionCount')
 )
@@ -91,8 +79,8 @@ key_researchers = key_researchers.sort_values(by='ContributionCount', ascending=
 
 import matplotlib.pyplot as plt
 plt.figure(figsize=(10, 6))
-# Create a new column combining 'AuthorForename' and 'AuthorLastname'
-key_researchers['FullName'] = key_researchers['AuthorForename'] + ' ' + key_researchers['AuthorLastname']
+# Look up the display name of each author ID
+key_researchers['FullName'] = author_names(key_researchers['AuthorID'], author_index)
 # Use the new 'FullName' column for the x-axis
 plt.bar(key_researchers['FullName'], key_researchers['ContributionCount'])
 plt.xticks(rotation=45, ha='right')
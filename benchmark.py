@@ -0,0 +1,229 @@
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; only traced memory is reported there
+    resource = None
+
+from author_index import attach_author_ids
+from centrality import add_distance_weights, betweenness_centrality, sparse_centrality
+from coauthor_graph import build_coauthor_adjacency, to_networkx
+from data_cache import load_table
+from field_classifier import DEFAULT_FIELDS_PATH, classify_articles_file, load_field_keywords
+from keyword_filter import DEFAULT_KEYWORDS, filter_articles_file, generate_relevant_authors_file
+from near_duplicates import find_duplicates_file
+from network_layout import force_layout
+from prepare_stages import aggregate_author_stats, author_field_stats, enrich_articles, index_journals
+from synthetic_corpus import generate_corpus
+
+# Corpus sizes (number of papers) to benchmark
+SCALES = [10_000, 100_000]
+# Where the synthetic corpora and the JSON results are written
+CORPUS_DIR = "data/synthetic"
+BENCHMARK_DIR = "output/benchmarks"
+
+# Betweenness is exact up to this many nodes and uses sampled pivots above
+EXACT_BETWEENNESS_NODES = 1000
+BETWEENNESS_PIVOTS = 256
+LAYOUT_ITERATIONS = 50
+# Worker processes of the parallel stages (None uses every core)
+WORKERS = None
+# Trace Python allocations for the peak memory of each stage; this slows pure-Python stages down
+TRACE_MEMORY = True
+
+
+def _max_rss_mb(who):
+    """Return the peak resident set size of this process or its children in MB, or None when unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def measure(stage, func, *args, **kwargs):
+    """
+    Run one benchmark stage and record its wall time and memory.
+
+    'peak_traced_mb' is the peak of the Python and NumPy allocations made by
+    the stage in this process. 'max_rss_mb' and 'children_max_rss_mb' are
+    high-water marks since the start of the run, so they only grow between stages.
+
+    Returns:
+        tuple: (result of `func`, record dict).
+    """
+    gc.collect()
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    wall = time.perf_counter() - start
+    peak = None
+    if TRACE_MEMORY:
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    record = {
+        "stage": stage,
+        "wall_s": round(wall, 4),
+        "peak_traced_mb": None if peak is None else round(peak, 2),
+        "max_rss_mb": _max_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "children_max_rss_mb": _max_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+    }
+    print(f"  {stage}: {wall:.2f}s" + ("" if peak is None else f", peak {peak:.1f} MB"))
+    return result, record
+
+
+def run_benchmarks(n_papers, corpus_dir=CORPUS_DIR, workers=WORKERS):
+    """
+    Generate a synthetic corpus and time every pipeline stage on it.
+
+    Returns:
+        dict: Corpus size, graph size and one record per stage.
+    """
+    directory = os.path.join(corpus_dir, str(n_papers))
+    work = os.path.join(directory, "work")
+    os.makedirs(work, exist_ok=True)
+    relevant_articles = os.path.join(work, "relevant_articles.csv")
+    relevant_authors = os.path.join(work, "relevant_authors.csv")
+    relevant_articles_final = os.path.join(work, "relevant_articles_final.csv")
+    relevant_authors_with_field = os.path.join(work, "relevant_authors_with_field.csv")
+    journal_index = os.path.join(work, "journal_index.csv")
+    cache_dir = os.path.join(work, ".cache")
+
+    print(f"Benchmarking {n_papers} papers")
+    stages = []
+    paths, record = measure("generate_corpus", generate_corpus, directory, n_papers)
+    stages.append(record)
+
+    _, record = measure("keyword_filter", filter_articles_file, paths["articles"], DEFAULT_KEYWORDS,
+                        relevant_articles, os.path.join(work, "discarded_articles.csv"), workers=workers)
+    stages.append(record)
+    _, record = measure("near_duplicates", find_duplicates_file, relevant_articles,
+                        os.path.join(work, "duplicate_clusters.csv"), workers=workers)
+    stages.append(record)
+    _, record = measure("relevant_authors", generate_relevant_authors_file, relevant_articles, paths["authors"],
+                        relevant_authors)
+    stages.append(record)
+    _, record = measure("field_classification", classify_articles_file, relevant_articles,
+                        os.path.join(work, "classified_articles.csv"), load_field_keywords(DEFAULT_FIELDS_PATH))
+    stages.append(record)
+    _, record = measure("journal_index", index_journals, journal_index, scimagojr_2023=paths["scimagojr"])
+    stages.append(record)
+    # Enrichment includes the field classification of every batch
+    _, record = measure("sjr_enrichment", enrich_articles, relevant_articles, journal_index, DEFAULT_FIELDS_PATH,
+                        relevant_articles_final)
+    stages.append(record)
+    _, record = measure("author_stats", author_field_stats, relevant_articles_final, relevant_authors,
+                        relevant_authors_with_field, cache_dir=cache_dir)
+    stages.append(record)
+    _, record = measure("author_stats_streaming", aggregate_author_stats, relevant_articles_final, relevant_authors,
+                        os.path.join(work, "author_stats.csv"),
+                        author_index_path=os.path.join(work, "author_index.csv"), cache_dir=cache_dir)
+    stages.append(record)
+
+    def load_authors():
+        authors_df = load_table(relevant_authors_with_field,
+                                columns=["PMID", "AuthorForename", "AuthorLastname", "AuthorInitials"],
+                                cache_dir=cache_dir)
+        attach_author_ids(authors_df, path=os.path.join(work, "author_index.csv"))
+        return authors_df
+
+    authors_df, record = measure("load_authors", load_authors)
+    stages.append(record)
+    (adjacency, author_ids), record = measure("graph_construction", build_coauthor_adjacency, authors_df,
+                                              name_column="AuthorID")
+    stages.append(record)
+    G, record = measure("to_networkx", to_networkx, adjacency, author_ids)
+    stages.append(record)
+    _, record = measure("degree_centrality", nx.degree_centrality, G)
+    stages.append(record)
+    _, record = measure("sparse_centrality", sparse_centrality, adjacency, author_ids)
+    stages.append(record)
+    k = None if G.number_of_nodes() <= EXACT_BETWEENNESS_NODES else BETWEENNESS_PIVOTS
+    _, record = measure("betweenness_centrality", betweenness_centrality, G, k=k, weight=add_distance_weights(G),
+                        workers=workers)
+    record["pivots"] = k
+    stages.append(record)
+    _, record = measure("layout", force_layout, adjacency, iterations=LAYOUT_ITERATIONS)
+    stages.append(record)
+
+    return {
+        "n_papers": n_papers,
+        "n_author_rows": len(authors_df),
+        "n_nodes": adjacency.shape[0],
+        "n_edges": adjacency.nnz // 2,
+        "stages": stages,
+    }
+
+
+def git_commit():
+    """Return the short hash of the checked out commit, or 'unknown' outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results, output_dir=BENCHMARK_DIR):
+    """Save benchmark results with the commit and machine they were measured on; returns the file path."""
+    os.makedirs(output_dir, exist_ok=True)
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    path = os.path.join(output_dir, f"benchmark_{commit}.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=1)
+    return path
+
+
+def results_frame(path):
+    """Flatten a benchmark JSON file into one row per scale and stage."""
+    with open(path, encoding='utf-8') as file:
+        report = json.load(file)
+    return pd.DataFrame([{"n_papers": result["n_papers"], **stage}
+                         for result in report["results"] for stage in result["stages"]])
+
+
+def compare_results(baseline_path, candidate_path):
+    """
+    Compare two benchmark files stage by stage.
+
+    Returns:
+        pd.DataFrame: Wall times and peak traced memory of both runs, with
+            'wall_ratio' > 1 meaning the candidate is slower.
+    """
+    baseline = results_frame(baseline_path).set_index(["n_papers", "stage"])
+    candidate = results_frame(candidate_path).set_index(["n_papers", "stage"])
+    columns = ["wall_s", "peak_traced_mb"]
+    comparison = baseline[columns].join(candidate[columns], lsuffix="_baseline", rsuffix="_candidate", how="inner")
+    comparison["wall_ratio"] = comparison["wall_s_candidate"] / comparison["wall_s_baseline"]
+    return comparison
+
+
+def main(scales=SCALES):
+    results = [run_benchmarks(n_papers) for n_papers in scales]
+    path = save_results(results)
+    print(results_frame(path).pivot(index="stage", columns="n_papers", values="wall_s"))
+    print(f"Benchmark results saved to: {path}")
+
+
+# The parallel stages re-import this module in their workers, so only run the benchmarks as a script
+if __name__ == "__main__":
+    main()
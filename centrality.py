@@ -0,0 +1,271 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from networkx.algorithms.centrality.betweenness import (
+    _accumulate_basic,
+    _accumulate_endpoints,
+    _single_source_dijkstra_path_basic,
+    _single_source_shortest_path_basic,
+)
+from scipy import sparse
+
+# Power iterations stop once the summed absolute change of the scores is below n * POWER_ITERATION_TOL,
+# the same criterion as the NetworkX implementations
+POWER_ITERATION_TOL = 1e-6
+POWER_ITERATION_MAX_ITER = 1000
+PAGERANK_ALPHA = 0.85
+# Katz attenuation as a fraction of 1 / spectral radius; the Katz series only converges below 1
+KATZ_ALPHA_FRACTION = 0.5
+
+# Graph shared with the worker processes, set once per worker by `_init_worker`
+_worker_graph = None
+
+
+def add_distance_weights(G, weight="weight", distance="distance"):
+    """
+    Store the inverse of each co-authorship count as a path length.
+
+    Co-authorship counts are strengths: two authors with many joint papers are
+    closer, not further apart. Shortest-path metrics need lengths, so every
+    edge gets `distance = 1 / weight`.
+
+    Returns:
+        str: Name of the distance attribute.
+    """
+    for _, _, data in G.edges(data=True):
+        data[distance] = 1.0 / data.get(weight, 1)
+    return distance
+
+
+def pivot_sample_size(n, epsilon, delta=0.1):
+    """
+    Number of pivots needed to estimate normalized betweenness within `epsilon`.
+
+    Uses the Hoeffding bound with a union bound over all nodes (Brandes & Pich,
+    2007): with probability at least 1 - delta, every node's estimate is within
+    epsilon of its exact value.
+    """
+    return min(n, math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2)))
+
+
+def _init_worker(G):
+    global _worker_graph
+    _worker_graph = G
+
+
+def _accumulate_sources(G, sources, weight, endpoints):
+    """Run Brandes' accumulation from a block of source nodes and return the partial scores."""
+    betweenness = dict.fromkeys(G, 0.0)
+    for s in sources:
+        if weight is None:
+            S, P, sigma, _ = _single_source_shortest_path_basic(G, s)
+        else:
+            S, P, sigma, _ = _single_source_dijkstra_path_basic(G, s, weight)
+        if endpoints:
+            betweenness, _ = _accumulate_endpoints(betweenness, S, P, sigma, s)
+        else:
+            betweenness, _ = _accumulate_basic(betweenness, S, P, sigma, s)
+    return np.fromiter(betweenness.values(), dtype=float, count=len(betweenness))
+
+
+def _worker_accumulate(args):
+    sources, weight, endpoints = args
+    return _accumulate_sources(_worker_graph, sources, weight, endpoints)
+
+
+def _rescale(scores, nodes, sources, normalized, endpoints):
+    """Scale summed pair dependencies the same way as `nx.betweenness_centrality` on an undirected graph."""
+    N = len(nodes) if endpoints else len(nodes) - 1
+    if N < 2:
+        return scores
+    n_sources = len(sources)
+    sampled = n_sources < len(nodes)
+    if not sampled:
+        # Exact scores count every valid (s, t) pair, of which there are N per target
+        n_sources = N
+    if normalized:
+        scale = 1 / (n_sources * (N - 1))
+    else:
+        scale = N / (n_sources * 2)
+    if not sampled or endpoints:
+        return scores * scale
+
+    # Without endpoints, a sampled source never counts itself as a pair member
+    if normalized:
+        source_scale = 1 / ((n_sources - 1) * (N - 1)) if n_sources > 1 else math.nan
+    else:
+        source_scale = N / ((n_sources - 1) * 2) if n_sources > 1 else math.nan
+    index = {node: i for i, node in enumerate(nodes)}
+    scales = np.full(len(nodes), scale)
+    scales[[index[s] for s in sources]] = source_scale
+    return scores * scales
+
+
+def betweenness_centrality(G, k=None, epsilon=None, delta=0.1, weight="distance", endpoints=True,
+                           normalized=True, workers=None, seed=42):
+    """
+    Betweenness centrality with Brandes sources split across a process pool.
+
+    Without `k` or `epsilon` the result is exact and equal to
+    `nx.betweenness_centrality`. Otherwise a random sample of pivot sources is
+    used, the same approximation as `nx.betweenness_centrality(G, k=...)`.
+
+    Args:
+        G (nx.Graph): Undirected co-authorship graph.
+        k (int): Number of sampled pivot sources.
+        epsilon (float): Target absolute error of the normalized scores; sets
+            `k` through `pivot_sample_size` when `k` is not given.
+        delta (float): Failure probability allowed for the `epsilon` bound.
+        weight (str): Edge attribute holding path lengths, or None for hop
+            counts. Use `add_distance_weights` to turn co-authorship counts into
+            lengths.
+        endpoints (bool): Include path endpoints in the counts.
+        normalized (bool): Normalize by the number of node pairs.
+        workers (int): Number of worker processes. Defaults to the CPU count;
+            use 1 to run in the current process.
+        seed (int): Seed of the pivot sample.
+
+    Returns:
+        dict: Betweenness centrality of every node.
+    """
+    nodes = list(G)
+    if not nodes:
+        return {}
+    if k is None and epsilon is not None:
+        k = pivot_sample_size(len(nodes), epsilon, delta)
+    sources = nodes if k is None or k >= len(nodes) else random.Random(seed).sample(nodes, k)
+
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+    if workers == 1:
+        scores = _accumulate_sources(G, sources, weight, endpoints)
+    else:
+        # Several blocks per worker keep the pool busy when source costs are uneven
+        blocks = [sources[i::workers * 4] for i in range(workers * 4)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(G,)) as executor:
+            scores = sum(executor.map(_worker_accumulate, ((block, weight, endpoints) for block in blocks if block)))
+
+    scores = _rescale(scores, nodes, sources, normalized, endpoints)
+    return dict(zip(nodes, scores.tolist()))
+
+
+def strength_centrality(adjacency):
+    """Return the weighted degree (total co-authorships) of every node of a sparse adjacency."""
+    return np.asarray(adjacency.sum(axis=1)).ravel()
+
+
+def pagerank(adjacency, alpha=PAGERANK_ALPHA, tol=POWER_ITERATION_TOL, max_iter=POWER_ITERATION_MAX_ITER):
+    """
+    PageRank of a weighted sparse adjacency by power iteration.
+
+    Equal to `nx.pagerank(G, alpha, weight="weight")`: a random walk follows
+    co-authorships in proportion to their counts, and nodes without any
+    co-author jump to a uniformly random node.
+
+    Returns:
+        np.ndarray: PageRank of every node, summing to 1.
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    strength = strength_centrality(adjacency)
+    dangling = strength == 0
+    inverse_strength = np.divide(1.0, strength, out=np.zeros(n), where=~dangling)
+    transposed = adjacency.T.tocsr()
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        last = x
+        x = alpha * (transposed @ (last * inverse_strength) + last[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - last).sum() < n * tol:
+            return x
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def _leading_eigenvector(adjacency, tol, max_iter):
+    """
+    Power iteration on A + I, as in `nx.eigenvector_centrality`.
+
+    The shift keeps the iteration from oscillating on bipartite components
+    without changing the eigenvectors.
+
+    Returns:
+        tuple: (unit-norm eigenvector, its eigenvalue of A).
+    """
+    n = adjacency.shape[0]
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        last = x
+        x = last + adjacency @ last
+        x /= np.linalg.norm(x)
+        if np.abs(x - last).sum() < n * tol:
+            return x, float(x @ (adjacency @ x))
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def eigenvector_centrality(adjacency, tol=POWER_ITERATION_TOL, max_iter=POWER_ITERATION_MAX_ITER):
+    """Eigenvector centrality of a weighted sparse adjacency, equal to `nx.eigenvector_centrality(G, weight="weight")`."""
+    if adjacency.shape[0] == 0:
+        return np.zeros(0)
+    return _leading_eigenvector(adjacency, tol, max_iter)[0]
+
+
+def katz_centrality(adjacency, alpha=None, beta=1.0, tol=POWER_ITERATION_TOL, max_iter=POWER_ITERATION_MAX_ITER):
+    """
+    Katz centrality of a weighted sparse adjacency by fixed-point iteration.
+
+    Equal to `nx.katz_centrality(G, alpha, beta, weight="weight")`. The NetworkX
+    default alpha of 0.1 diverges once co-authorship counts push the spectral
+    radius past 10, so by default alpha is KATZ_ALPHA_FRACTION of 1 / spectral
+    radius, estimated by `eigenvector_centrality`'s power iteration.
+
+    Returns:
+        np.ndarray: Katz centrality of every node, with unit Euclidean norm.
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    if alpha is None:
+        radius = _leading_eigenvector(adjacency, tol, max_iter)[1]
+        alpha = KATZ_ALPHA_FRACTION / radius if radius > 0 else KATZ_ALPHA_FRACTION
+    x = np.zeros(n)
+    for _ in range(max_iter):
+        last = x
+        x = alpha * (adjacency @ last) + beta
+        if np.abs(x - last).sum() < n * tol:
+            return x / np.linalg.norm(x)
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def sparse_centrality(adjacency, nodes=None, tol=POWER_ITERATION_TOL, max_iter=POWER_ITERATION_MAX_ITER):
+    """
+    Compute the weighted centrality metrics of a co-authorship adjacency at once.
+
+    Every metric is a sparse matrix-vector iteration over the co-authorship
+    counts, with no NetworkX graph, so graphs with 100k+ authors take seconds.
+    The leading eigenvector is computed once and its eigenvalue sets the Katz
+    attenuation.
+
+    Args:
+        adjacency (csr_matrix): Symmetric co-authorship counts.
+        nodes (array-like): Key of every row/column, used as the index.
+        tol (float): Per-node convergence tolerance of the power iterations.
+        max_iter (int): Maximum number of iterations per metric.
+
+    Returns:
+        pd.DataFrame: 'Strength', 'PageRank', 'Eigenvector Centrality' and
+            'Katz Centrality' of every node.
+    """
+    adjacency = sparse.csr_matrix(adjacency, dtype=np.float64)
+    n = adjacency.shape[0]
+    eigenvector, radius = _leading_eigenvector(adjacency, tol, max_iter) if n else (np.zeros(0), 0.0)
+    alpha = KATZ_ALPHA_FRACTION / radius if radius > 0 else KATZ_ALPHA_FRACTION
+    return pd.DataFrame({
+        "Strength": strength_centrality(adjacency),
+        "PageRank": pagerank(adjacency, tol=tol, max_iter=max_iter),
+        "Eigenvector Centrality": eigenvector,
+        "Katz Centrality": katz_centrality(adjacency, alpha=alpha, tol=tol, max_iter=max_iter),
+    }, index=None if nodes is None else pd.Index(nodes))
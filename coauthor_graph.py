@@ -0,0 +1,245 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def author_full_names(authors_df):
+    """Return the "Forename Lastname" display name of every author row."""
+    # Categorical name columns from the columnar cache do not support string concatenation
+    return authors_df["AuthorForename"].astype(object) + " " + authors_df["AuthorLastname"].astype(object)
+
+
+def author_column(authors_df, name_column=None):
+    """
+    Return the author key of every row.
+
+    Args:
+        authors_df (pd.DataFrame): Authors table.
+        name_column (str): Column holding the author key. By default the
+            'AuthorID' column of `author_index.attach_author_ids` is used when
+            present, and the "Forename Lastname" full name otherwise, which is
+            missing for authors without a forename.
+
+    Returns:
+        pd.Series: Author key of every row.
+    """
+    if name_column is None and "AuthorID" in authors_df.columns:
+        name_column = "AuthorID"
+    return authors_df[name_column] if name_column else author_full_names(authors_df)
+
+
+def incidence_matrix(pmids, authors):
+    """
+    Build the binary PMID x author incidence matrix.
+
+    Args:
+        pmids (array-like): PMID of every author row.
+        authors (array-like): Author key (name or integer author ID) of every author row.
+
+    Returns:
+        tuple: (csr_matrix of shape papers x authors, author keys in column order).
+            Authors are numbered in the order the old `groupby("PMID")` loop
+            added them to the graph; authors that only appear on single-author
+            papers come last.
+    """
+    rows = pd.DataFrame({"PMID": np.asarray(pmids), "Author": pd.array(authors)}).dropna()
+    rows = rows.sort_values("PMID", kind="stable").drop_duplicates()
+    paper_idx, _ = pd.factorize(rows["PMID"])
+
+    # Number co-authoring rows first so that node order matches the edge insertion order
+    paper_sizes = np.bincount(paper_idx)
+    shared = paper_sizes[paper_idx] > 1
+    _, author_keys = pd.factorize(pd.concat([rows["Author"][shared], rows["Author"][~shared]]))
+    author_idx = pd.Index(author_keys).get_indexer(rows["Author"])
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (paper_idx, author_idx)),
+        shape=(len(paper_sizes), len(author_keys))
+    )
+    return incidence, np.asarray(author_keys)
+
+
+def coauthor_adjacency(incidence, keep_isolates=False):
+    """
+    Compute weighted co-authorship counts from an incidence matrix.
+
+    Args:
+        incidence (csr_matrix): PMID x author incidence matrix.
+        keep_isolates (bool): Keep authors without any co-author. The NetworkX
+            loop never added them, so they are dropped by default.
+
+    Returns:
+        tuple: (symmetric csr_matrix of co-authorship counts with an empty
+            diagonal, indices of the kept authors in the incidence columns).
+    """
+    adjacency = (incidence.T @ incidence).tocsr()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+    if keep_isolates:
+        return adjacency, np.arange(adjacency.shape[0])
+    kept = np.flatnonzero(np.diff(adjacency.indptr))
+    return adjacency[kept][:, kept].tocsr(), kept
+
+
+def build_coauthor_adjacency(authors_df, name_column=None, keep_isolates=False):
+    """
+    Build the weighted co-authorship adjacency of an authors table.
+
+    Every pair of authors on the same paper adds one to their edge weight, the
+    same as the nested `has_edge`/`add_edge` loop, but all pairs are counted by
+    a single sparse product.
+
+    Args:
+        authors_df (pd.DataFrame): Authors with a 'PMID' column.
+        name_column (str): Column holding the author key, see `author_column`.
+            Rows with a missing key are skipped.
+        keep_isolates (bool): See `coauthor_adjacency`.
+
+    Returns:
+        tuple: (csr_matrix adjacency, np.ndarray of author keys per row/column).
+    """
+    authors = author_column(authors_df, name_column)
+    incidence, keys = incidence_matrix(authors_df["PMID"], authors)
+    adjacency, kept = coauthor_adjacency(incidence, keep_isolates=keep_isolates)
+    return adjacency, keys[kept]
+
+
+def to_networkx(adjacency, names):
+    """Export a co-authorship adjacency to a NetworkX graph with 'weight' edge attributes."""
+    upper = sparse.triu(adjacency, k=1).tocoo()
+    names = np.asarray(names)
+    G = nx.Graph()
+    G.add_nodes_from(names.tolist())
+    G.add_weighted_edges_from(zip(names[upper.row].tolist(), names[upper.col].tolist(), upper.data.tolist()))
+    return G
+
+
+def build_coauthor_graph(authors_df, name_column=None):
+    """Build the co-authorship network of an authors table as a NetworkX graph."""
+    return to_networkx(*build_coauthor_adjacency(authors_df, name_column=name_column))
+
+
+def build_field_adjacencies(authors_df, field_column="Field", name_column=None):
+    """
+    Build the co-authorship adjacency of every field from one global incidence matrix.
+
+    The authors table is factorized once; each field's graph is the sparse
+    product of the incidence rows of that field's papers, so no per-field
+    re-grouping of the table is needed. Nodes are ordered the same way as when
+    `build_coauthor_adjacency` is run on the field's rows alone.
+
+    Args:
+        authors_df (pd.DataFrame): Authors with 'PMID' and field columns.
+        field_column (str): Column holding the field of each paper.
+        name_column (str): See `build_coauthor_adjacency`.
+
+    Returns:
+        dict: Field -> (csr_matrix adjacency, np.ndarray of author keys), in
+            order of first appearance of the field.
+    """
+    authors = author_column(authors_df, name_column)
+    rows = pd.DataFrame({"PMID": authors_df["PMID"].to_numpy(), "Field": authors_df[field_column].to_numpy(),
+                         "Author": authors.array})
+    fields = rows["Field"].dropna().unique()
+    rows = rows.dropna().sort_values("PMID", kind="stable").drop_duplicates(["PMID", "Author"])
+    paper_idx, _ = pd.factorize(rows["PMID"])
+    author_idx, author_keys = pd.factorize(rows["Author"])
+    author_keys = np.asarray(author_keys)
+    paper_sizes = np.bincount(paper_idx)
+    incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (paper_idx, author_idx)),
+                                  shape=(len(paper_sizes), len(author_keys)))
+    paper_field = rows["Field"].to_numpy()[np.unique(paper_idx, return_index=True)[1]]
+
+    # Position of each author's first co-authoring row within every field, used for node order
+    shared = paper_sizes[paper_idx] > 1
+    first_seen = pd.Series(np.flatnonzero(shared)).groupby(
+        [rows["Field"].to_numpy()[shared], author_idx[shared]]).min()
+
+    adjacencies = {}
+    for field in fields:
+        adjacency, kept = coauthor_adjacency(incidence[np.flatnonzero(paper_field == field)])
+        if len(kept):
+            order = np.argsort(first_seen.loc[field].reindex(kept).to_numpy(), kind="stable")
+            kept = kept[order]
+            adjacency = adjacency[order][:, order].tocsr()
+        adjacencies[field] = (adjacency, author_keys[kept])
+    return adjacencies
+
+
+def author_paper_counts(authors_df, name_column=None):
+    """Return the number of distinct papers of every author, most productive first."""
+    authors = author_column(authors_df, name_column)
+    rows = pd.DataFrame({"PMID": authors_df["PMID"].to_numpy(), "Author": authors.array}).dropna()
+    counts = rows.drop_duplicates().groupby("Author", sort=False).size()
+    return counts.sort_values(ascending=False, kind="stable").rename("PaperCount")
+
+
+def top_authors(authors_df=None, n=20, scores=None, name_column=None):
+    """
+    Select authors for a collaboration matrix.
+
+    Args:
+        authors_df (pd.DataFrame): Authors table, used to rank by paper count.
+        n (int): Number of authors to select.
+        scores (pd.Series or dict): Author key -> score, e.g. a centrality
+            column; when given, the `n` highest scoring authors are selected.
+        name_column (str): See `build_coauthor_adjacency`.
+
+    Returns:
+        list: Selected author keys, highest ranked first.
+    """
+    if scores is not None:
+        return pd.Series(scores).nlargest(n).index.tolist()
+    return author_paper_counts(authors_df, name_column).head(n).index.tolist()
+
+
+def collaboration_matrix(authors_df, selection, name_column=None):
+    """
+    Count the joint papers of every pair of selected authors.
+
+    Only the incidence columns of the selected authors are built, and their
+    product gives all pair counts at once, so no PMID self-join is needed.
+
+    Args:
+        authors_df (pd.DataFrame): Authors with a 'PMID' column.
+        selection (list): Author keys, e.g. from `top_authors` or an explicit list.
+        name_column (str): See `build_coauthor_adjacency`.
+
+    Returns:
+        pd.DataFrame: Symmetric selection x selection joint paper counts with a
+            zero diagonal; selected authors without papers get zero rows.
+    """
+    authors = author_column(authors_df, name_column)
+    selected = authors.isin(selection).to_numpy()
+    incidence, keys = incidence_matrix(authors_df["PMID"].to_numpy()[selected], authors[selected])
+    counts = (incidence.T @ incidence).tocsr()
+    counts.setdiag(0)
+
+    order = pd.Index(keys).get_indexer(pd.Index(selection))
+    found = order >= 0
+    matrix = np.zeros((len(selection), len(selection)), dtype=np.int64)
+    matrix[np.ix_(found, found)] = counts[order[found]][:, order[found]].toarray()
+    return pd.DataFrame(matrix, index=pd.Index(selection, name="Author"), columns=pd.Index(selection, name="Author"))
+
+
+def total_collaborations(authors_df, selection=None, name_column=None):
+    """
+    Return the row sums of the collaboration matrix of every author, without building the matrix.
+
+    Args:
+        authors_df (pd.DataFrame): Authors with a 'PMID' column.
+        selection (list): Only count collaborations with these authors. By
+            default collaborations with every author are counted.
+        name_column (str): See `build_coauthor_adjacency`.
+
+    Returns:
+        pd.Series: Author key -> number of (paper, co-author) pairs.
+    """
+    authors = author_column(authors_df, name_column)
+    incidence, keys = incidence_matrix(authors_df["PMID"], authors)
+    counted = np.ones(len(keys), dtype=np.int64) if selection is None else \
+        pd.Index(keys).isin(selection).astype(np.int64)
+    # Each paper contributes the number of counted authors on it, minus the author itself when counted
+    per_paper = incidence @ counted
+    totals = incidence.T @ per_paper - counted * np.asarray(incidence.sum(axis=0)).ravel()
+    return pd.Series(totals, index=pd.Index(keys, name="Author"), name="TotalCollaborations")
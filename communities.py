@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# A level stops after PATIENCE sweeps of local moves that raise modularity by less than MIN_GAIN
+PATIENCE = 3
+MIN_GAIN = 1e-4
+# Fraction of the improving nodes moved per sweep; moving all of them at once oscillates
+MOVE_FRACTION = 0.8
+
+
+def modularity(adjacency, labels, resolution=1.0):
+    """Return the modularity of a partition of a weighted undirected adjacency."""
+    strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    total = strength.sum()
+    if total == 0:
+        return 0.0
+    coo = adjacency.tocoo()
+    internal = coo.data[labels[coo.row] == labels[coo.col]].sum()
+    community_strength = np.bincount(labels, weights=strength)
+    return float(internal / total - resolution * (community_strength ** 2).sum() / total ** 2)
+
+
+def _local_moves(adjacency, resolution, rng, max_sweeps):
+    """
+    Move nodes to the neighbouring community with the best modularity gain, all nodes at once.
+
+    Every sweep scores all (node, neighbouring community) pairs with sparse
+    sums. Moving every improving node simultaneously makes neighbours swap
+    communities back and forth, so a sweep moves a random MOVE_FRACTION of
+    them and a singleton only joins another singleton with a lower label.
+
+    Returns:
+        np.ndarray: Community label of every node, the best partition seen.
+    """
+    n = adjacency.shape[0]
+    strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    total = strength.sum()
+    coo = adjacency.tocoo()
+    # A node's self-loop (its internal weight after aggregation) moves with it and never changes the gain
+    off_diagonal = coo.row != coo.col
+    rows, cols, weights = coo.row[off_diagonal], coo.col[off_diagonal], coo.data[off_diagonal]
+    self_loops = coo.data[~off_diagonal].sum()
+
+    labels = np.arange(n)
+    if total == 0:
+        return labels
+    best_labels, best_quality = labels, -np.inf
+    stalled = 0
+    for _ in range(max_sweeps):
+        community_strength = np.bincount(labels, weights=strength, minlength=n)
+        # Weight from every node to every neighbouring community. Built transposed, so both conversions are
+        # stable counting sorts that leave the indices sorted and no comparison sort is needed
+        links = sparse.csr_matrix((weights, (labels[cols], rows)), shape=(n, n))
+        links.sum_duplicates()
+        links = links.T.tocsr()
+        link_rows = np.repeat(np.arange(n), np.diff(links.indptr))
+        own = links.indices == labels[link_rows]
+
+        own_links = np.zeros(n)
+        own_links[link_rows[own]] = links.data[own]
+        stay = own_links - resolution * strength * (community_strength[labels] - strength) / total
+        gain = links.data - resolution * strength[link_rows] * community_strength[links.indices] / total
+        gain[own] = -np.inf
+
+        # Modularity of the current labels, from the weights already summed per community
+        quality = (own_links.sum() + self_loops - resolution * (community_strength ** 2).sum() / total) / total
+        if quality > best_quality:
+            stalled = 0 if quality > best_quality + MIN_GAIN else stalled + 1
+            best_labels, best_quality = labels, quality
+        else:
+            stalled += 1
+        if stalled >= PATIENCE:
+            break
+
+        best_gain = np.full(n, -np.inf)
+        linked = np.flatnonzero(np.diff(links.indptr))
+        if len(linked) == 0:
+            break
+        best_gain[linked] = np.maximum.reduceat(gain, links.indptr[linked])
+        is_best = gain == best_gain[link_rows]
+        target = labels.copy()
+        target[link_rows[is_best]] = links.indices[is_best]
+
+        improving = best_gain > stay + 1e-12 * total
+        if not improving.any():
+            break
+        community_size = np.bincount(labels, minlength=n)
+        singleton_swap = (community_size[labels] == 1) & (community_size[target] == 1) & (target > labels)
+        move = improving & ~singleton_swap & (rng.random(n) < MOVE_FRACTION)
+        labels = np.where(move, target, labels)
+    return best_labels
+
+
+def louvain(adjacency, resolution=1.0, seed=42, max_levels=20, max_sweeps=100):
+    """
+    Detect communities of a weighted co-authorship adjacency with a Louvain-style method.
+
+    Each level runs vectorized local moves, then merges every community into
+    one node of a smaller weighted graph (P^T A P for the membership matrix P),
+    until a level merges nothing. The whole computation is sparse matrix and
+    array operations, and the same seed gives the same partition.
+
+    Args:
+        adjacency (csr_matrix): Symmetric co-authorship counts.
+        resolution (float): Modularity resolution; higher values give smaller communities.
+        seed (int): Random seed of the local moves.
+        max_levels (int): Maximum number of aggregation levels.
+        max_sweeps (int): Maximum number of local move sweeps per level.
+
+    Returns:
+        np.ndarray: Community of every node, numbered from the largest community (0) down.
+    """
+    rng = np.random.default_rng(seed)
+    graph = sparse.csr_matrix(adjacency, dtype=np.float64)
+    membership = np.arange(graph.shape[0])
+    for _ in range(max_levels):
+        _, labels = np.unique(_local_moves(graph, resolution, rng, max_sweeps), return_inverse=True)
+        n_communities = labels.max() + 1 if len(labels) else 0
+        if n_communities == graph.shape[0]:
+            break
+        membership = labels[membership]
+        merge = sparse.csr_matrix((np.ones(len(labels)), (np.arange(len(labels)), labels)),
+                                  shape=(len(labels), n_communities))
+        graph = (merge.T @ graph @ merge).tocsr()
+
+    # Number communities by decreasing size, ties by their first node
+    sizes = np.bincount(membership)
+    first = np.full(len(sizes), len(membership))
+    np.minimum.at(first, membership, np.arange(len(membership)))
+    order = np.lexsort((first, -sizes))
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[order] = np.arange(len(sizes))
+    return rank[membership].astype(np.int32)
+
+
+def community_summary(communities, author_ids, scores, names, authors_df, id_column="AuthorID", top_k=5):
+    """
+    Summarize every community.
+
+    Args:
+        communities (np.ndarray): Community of every graph node.
+        author_ids (np.ndarray): Author ID of every graph node.
+        scores (np.ndarray): Score ranking the authors of a community, e.g. betweenness.
+        names (np.ndarray): Display name of every graph node.
+        authors_df (pd.DataFrame): Author rows with the ID column and optional 'Field' and 'SJR' columns.
+        id_column (str): Column holding the integer author ID.
+        top_k (int): Number of top authors listed per community.
+
+    Returns:
+        pd.DataFrame: 'Community', 'Size', 'TopAuthors', 'DominantField' (most
+            frequent field of the members' papers) and 'MeanSJR' (over the
+            members' author rows), largest community first.
+    """
+    nodes = pd.DataFrame({"Community": communities, "Score": scores, "Author": names})
+    summary = nodes.groupby("Community").agg(Size=("Author", "size"))
+    top = nodes.sort_values(["Community", "Score"], ascending=[True, False], kind="stable")
+    summary["TopAuthors"] = top.groupby("Community")["Author"].agg(lambda group: "; ".join(group.head(top_k)))
+
+    # Attach the community of every author row through its author ID
+    community_of = pd.Series(communities, index=pd.Index(author_ids))
+    rows = authors_df[authors_df[id_column].isin(community_of.index)]
+    row_communities = community_of.reindex(rows[id_column].to_numpy()).to_numpy()
+    if "Field" in rows.columns:
+        fields = pd.DataFrame({"Community": row_communities, "Field": rows["Field"].astype(object).to_numpy()})
+        counts = fields.dropna().groupby(["Community", "Field"]).size()
+        summary["DominantField"] = counts.sort_values(ascending=False, kind="stable").reset_index() \
+            .drop_duplicates("Community").set_index("Community")["Field"]
+    if "SJR" in rows.columns:
+        summary["MeanSJR"] = pd.Series(rows["SJR"].to_numpy(dtype=float)).groupby(row_communities).mean()
+    return summary.reset_index()
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Fall back to reading the CSV files directly
+    pa = pq = None
+
+# Directory holding the columnar copies of the CSV files
+CACHE_DIR = 'data/.cache'
+
+# Explicit dtypes of the columns found in the articles, authors and paper count tables
+INTEGER_COLUMNS = {"PMID": "int64", "Year": "Int16", "AuthorN": "Int16", "Count": "int64", "SJRYear": "Int16",
+                   "AuthorID": "int32", "FirstYear": "Int16", "LastYear": "Int16"}
+FLOAT_COLUMNS = ["SJR", "AverageImpactFactor", "MedianImpactFactor", "ArticleCount"]
+BOOL_COLUMNS = ["Relevant"]
+# Low-cardinality text columns, stored dictionary-encoded and loaded as categoricals
+CATEGORICAL_COLUMNS = ["ISSN", "Journal", "Field", "PrimaryField", "SJRMatch", "AuthorForename", "AuthorLastname",
+                       "AuthorInitials", "FirstAuthorForename", "FirstAuthorLastname", "FirstAuthorInitials"]
+
+# Key under which the source file fingerprint is stored in the cache metadata
+_FINGERPRINT_KEY = b'source_fingerprint'
+
+
+def cache_path(csv_path, cache_dir=CACHE_DIR):
+    """
+    Return the path of the columnar cache file of a CSV file.
+
+    The name combines the CSV's base name with a hash of its absolute path, so
+    files with the same name in different directories get separate caches.
+    """
+    key = hashlib.sha1(os.path.abspath(csv_path).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(csv_path))[0]}_{key}.parquet")
+
+
+def source_fingerprint(csv_path):
+    """Fingerprint a source CSV by size and modification time."""
+    stat = os.stat(csv_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def apply_dtypes(df):
+    """Convert the known columns of a raw CSV chunk to their explicit dtypes."""
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors='coerce')
+            df[column] = values.astype(dtype if values.notna().all() else dtype.capitalize())
+    for column in FLOAT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    for column in BOOL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].map({'True': True, 'False': False, True: True, False: False}).astype('boolean')
+    return df
+
+
+def _schema(df):
+    """Arrow schema of a typed chunk, with every text column stored as strings."""
+    fields = []
+    for column in df.columns:
+        if column in INTEGER_COLUMNS or column in FLOAT_COLUMNS or column in BOOL_COLUMNS:
+            fields.append(pa.field(column, pa.Array.from_pandas(df[column].iloc[:0]).type))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def _write_cache(csv_path, target, encoding, chunksize):
+    """
+    Convert a CSV file to a compressed Parquet file, one row group per chunk.
+
+    The file is written under a unique temporary name and then renamed over
+    `target`, so processes refreshing the same cache at once never write into
+    one file and readers only ever see a complete cache.
+    """
+    writer = None
+    schema = None
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target) or '.', suffix='.tmp',
+                                    prefix=os.path.basename(target) + '.')
+    os.close(fd)
+    written = False
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, encoding=encoding, dtype=str):
+            chunk = apply_dtypes(chunk)
+            if writer is None:
+                # Text columns are typed explicitly so that an all-missing chunk still matches the schema
+                schema = _schema(chunk).with_metadata({_FINGERPRINT_KEY: source_fingerprint(csv_path).encode()})
+                writer = pq.ParquetWriter(tmp_path, schema, compression='zstd',
+                                          use_dictionary=[c for c in schema.names if c in CATEGORICAL_COLUMNS])
+            writer.write_table(pa.Table.from_pandas(chunk, preserve_index=False, schema=schema))
+        written = True
+    finally:
+        if writer is not None:
+            writer.close()
+        if not written:
+            os.remove(tmp_path)
+    os.replace(tmp_path, target)
+
+
+def refresh_cache(csv_path, cache_dir=CACHE_DIR, encoding=None, chunksize=200000):
+    """
+    Make sure the columnar cache of a CSV file is up to date.
+
+    The cache is rebuilt when it is missing or when the size or modification
+    time of the source CSV changed since it was written. Files that are not
+    valid UTF-8 are read as latin-1, like the raw PubMed exports.
+
+    Returns:
+        str: Path of the cache file.
+    """
+    target = cache_path(csv_path, cache_dir)
+    if os.path.exists(target):
+        metadata = pq.read_schema(target).metadata or {}
+        if metadata.get(_FINGERPRINT_KEY) == source_fingerprint(csv_path).encode():
+            return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if encoding is not None:
+        _write_cache(csv_path, target, encoding, chunksize)
+    else:
+        try:
+            _write_cache(csv_path, target, 'utf-8', chunksize)
+        except UnicodeDecodeError:
+            _write_cache(csv_path, target, 'latin-1', chunksize)
+    return target
+
+
+def _filters(years, pmids):
+    """Build Parquet row filters for a Year range and a PMID set."""
+    filters = []
+    if years is not None:
+        start, end = years
+        if start is not None:
+            filters.append(("Year", ">=", start))
+        if end is not None:
+            filters.append(("Year", "<=", end))
+    if pmids is not None:
+        filters.append(("PMID", "in", list(pmids)))
+    return filters or None
+
+
+def _load_csv(csv_path, columns, years, pmids, encoding):
+    """Read a table straight from its CSV file when Parquet support is not installed."""
+    try:
+        df = pd.read_csv(csv_path, usecols=columns, encoding=encoding or 'utf-8')
+    except UnicodeDecodeError:
+        df = pd.read_csv(csv_path, usecols=columns, encoding='latin-1')
+    df = apply_dtypes(df)
+    if years is not None:
+        start, end = years
+        if start is not None:
+            df = df[df["Year"] >= start]
+        if end is not None:
+            df = df[df["Year"] <= end]
+    if pmids is not None:
+        df = df[df["PMID"].isin(pmids)]
+    return df.reset_index(drop=True)
+
+
+def load_table(csv_path, columns=None, years=None, pmids=None, categorical=True, cache_dir=CACHE_DIR,
+               encoding=None):
+    """
+    Load an articles, authors or paper count table through its columnar cache.
+
+    Args:
+        csv_path (str): Path to the source CSV file.
+        columns (list): Columns to load. Other columns are never read.
+        years (tuple): Inclusive (start, end) Year range; either end may be None.
+        pmids (iterable): Only load rows with these PMIDs.
+        categorical (bool): Load journal, field and author name columns as
+            categoricals. Use False for code that fills or concatenates them.
+        cache_dir (str): Directory holding the cache files.
+        encoding (str): Encoding of the source CSV, detected when not given.
+
+    Returns:
+        pd.DataFrame: The requested rows and columns with explicit dtypes.
+    """
+    columns = list(columns) if columns is not None else None
+    if columns is not None:
+        available = pq.read_schema(refresh_cache(csv_path, cache_dir, encoding=encoding)).names if pq is not None \
+            else pd.read_csv(csv_path, nrows=0, encoding=encoding or 'latin-1').columns
+        missing = [column for column in columns if column not in available]
+        if missing:
+            raise KeyError(f"Missing one or more required columns: {missing}")
+    if pq is None:
+        df = _load_csv(csv_path, columns, years, pmids, encoding)
+    else:
+        target = refresh_cache(csv_path, cache_dir, encoding=encoding)
+        names = pq.read_schema(target).names
+        dictionary_columns = [c for c in CATEGORICAL_COLUMNS if c in names and (columns is None or c in columns)]
+        table = pq.read_table(target, columns=columns, filters=_filters(years, pmids),
+                              read_dictionary=dictionary_columns if categorical else None)
+        df = table.to_pandas()
+        # The cache schema has no pandas metadata, so integer columns with missing values are read as floats
+        for column, dtype in INTEGER_COLUMNS.items():
+            if column in df.columns and df[column].dtype.kind == 'f':
+                df[column] = df[column].astype(dtype.capitalize())
+        if columns is not None:
+            df = df[columns]
+
+    if categorical:
+        for column in CATEGORICAL_COLUMNS:
+            if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype('category')
+    return df
@@ -0,0 +1,141 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Keyword -> field map used to classify articles
+DEFAULT_FIELDS_PATH = 'data/articles_field.csv'
+
+# Label given to articles without any field keyword
+OTHER_FIELD = "Other"
+
+
+def load_field_keywords(path=DEFAULT_FIELDS_PATH):
+    """
+    Load the keyword -> field map.
+
+    Args:
+        path (str): CSV file with 'Keyword' and 'Field' columns.
+
+    Returns:
+        pd.DataFrame: One row per keyword, lowercased, in file order. The order
+            in which fields first appear is the order used to break ties.
+    """
+    field_map = pd.read_csv(path)
+    if "Keyword" not in field_map.columns or "Field" not in field_map.columns:
+        raise KeyError(f"The '{path}' file must contain 'Keyword' and 'Field' columns.")
+    field_map['Keyword'] = field_map['Keyword'].str.strip().str.lower()
+    field_map['Field'] = field_map['Field'].str.strip()
+    return field_map.dropna().drop_duplicates('Keyword').reset_index(drop=True)
+
+
+def field_order(field_map):
+    """Return the fields of a keyword map in order of first appearance."""
+    return list(pd.unique(field_map['Field']))
+
+
+def combined_text(articles_df):
+    """
+    Build the lowercase "title abstract" text used for classification.
+
+    Articles with a missing title or abstract get an empty text, so they end
+    up classified as "Other".
+    """
+    text = (articles_df['Title'].astype(str) + " " + articles_df['Abstract'].astype(str)).str.lower()
+    return text.where(articles_df['Title'].notna() & articles_df['Abstract'].notna(), "")
+
+
+def keyword_counts(texts, keywords):
+    """
+    Count keyword occurrences in every text.
+
+    Matches are substring counts, the same as `str.count`, so "antigen" is
+    also counted inside "antigenic".
+
+    Args:
+        texts (pd.Series): Lowercase texts.
+        keywords (list): Lowercase keywords.
+
+    Returns:
+        np.ndarray: Articles x keywords matrix of counts.
+    """
+    counts = np.zeros((len(texts), len(keywords)), dtype=np.int32)
+    for j, keyword in enumerate(keywords):
+        counts[:, j] = texts.str.count(re.escape(keyword)).to_numpy()
+    return counts
+
+
+def classify_fields(articles_df, field_map):
+    """
+    Classify a batch of articles into the field whose keywords occur most often.
+
+    Args:
+        articles_df (pd.DataFrame): Articles with 'Title' and 'Abstract' columns.
+        field_map (pd.DataFrame): Keyword -> field map from `load_field_keywords`.
+
+    Returns:
+        pd.DataFrame: 'Field' and 'FieldTie' of each article, aligned with
+            `articles_df`. Articles with no keyword match are labelled "Other".
+            When several fields share the highest count, the field that appears
+            first in the map wins and 'FieldTie' is True, so tied articles can
+            be told apart without adding a label the per-field analyses would
+            treat as a field.
+    """
+    fields = field_order(field_map)
+    # Keywords x fields indicator, so one product sums keyword counts per field
+    membership = np.zeros((len(field_map), len(fields)), dtype=np.int32)
+    membership[np.arange(len(field_map)), field_map['Field'].map(fields.index).to_numpy()] = 1
+
+    field_counts = keyword_counts(combined_text(articles_df), field_map['Keyword'].tolist()) @ membership
+    best = field_counts.argmax(axis=1)
+    top = field_counts.max(axis=1)
+
+    labels = np.array(fields, dtype=object)[best]
+    labels[top == 0] = OTHER_FIELD
+    tied = ((field_counts == top[:, None]).sum(axis=1) > 1) & (top > 0)
+    return pd.DataFrame({"Field": labels, "FieldTie": tied}, index=articles_df.index)
+
+
+def classify_articles(articles_df, field_map, tie_label=None):
+    """
+    Classify a batch of articles into the field whose keywords occur most often.
+
+    Args:
+        articles_df (pd.DataFrame): Articles with 'Title' and 'Abstract' columns.
+        field_map (pd.DataFrame): Keyword -> field map from `load_field_keywords`.
+        tie_label (str): Label for articles where several fields share the highest
+            count. By default the field listed first in the map wins; see
+            `classify_fields` for flagging ties in a separate column instead.
+
+    Returns:
+        pd.Series: Field of each article, aligned with `articles_df`. Articles
+            with no keyword match are labelled "Other".
+    """
+    classified = classify_fields(articles_df, field_map)
+    if tie_label is not None:
+        classified.loc[classified['FieldTie'], 'Field'] = tie_label
+    return classified['Field']
+
+
+def classify_articles_file(articles_path, output_path, field_map, chunksize=100000):
+    """
+    Stream an articles CSV in batches and write it back with the 'Field' and 'FieldTie' columns of `classify_fields`.
+
+    Args:
+        articles_path (str): Path to the articles CSV.
+        output_path (str): Path to save the classified articles.
+        field_map (pd.DataFrame): Keyword -> field map from `load_field_keywords`.
+        chunksize (int): Number of articles classified per batch.
+
+    Returns:
+        int: Number of articles written.
+    """
+    n_rows = 0
+    header = True
+    with open(output_path, 'w', newline='', encoding='utf-8') as output_file:
+        for chunk in pd.read_csv(articles_path, chunksize=chunksize):
+            chunk[['Field', 'FieldTie']] = classify_fields(chunk, field_map)
+            chunk.to_csv(output_file, index=False, header=header)
+            header = False
+            n_rows += len(chunk)
+    return n_rows
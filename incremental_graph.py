@@ -0,0 +1,174 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from centrality import add_distance_weights, betweenness_centrality
+from coauthor_graph import to_networkx
+
+# Directory holding the persisted co-authorship graph and metric state
+DEFAULT_STATE_DIR = 'data/graph_state'
+
+
+def empty_state(n_authors=0):
+    """
+    Return the state of a graph without any paper.
+
+    The state is a dict of arrays indexed by integer author ID:
+    'adjacency' (co-authorship counts), 'paper_counts', 'components'
+    (connected component labels), 'betweenness_raw' (unnormalized
+    betweenness) and 'dirty' (nodes whose betweenness is out of date), plus
+    the sorted 'pmids' already added.
+    """
+    return {
+        "adjacency": sparse.csr_matrix((n_authors, n_authors), dtype=np.int32),
+        "paper_counts": np.zeros(n_authors, dtype=np.int32),
+        "components": np.arange(n_authors, dtype=np.int32),
+        "betweenness_raw": np.zeros(n_authors),
+        "dirty": np.zeros(n_authors, dtype=bool),
+        "pmids": np.array([], dtype=np.int64),
+    }
+
+
+def _grow(state, n_authors):
+    """Extend the per-author arrays of a state to cover new author IDs."""
+    current = state["adjacency"].shape[0]
+    if n_authors <= current:
+        return
+    extra = n_authors - current
+    adjacency = state["adjacency"].tocsr(copy=True)
+    adjacency.resize((n_authors, n_authors))
+    state["adjacency"] = adjacency
+    state["paper_counts"] = np.concatenate([state["paper_counts"], np.zeros(extra, dtype=np.int32)])
+    state["components"] = np.concatenate([state["components"], np.arange(current, n_authors, dtype=np.int32)])
+    state["betweenness_raw"] = np.concatenate([state["betweenness_raw"], np.zeros(extra)])
+    state["dirty"] = np.concatenate([state["dirty"], np.zeros(extra, dtype=bool)])
+
+
+def add_papers(state, authors_df, id_column="AuthorID"):
+    """
+    Add the author pairs of papers not yet in the graph as weight increments.
+
+    Paper counts and degrees are updated exactly. Every connected component
+    that gained an edge is marked dirty, so `update_betweenness` only
+    recomputes path-based metrics where the graph changed.
+
+    Args:
+        state (dict): Graph state from `empty_state` or `load_graph_state`.
+        authors_df (pd.DataFrame): Author rows with 'PMID' and integer author IDs.
+            Rows of papers that were already added are ignored.
+        id_column (str): Column holding the integer author ID.
+
+    Returns:
+        int: Number of new papers added.
+    """
+    rows = authors_df[["PMID", id_column]].dropna()
+    rows = rows[~rows["PMID"].isin(state["pmids"])].drop_duplicates()
+    if rows.empty:
+        return 0
+
+    paper_idx, pmids = pd.factorize(rows["PMID"])
+    author_ids = rows[id_column].to_numpy(dtype=np.int64)
+    _grow(state, int(author_ids.max()) + 1)
+    n_authors = state["adjacency"].shape[0]
+
+    incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (paper_idx, author_ids)),
+                                  shape=(len(pmids), n_authors))
+    delta = (incidence.T @ incidence).tocsr()
+    delta.setdiag(0)
+    delta.eliminate_zeros()
+
+    state["adjacency"] = (state["adjacency"] + delta).tocsr()
+    state["paper_counts"] += np.asarray(incidence.sum(axis=0), dtype=np.int32).ravel()
+    state["pmids"] = np.union1d(state["pmids"], np.asarray(pmids, dtype=np.int64))
+
+    # Recompute component labels and mark every component touched by a new edge
+    _, state["components"] = connected_components(state["adjacency"], directed=False)
+    touched = np.unique(state["components"][np.flatnonzero(np.diff(delta.indptr))])
+    state["dirty"] |= np.isin(state["components"], touched)
+    return len(pmids)
+
+
+def update_betweenness(state, weighted=True, endpoints=True, workers=None):
+    """
+    Recompute the unnormalized betweenness of the dirty components only.
+
+    Betweenness never crosses components, so clean components keep their
+    scores. All dirty components are solved together in one call.
+
+    Args:
+        state (dict): Graph state.
+        weighted (bool): Use inverse co-authorship counts as path lengths;
+            otherwise count hops.
+        endpoints (bool): Include path endpoints in the counts.
+        workers (int): Worker processes passed to `centrality.betweenness_centrality`.
+
+    Returns:
+        int: Number of nodes recomputed.
+    """
+    dirty = np.flatnonzero(state["dirty"] & (np.diff(state["adjacency"].indptr) > 0))
+    if len(dirty):
+        G = to_networkx(state["adjacency"][dirty][:, dirty], dirty)
+        weight = add_distance_weights(G) if weighted else None
+        scores = betweenness_centrality(G, weight=weight, endpoints=endpoints, normalized=False, workers=workers)
+        state["betweenness_raw"][dirty] = np.fromiter((scores[node] for node in dirty.tolist()), dtype=float,
+                                                      count=len(dirty))
+    state["dirty"][:] = False
+    return len(dirty)
+
+
+def centrality_frame(state, endpoints=True):
+    """
+    Return the degree and betweenness centrality of every author in the graph.
+
+    Scores are normalized the same way as `nx.degree_centrality` and
+    `nx.betweenness_centrality`, using the current number of nodes.
+
+    Returns:
+        pd.DataFrame: 'AuthorID', 'Degree Centrality', 'Betweenness Centrality'
+            and 'PaperCount' of the authors with at least one co-author.
+    """
+    degrees = np.diff(state["adjacency"].indptr)
+    nodes = np.flatnonzero(degrees > 0)
+    n = len(nodes)
+    N = n if endpoints else n - 1
+    # Unnormalized scores count each unordered pair once; normalized ones divide ordered pairs by N(N - 1)
+    scale = 2 / (N * (N - 1)) if N >= 2 else 1
+    return pd.DataFrame({
+        "AuthorID": nodes.astype(np.int32),
+        "Degree Centrality": degrees[nodes] / (n - 1) if n > 1 else np.ones(n),
+        "Betweenness Centrality": state["betweenness_raw"][nodes] * scale,
+        "PaperCount": state["paper_counts"][nodes],
+    })
+
+
+def state_adjacency(state):
+    """Return the adjacency of the authors with at least one co-author and their author IDs."""
+    nodes = np.flatnonzero(np.diff(state["adjacency"].indptr))
+    return state["adjacency"][nodes][:, nodes].tocsr(), nodes
+
+
+def state_graph(state):
+    """Export the authors with at least one co-author and their edges as a NetworkX graph."""
+    return to_networkx(*state_adjacency(state))
+
+
+def save_graph_state(state, directory=DEFAULT_STATE_DIR):
+    """Persist a graph state as a sparse adjacency file and an array file."""
+    os.makedirs(directory, exist_ok=True)
+    sparse.save_npz(os.path.join(directory, "adjacency.npz"), state["adjacency"])
+    np.savez_compressed(os.path.join(directory, "metrics.npz"),
+                        **{key: value for key, value in state.items() if key != "adjacency"})
+
+
+def load_graph_state(directory=DEFAULT_STATE_DIR):
+    """Load a persisted graph state, or return None when there is none yet."""
+    adjacency_path = os.path.join(directory, "adjacency.npz")
+    if not os.path.exists(adjacency_path):
+        return None
+    state = {"adjacency": sparse.load_npz(adjacency_path).tocsr()}
+    with np.load(os.path.join(directory, "metrics.npz")) as arrays:
+        state.update({key: arrays[key] for key in arrays.files})
+    return state
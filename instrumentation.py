@@ -0,0 +1,258 @@
+import atexit
+import cProfile
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+# Tracing is opt-in through the environment, so production runs can be traced without editing code:
+# GROUP6_TRACE             path of the trace file; tracing is off when unset
+# GROUP6_TRACE_FORMAT      "json" (default) or "chrome" (chrome://tracing / Perfetto)
+# GROUP6_TRACE_ALLOCATIONS "1" to record the top allocation sites of every stage with tracemalloc
+# GROUP6_PROFILE           comma-separated names of the stages to profile, e.g. "centrality"
+# GROUP6_PROFILE_MODE      "cprofile" (default, deterministic) or "sample" (low-overhead stack sampling)
+TRACE_ENV = "GROUP6_TRACE"
+TRACE_FORMAT_ENV = "GROUP6_TRACE_FORMAT"
+ALLOCATIONS_ENV = "GROUP6_TRACE_ALLOCATIONS"
+PROFILE_ENV = "GROUP6_PROFILE"
+PROFILE_MODE_ENV = "GROUP6_PROFILE_MODE"
+
+# Number of allocation sites and profiled functions kept per stage
+TOP_ENTRIES = 15
+# Stage counts reported with a per-second rate
+RATE_COUNTS = ("rows", "nodes", "edges", "bytes")
+
+
+def current_rss_mb():
+    """Return the resident set size of this process in MB, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None when unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class StackSampler:
+    """Sample the stack of one thread at a fixed interval and count the functions on it."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.inclusive = Counter()
+        self.leaf = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.leaf[self._label(frame)] += 1
+            seen = set()
+            while frame is not None:
+                label = self._label(frame)
+                if label not in seen:
+                    seen.add(label)
+                    self.inclusive[label] += 1
+                frame = frame.f_back
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self, top=TOP_ENTRIES):
+        """Return the functions seen in most samples, with their share of the samples."""
+        total = max(self.samples, 1)
+        return [{"function": function, "inclusive": count / total, "self": self.leaf[function] / total}
+                for function, count in self.inclusive.most_common(top)]
+
+
+def _cprofile_summary(profiler, top=TOP_ENTRIES):
+    """Return the functions with the highest cumulative time of a cProfile run."""
+    profiler.create_stats()
+    rows = sorted(profiler.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return [{"function": f"{filename}:{line}({name})", "calls": calls, "total_s": round(total, 6),
+             "cumulative_s": round(cumulative, 6)}
+            for (filename, line, name), (_, calls, total, cumulative, _) in rows]
+
+
+class Tracer:
+    """
+    Record named stages of a run and write them as a JSON or Chrome trace.
+
+    Stages nest; every record holds the wall time, the counts passed to
+    `stage` with their per-second rates, the current and peak RSS and,
+    when enabled, the top allocation sites and a profile of the stage.
+    """
+
+    def __init__(self, path=None, trace_format="json", profile=(), profile_mode="cprofile", allocations=False):
+        self.path = path
+        self.trace_format = trace_format
+        self.profile = set(profile)
+        self.profile_mode = profile_mode
+        self.allocations = allocations
+        self.records = []
+        self._depth = 0
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    @classmethod
+    def from_environment(cls):
+        """Create a tracer configured by the GROUP6_* environment variables."""
+        profile = [name.strip() for name in os.environ.get(PROFILE_ENV, "").split(",") if name.strip()]
+        return cls(path=os.environ.get(TRACE_ENV) or None,
+                   trace_format=os.environ.get(TRACE_FORMAT_ENV, "json"),
+                   profile=profile,
+                   profile_mode=os.environ.get(PROFILE_MODE_ENV, "cprofile"),
+                   allocations=os.environ.get(ALLOCATIONS_ENV) == "1")
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """
+        Time a stage of the run.
+
+        Counts such as `rows=len(df)` or `edges=adjacency.nnz // 2` can be
+        given up front or set on the yielded record inside the block; the
+        RATE_COUNTS are also reported as '<count>_per_s' rates. When tracing
+        is disabled the stage costs a dictionary and nothing is recorded.
+        """
+        if not self.enabled:
+            yield {}
+            return
+
+        record = {"name": name, "pid": os.getpid(), "depth": self._depth, "start_us": time.time_ns() // 1000,
+                  **counts}
+        profiler = sampler = snapshot = None
+        if self.allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            snapshot = tracemalloc.take_snapshot()
+        # "centrality" also selects the per-field "centrality:<field>" stages
+        if name in self.profile or name.split(":")[0] in self.profile:
+            if self.profile_mode == "sample":
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as error:
+            record["error"] = repr(error)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self._depth -= 1
+            if profiler is not None:
+                profiler.disable()
+                record["profile"] = _cprofile_summary(profiler)
+                # The full profile can be browsed with pstats or snakeviz
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                slug = "".join(char if char.isalnum() else "_" for char in name)
+                profiler.dump_stats(f"{os.path.splitext(self.path)[0]}.{slug}.{os.getpid()}.prof")
+            if sampler is not None:
+                sampler.stop()
+                record["profile"] = sampler.summary()
+            if snapshot is not None:
+                stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")[:TOP_ENTRIES]
+                record["allocations"] = [{"site": str(stat.traceback[0]), "size_kb": round(stat.size_diff / 1024, 1),
+                                          "count": stat.count_diff} for stat in stats]
+
+            record["duration_s"] = round(duration, 6)
+            for key in RATE_COUNTS:
+                if record.get(key) is not None and duration > 0:
+                    record[f"{key}_per_s"] = round(record[key] / duration, 1)
+            record["rss_mb"] = current_rss_mb()
+            record["peak_rss_mb"] = peak_rss_mb()
+            self.records.append(record)
+
+    def save(self, path=None):
+        """Write the recorded stages to the trace file."""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        records = sorted(self.records, key=lambda record: record["start_us"])
+        if self.trace_format == "chrome":
+            trace = {"displayTimeUnit": "ms", "traceEvents": [
+                {"name": record["name"], "ph": "X", "ts": record["start_us"], "dur": record["duration_s"] * 1e6,
+                 "pid": record["pid"], "tid": record["pid"],
+                 "args": {key: value for key, value in record.items()
+                          if key not in ("name", "start_us", "duration_s", "pid")}}
+                for record in records]}
+        else:
+            trace = {"argv": sys.argv, "pid": os.getpid(), "stages": records}
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(trace, file, indent=1, default=str)
+
+
+_tracer = None
+
+
+def get_tracer():
+    """Return the tracer of this process, configured from the environment on first use."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer.from_environment()
+        # Worker processes hand their records back through `run_traced` instead of writing the file
+        if _tracer.enabled and multiprocessing.parent_process() is None:
+            atexit.register(lambda: _tracer.records and _tracer.save())
+    return _tracer
+
+
+def stage(name, **counts):
+    """Time a stage with the process tracer; see `Tracer.stage`."""
+    return get_tracer().stage(name, **counts)
+
+
+def run_traced(func, *args, **kwargs):
+    """
+    Call `func` in a worker process and return its result with the stages it recorded.
+
+    Submit `run_traced` instead of `func` to a process pool and pass the
+    records to `add_records` in the parent, so worker stages end up in the
+    same trace.
+    """
+    tracer = get_tracer()
+    tracer.records = []
+    result = func(*args, **kwargs)
+    records, tracer.records = tracer.records, []
+    return result, records
+
+
+def add_records(records):
+    """Add stages recorded in a worker process to this process's trace."""
+    get_tracer().records.extend(records)
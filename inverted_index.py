@@ -0,0 +1,368 @@
+import glob
+import os
+import re
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from field_classifier import field_order
+from keyword_filter import normalize_series
+
+# Directory holding the index segments
+DEFAULT_INDEX_DIR = 'data/article_index'
+
+# Version of the segment layout; segments written by another version are rebuilt by `update_index`
+INDEX_VERSION = 2
+
+# Terms are the runs of word characters of the normalized text, the same words `\b` separates
+_WORD = r"\w+"
+# Separators are the runs of other characters between two terms
+_SEPARATOR = r"\b\W+\b"
+
+
+class Segment(NamedTuple):
+    """
+    Positional postings of one batch of articles.
+
+    Term t occurs in the local documents `post_doc[term_ptr[t]:term_ptr[t + 1]]`;
+    posting p lists its positions in `positions[post_ptr[p]:post_ptr[p + 1]]`.
+    Local document d is the article `pmids[d]`. The text between a token and
+    the previous term of the same title or abstract is
+    `separators[separator_codes[i]]`, with code -1 for the first token.
+    """
+    pmids: np.ndarray
+    terms: pd.Index
+    term_ptr: np.ndarray
+    post_doc: np.ndarray
+    post_ptr: np.ndarray
+    positions: np.ndarray
+    separators: pd.Index
+    separator_codes: np.ndarray
+
+
+def keyword_words(keyword):
+    """Split a keyword or phrase into index terms, normalized like the indexed text."""
+    return re.findall(_WORD, normalize_series(pd.Series([keyword])).iloc[0])
+
+
+def keyword_separators(keyword):
+    """Return the separators between the terms of a keyword or phrase, e.g. [' '] for "snail control"."""
+    return re.findall(_SEPARATOR, normalize_series(pd.Series([keyword])).iloc[0])
+
+
+def _offsets(lengths):
+    """Position of every element within its group, for groups of the given lengths laid out one after another."""
+    return np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+
+def _ranges(starts, ends):
+    """Concatenate `np.arange(start, end)` over many ranges without a Python loop."""
+    lengths = ends - starts
+    return np.repeat(starts, lengths) + _offsets(lengths)
+
+
+def article_tokens(articles_df):
+    """
+    Tokenize the normalized titles and abstracts of a batch of articles.
+
+    Abstract positions continue one past the end of the title, so a phrase
+    never matches across the two, the same as matching them separately.
+
+    Returns:
+        tuple: (local document, position, term, separator) of every token; the
+            separator is the text since the previous term, None for the first
+            token of a title or abstract.
+    """
+    docs, positions, words, separators = [], [], [], []
+    start = np.zeros(len(articles_df), dtype=np.int64)
+    for column in ['Title', 'Abstract']:
+        texts = normalize_series(articles_df[column])
+        tokens = texts.str.findall(_WORD)
+        lengths = tokens.str.len().to_numpy(dtype=np.int64)
+        offsets = _offsets(lengths)
+        docs.append(np.repeat(np.arange(len(lengths)), lengths))
+        positions.append(offsets + np.repeat(start, lengths))
+        words.append(tokens.explode().dropna().to_numpy(dtype=object))
+        # A text of n terms has n - 1 separators, one before each term but the first
+        column_separators = np.full(len(offsets), None, dtype=object)
+        column_separators[offsets > 0] = texts.str.findall(_SEPARATOR).explode().dropna().to_numpy(dtype=object)
+        separators.append(column_separators)
+        start = start + lengths + 1
+    return np.concatenate(docs), np.concatenate(positions), np.concatenate(words), np.concatenate(separators)
+
+
+def build_segment(pmids, docs, positions, words, separators):
+    """Sort tokens by term, document and position into a `Segment`."""
+    # Hash the tokens, then sort only the vocabulary so term IDs follow term order
+    codes, terms = pd.factorize(words)
+    rank = np.empty(len(terms), dtype=np.int64)
+    order = np.argsort(terms)
+    rank[order] = np.arange(len(terms))
+    terms, codes = terms[order], rank[codes]
+    separator_codes, separator_vocabulary = pd.factorize(separators)
+    order = np.lexsort((positions, docs, codes))
+    codes, docs, positions, separator_codes = codes[order], docs[order], positions[order], separator_codes[order]
+    new_posting = np.ones(len(codes), dtype=bool)
+    new_posting[1:] = (codes[1:] != codes[:-1]) | (docs[1:] != docs[:-1])
+    post_start = np.flatnonzero(new_posting)
+    return Segment(pmids=np.asarray(pmids, dtype=np.int64),
+                   terms=pd.Index(terms, dtype=object),
+                   term_ptr=np.searchsorted(codes[post_start], np.arange(len(terms) + 1)),
+                   post_doc=docs[post_start].astype(np.int32),
+                   post_ptr=np.append(post_start, len(codes)),
+                   positions=positions.astype(np.int32),
+                   separators=pd.Index(separator_vocabulary, dtype=object),
+                   # Texts use a handful of distinct separators, so the codes mostly fit in one byte
+                   separator_codes=separator_codes.astype(np.min_scalar_type(-len(separator_vocabulary) - 1)))
+
+
+def save_segment(segment, path):
+    """
+    Write a segment; terms are stored as one newline-separated UTF-8 buffer.
+
+    Separators may contain newlines, so they are stored as one UTF-8 buffer
+    with the byte offset of each separator. Segments are left uncompressed:
+    compression takes longer than tokenizing and slows every load of the index.
+    """
+    terms = np.frombuffer("\n".join(segment.terms).encode("utf-8"), dtype=np.uint8)
+    encoded = [separator.encode("utf-8") for separator in segment.separators]
+    separator_ptr = np.cumsum([0] + [len(separator) for separator in encoded], dtype=np.int64)
+    np.savez(path, version=np.int64(INDEX_VERSION), pmids=segment.pmids, terms=terms, term_ptr=segment.term_ptr,
+             post_doc=segment.post_doc, post_ptr=segment.post_ptr, positions=segment.positions,
+             separators=np.frombuffer(b"".join(encoded), dtype=np.uint8), separator_ptr=separator_ptr,
+             separator_codes=segment.separator_codes)
+
+
+def segment_version(path):
+    """Return the layout version a segment was written with; segments without one are version 1."""
+    with np.load(path) as arrays:
+        return int(arrays["version"]) if "version" in arrays.files else 1
+
+
+def load_segment(path):
+    """
+    Read a segment written by `save_segment`.
+
+    Raises:
+        ValueError: If the segment was written by another index version.
+    """
+    with np.load(path) as arrays:
+        version = int(arrays["version"]) if "version" in arrays.files else 1
+        if version != INDEX_VERSION:
+            raise ValueError(f"'{path}' was written by index version {version}, not {INDEX_VERSION}; "
+                             f"run update_index to rebuild it.")
+        text = arrays["terms"].tobytes().decode("utf-8")
+        buffer = arrays["separators"].tobytes()
+        separator_ptr = arrays["separator_ptr"]
+        separators = [buffer[start:end].decode("utf-8") for start, end in zip(separator_ptr[:-1], separator_ptr[1:])]
+        return Segment(pmids=arrays["pmids"], terms=pd.Index(text.split("\n") if text else [], dtype=object),
+                       term_ptr=arrays["term_ptr"], post_doc=arrays["post_doc"], post_ptr=arrays["post_ptr"],
+                       positions=arrays["positions"], separators=pd.Index(separators, dtype=object),
+                       separator_codes=arrays["separator_codes"])
+
+
+def segment_paths(directory=DEFAULT_INDEX_DIR):
+    """Return the segment files of an index, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, "segment_*.npz")))
+
+
+def indexed_pmids(directory=DEFAULT_INDEX_DIR):
+    """Return the PMIDs of every indexed article, reading only the PMID array of each segment."""
+    pmids = []
+    for path in segment_paths(directory):
+        with np.load(path) as arrays:
+            pmids.append(arrays["pmids"])
+    return np.concatenate(pmids) if pmids else np.zeros(0, dtype=np.int64)
+
+
+def _next_segment_path(directory):
+    paths = segment_paths(directory)
+    number = int(os.path.basename(paths[-1])[len("segment_"):-len(".npz")]) + 1 if paths else 0
+    return os.path.join(directory, f"segment_{number:05d}.npz")
+
+
+def update_index(articles_path, directory=DEFAULT_INDEX_DIR, chunksize=50000, encoding=None):
+    """
+    Add the articles of a CSV that are not indexed yet.
+
+    Every chunk with new PMIDs becomes a new segment, so articles already in
+    the index are never tokenized again; `compact_index` merges the segments.
+    When any segment was written by another `INDEX_VERSION`, the whole index
+    is deleted and rebuilt.
+
+    Args:
+        articles_path (str): Articles with 'PMID', 'Title' and 'Abstract' columns.
+        directory (str): Index directory, created when missing.
+        chunksize (int): Number of articles read per chunk.
+        encoding (str): Encoding of the articles CSV.
+
+    Returns:
+        int: Number of articles added.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if any(segment_version(path) != INDEX_VERSION for path in segment_paths(directory)):
+        for path in segment_paths(directory):
+            os.remove(path)
+    known = pd.Index(indexed_pmids(directory))
+    n_added = 0
+    for chunk in pd.read_csv(articles_path, usecols=['PMID', 'Title', 'Abstract'], chunksize=chunksize,
+                             encoding=encoding):
+        chunk = chunk[~chunk['PMID'].isin(known)].drop_duplicates('PMID')
+        if chunk.empty:
+            continue
+        save_segment(build_segment(chunk['PMID'].to_numpy(), *article_tokens(chunk)), _next_segment_path(directory))
+        known = known.append(pd.Index(chunk['PMID'].to_numpy()))
+        n_added += len(chunk)
+    return n_added
+
+
+def compact_index(directory=DEFAULT_INDEX_DIR):
+    """Merge all segments of an index into one, which makes substring queries scan a single vocabulary."""
+    paths = segment_paths(directory)
+    if len(paths) < 2:
+        return
+    pmids, docs, positions, words, separators = [], [], [], [], []
+    n_docs = 0
+    for path in paths:
+        segment = load_segment(path)
+        pmids.append(segment.pmids)
+        docs.append(np.repeat(segment.post_doc.astype(np.int64) + n_docs, np.diff(segment.post_ptr)))
+        positions.append(segment.positions)
+        # A term's postings are contiguous, so its tokens span post_ptr from its first to its last posting
+        words.append(np.repeat(segment.terms.to_numpy(), np.diff(segment.post_ptr[segment.term_ptr])))
+        codes = segment.separator_codes
+        separators.append(np.where(codes >= 0, segment.separators.to_numpy()[np.maximum(codes, 0)], None)
+                          if len(segment.separators) else np.full(len(codes), None, dtype=object))
+        n_docs += len(segment.pmids)
+    merged = build_segment(np.concatenate(pmids), np.concatenate(docs), np.concatenate(positions),
+                           np.concatenate(words), np.concatenate(separators))
+    path = _next_segment_path(directory)
+    save_segment(merged, path)
+    for old_path in paths:
+        os.remove(old_path)
+
+
+class InvertedIndex:
+    """
+    Persistent positional index of article titles and abstracts.
+
+    Whole-word matching gives the same articles as the `\\b`-bounded regex of
+    `keyword_filter`, but by looking up and intersecting posting lists instead
+    of scanning every abstract. Substring matching counts occurrences like the
+    `str.count` of `field_classifier` by scanning the vocabulary rather than
+    the text. Words of a phrase only match when they are separated exactly as
+    in the phrase, so "snail control" matches neither "snail-control" nor
+    "snail  control".
+    """
+
+    def __init__(self, directory=DEFAULT_INDEX_DIR):
+        self.directory = directory
+        self.segments = [load_segment(path) for path in segment_paths(directory)]
+
+    def __len__(self):
+        return sum(len(segment.pmids) for segment in self.segments)
+
+    @staticmethod
+    def _term_ids(segment, word, how):
+        """Return the terms equal to, containing, starting with or ending with a word."""
+        if how == "exact":
+            position = segment.terms.get_indexer([word])
+            return position[position >= 0]
+        terms = segment.terms.str
+        match = {"contains": terms.contains(word, regex=False), "prefix": terms.startswith(word),
+                 "suffix": terms.endswith(word)}[how]
+        return np.flatnonzero(match)
+
+    @staticmethod
+    def _postings(segment, term_ids):
+        return _ranges(segment.term_ptr[term_ids], segment.term_ptr[term_ids + 1])
+
+    def _segment_counts(self, segment, words, separators, substring):
+        """Count the occurrences of a keyword's words and separators in every local document of one segment."""
+        n_docs = len(segment.pmids)
+        if len(words) == 1:
+            word = words[0]
+            term_ids = self._term_ids(segment, word, "contains" if substring else "exact")
+            # A term holding the word several times counts each non-overlapping occurrence, as `str.count`
+            multiplicity = segment.terms[term_ids].str.count(re.escape(word)).to_numpy() if substring \
+                else np.ones(len(term_ids), dtype=np.int64)
+            postings = self._postings(segment, term_ids)
+            weights = (segment.post_ptr[postings + 1] - segment.post_ptr[postings]) * np.repeat(
+                multiplicity, segment.term_ptr[term_ids + 1] - segment.term_ptr[term_ids])
+            return np.bincount(segment.post_doc[postings], weights=weights, minlength=n_docs)
+
+        # Phrases: (document, start position) keys of every word, intersected from word to word
+        keys = None
+        for offset, word in enumerate(words):
+            how = "exact"
+            if substring and offset == 0:
+                how = "suffix"
+            elif substring and offset == len(words) - 1:
+                how = "prefix"
+            postings = self._postings(segment, self._term_ids(segment, word, how))
+            tf = segment.post_ptr[postings + 1] - segment.post_ptr[postings]
+            tokens = _ranges(segment.post_ptr[postings], segment.post_ptr[postings + 1])
+            docs = np.repeat(segment.post_doc[postings].astype(np.int64), tf)
+            start = segment.positions[tokens].astype(np.int64) - offset
+            valid = start >= 0
+            if offset > 0:
+                # The text before the word must be the phrase's own separator, e.g. one space
+                code = segment.separators.get_indexer([separators[offset - 1]])[0]
+                valid &= (segment.separator_codes[tokens] == code) & (code >= 0)
+            word_keys = (docs[valid] << 32) | start[valid]
+            keys = word_keys if keys is None else np.intersect1d(keys, word_keys)
+            if len(keys) == 0:
+                break
+        return np.bincount(keys >> 32, minlength=n_docs).astype(float)
+
+    def count(self, keyword, substring=False):
+        """
+        Count the occurrences of a keyword or phrase in every article.
+
+        Args:
+            keyword (str): Keyword or phrase, normalized like the indexed text.
+            substring (bool): Also match inside longer words, like `str.count`;
+                otherwise only whole words match, like `\\bkeyword\\b`.
+
+        Returns:
+            pd.Series: Occurrence count indexed by PMID, for the articles with at least one.
+        """
+        words = keyword_words(keyword)
+        separators = keyword_separators(keyword)
+        counts = []
+        for segment in self.segments:
+            segment_counts = self._segment_counts(segment, words, separators, substring) if words else np.zeros(0)
+            matched = np.flatnonzero(segment_counts)
+            counts.append(pd.Series(segment_counts[matched].astype(np.int64), index=segment.pmids[matched]))
+        counts = pd.concat(counts) if counts else pd.Series(dtype=np.int64)
+        return counts.rename_axis('PMID').rename(keyword)
+
+    def keyword_counts(self, keywords, substring=False):
+        """Return a PMID x keyword table of occurrence counts over the articles matching any keyword."""
+        counts = pd.concat([self.count(keyword, substring) for keyword in keywords], axis=1)
+        return counts.fillna(0).astype(np.int64).sort_index()
+
+    def select(self, keywords, substring=False):
+        """
+        Return the sorted PMIDs of the articles mentioning any of the keywords.
+
+        With whole words this is the relevance test of `keyword_filter.filter_articles`.
+        """
+        matches = [self.count(keyword, substring).index.to_numpy() for keyword in keywords]
+        return np.unique(np.concatenate(matches)) if matches else np.zeros(0, dtype=np.int64)
+
+    def field_counts(self, field_map):
+        """
+        Sum keyword occurrences per field, counted as substrings like `field_classifier.keyword_counts`.
+
+        Unlike `classify_articles`, which gives articles without a title or
+        abstract an empty text, the words an article has are always counted.
+
+        Returns:
+            pd.DataFrame: PMID x field counts, fields in map order, for the articles with any field keyword.
+        """
+        counts = self.keyword_counts(field_map['Keyword'].tolist(), substring=True)
+        fields = field_map.set_index('Keyword')['Field']
+        return counts.T.groupby(fields.reindex(counts.columns).to_numpy()).sum().T.reindex(
+            columns=field_order(field_map), fill_value=0)
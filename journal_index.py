@@ -0,0 +1,158 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Persisted journal key -> SJR table built from the SCImago files
+DEFAULT_INDEX_PATH = 'data/journal_index.csv'
+
+INDEX_COLUMNS = ["Key", "Source", "Year", "Title", "SJR"]
+
+# Match sources in order of priority
+MATCH_SOURCES = ["ISSN", "eISSN", "Title"]
+
+
+def normalize_issns(issns):
+    """Reduce ISSNs to their 8 characters without hyphen or spaces; anything else becomes NaN."""
+    issns = issns.astype(object).where(issns.notna()).astype("string")
+    issns = issns.str.replace(r'[\s\-]', '', regex=True).str.upper()
+    return issns.where(issns.str.fullmatch(r'\d{7}[\dX]').fillna(False)).astype(object)
+
+
+def normalize_titles(titles):
+    """
+    Normalize journal titles for matching.
+
+    Accents, punctuation, a leading "The" and a PubMed " = translated title"
+    suffix are removed and "&" is read as "and".
+    """
+    titles = titles.astype(object).where(titles.notna()).astype("string")
+    titles = titles.str.split(' = ').str[0]
+    titles = titles.str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True).str.casefold()
+    titles = titles.str.replace('&', ' and ', regex=False).str.replace(r'[^\w\s]', ' ', regex=True)
+    titles = titles.str.split().str.join(' ').str.replace(r'^the ', '', regex=True)
+    return titles.where(titles.str.len() > 0).astype(object)
+
+
+def scimagojr_year(path):
+    """Return the SJR year of a 'scimagojr_<year>.csv' file."""
+    match = re.search(r'scimagojr_(\d{4})', os.path.basename(path))
+    if match is None:
+        raise ValueError(f"Cannot read the SJR year from '{path}'; expected a 'scimagojr_<year>.csv' file.")
+    return int(match.group(1))
+
+
+def read_scimagojr(path):
+    """
+    Expand a SCImago export into one row per journal key.
+
+    The 'Issn' field lists several ISSNs; the first is indexed as "ISSN" and
+    the others as "eISSN". Every journal is also indexed by its normalized
+    title. When a key belongs to several journals the best ranked one wins.
+
+    Returns:
+        pd.DataFrame: INDEX_COLUMNS rows of the file's year.
+    """
+    journals = pd.read_csv(path, sep=';', usecols=['Title', 'Issn', 'SJR'], dtype=str)
+    journals['SJR'] = pd.to_numeric(journals['SJR'].str.replace(',', '.'), errors='coerce')
+
+    issns = journals['Issn'].fillna('').str.split(',').explode()
+    position = issns.groupby(level=0).cumcount()
+    issn_keys = pd.DataFrame({"Key": normalize_issns(issns.str.strip()),
+                              "Source": np.where(position == 0, "ISSN", "eISSN")}, index=issns.index)
+    title_keys = pd.DataFrame({"Key": normalize_titles(journals['Title']), "Source": "Title"}, index=journals.index)
+
+    keys = pd.concat([issn_keys, title_keys]).dropna(subset=["Key"])
+    keys = keys.join(journals[['Title', 'SJR']]).dropna(subset=["SJR"])
+    # SCImago files are sorted by rank, so keeping the first row keeps the best ranked journal
+    keys = keys.reset_index().sort_values("index", kind="stable").drop_duplicates(["Key", "Source"])
+    keys["Year"] = scimagojr_year(path)
+    return keys[INDEX_COLUMNS].reset_index(drop=True)
+
+
+def build_journal_index(scimagojr_paths):
+    """Build the journal index of one or more SCImago yearly exports."""
+    return pd.concat([read_scimagojr(path) for path in scimagojr_paths], ignore_index=True)
+
+
+def save_journal_index(index, path=DEFAULT_INDEX_PATH):
+    """Persist a journal index as CSV."""
+    index.to_csv(path, index=False)
+
+
+def load_journal_index(path=DEFAULT_INDEX_PATH):
+    """Load a persisted journal index."""
+    return pd.read_csv(path, dtype={"Key": object, "Source": object, "Year": np.int64, "Title": object,
+                                    "SJR": float}, keep_default_na=False, na_values={"SJR": [""]})
+
+
+class JournalLookup:
+    """
+    Vectorized ISSN/eISSN/title to SJR lookup over a journal index.
+
+    Every key maps to one row of a key x year SJR matrix, so a batch of
+    articles is matched with a few index lookups instead of merges.
+    """
+
+    def __init__(self, index):
+        self.years = np.sort(index["Year"].unique())
+        self.keys = {}
+        for source in MATCH_SOURCES:
+            rows = index[index["Source"] == source]
+            sjr = rows.pivot_table(index="Key", columns="Year", values="SJR", aggfunc="first")
+            self.keys[source] = (pd.Index(sjr.index), sjr.reindex(columns=self.years).to_numpy())
+
+    def _match(self, source, keys, article_years):
+        """Return the SJR and SJR year of every key found for `source`, NaN elsewhere."""
+        index, matrix = self.keys[source]
+        rows = index.get_indexer(keys)
+        found = rows >= 0
+        sjr = np.full(len(keys), np.nan)
+        year = np.full(len(keys), np.nan)
+        if found.any() and len(self.years):
+            values = matrix[rows[found]]
+            # Use the SJR of the article's year, or of the closest year the journal was ranked
+            target = np.where(np.isnan(article_years[found]), self.years[-1], article_years[found])
+            distance = np.abs(self.years[None, :] - target[:, None]).astype(float)
+            distance[np.isnan(values)] = np.inf
+            best = distance.argmin(axis=1)
+            ranked = np.isfinite(distance[np.arange(len(best)), best])
+            positions = np.flatnonzero(found)[ranked]
+            sjr[positions] = values[ranked, best[ranked]]
+            year[positions] = self.years[best[ranked]]
+        return sjr, year
+
+    def lookup(self, issns, titles, years=None):
+        """
+        Find the SJR of a batch of articles.
+
+        The article ISSN is matched as a print ISSN, then as an eISSN, then
+        the journal title is matched.
+
+        Args:
+            issns (pd.Series): Article ISSNs.
+            titles (pd.Series): Article journal titles.
+            years (pd.Series): Publication years; None uses the latest SJR year.
+
+        Returns:
+            pd.DataFrame: 'SJR', 'SJRYear' and 'SJRMatch' ("ISSN", "eISSN",
+                "Title" or "Unmatched") aligned with the input.
+        """
+        issn_keys = normalize_issns(pd.Series(issns))
+        title_keys = normalize_titles(pd.Series(titles))
+        article_years = np.full(len(issn_keys), np.nan) if years is None else \
+            pd.to_numeric(pd.Series(years), errors='coerce').to_numpy(dtype=float)
+
+        sjr = np.full(len(issn_keys), np.nan)
+        sjr_year = np.full(len(issn_keys), np.nan)
+        match = np.full(len(issn_keys), "Unmatched", dtype=object)
+        for source, keys in zip(MATCH_SOURCES, [issn_keys, issn_keys, title_keys]):
+            open_rows = np.isnan(sjr)
+            found_sjr, found_year = self._match(source, keys[open_rows], article_years[open_rows])
+            hit = np.flatnonzero(open_rows)[~np.isnan(found_sjr)]
+            sjr[hit] = found_sjr[~np.isnan(found_sjr)]
+            sjr_year[hit] = found_year[~np.isnan(found_sjr)]
+            match[hit] = source
+        return pd.DataFrame({"SJR": sjr, "SJRYear": pd.array(sjr_year, dtype="Int16"), "SJRMatch": match},
+                            index=pd.Series(issns).index)
@@ -0,0 +1,195 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Default keyword list used to select schistosomiasis-related articles
+DEFAULT_KEYWORDS = ["schistosomiasis", "schistosoma", "parasitic disease", "schistosomal",
+    "japonicum", "oncomelania", "cercariae", "molluscicide", "bilharzia", "schistosome", "antischistosomal",
+    "schistosomes", "molluscicidal", "snail control"]
+
+# Characters stripped from titles and abstracts before matching
+_BRACKETS = re.compile(r'[\[\](){}]')
+
+
+def compile_keywords(keywords):
+    """
+    Compile a keyword list into a single whole-word matcher.
+
+    Longer keywords are placed first in the alternation so that a phrase such as
+    "snail control" is tried before any keyword it starts with. The pattern is
+    equivalent to running one `\\b{keyword}\\b` search per keyword and taking `any`.
+
+    Args:
+        keywords (list): List of keywords or phrases.
+
+    Returns:
+        re.Pattern: Compiled pattern matching any of the keywords as a whole word.
+    """
+    ordered = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+    return re.compile(r'\b(?:' + '|'.join(re.escape(keyword) for keyword in ordered) + r')\b')
+
+
+def normalize_series(texts):
+    """Normalize a column of text the same way as `normalize_text`, in one vectorized pass."""
+    return texts.fillna("").astype(str).str.replace(_BRACKETS, '', regex=True).str.strip().str.lower()
+
+
+def match_keywords(texts, pattern):
+    """Return a boolean Series marking the texts that contain the compiled keyword pattern."""
+    return normalize_series(texts).str.contains(pattern, regex=True)
+
+
+def mark_relevant(articles_df, pattern):
+    """Add the 'Relevant' column to a chunk of articles using a compiled keyword pattern."""
+    articles_df['Relevant'] = match_keywords(articles_df['Title'], pattern) | \
+                              match_keywords(articles_df['Abstract'], pattern)
+    return articles_df
+
+
+def _mark_chunk(args):
+    """Worker entry point: mark one chunk as relevant or not."""
+    chunk, pattern = args
+    return mark_relevant(chunk, pattern)
+
+
+def bounded_map(executor, func, jobs, window):
+    """
+    Yield `func(job)` for every job in submission order, like `executor.map`,
+    but with at most `window` jobs submitted and not yet yielded at any time.
+
+    `executor.map` submits the whole iterable up front, so every chunk of a
+    file would sit pickled in the pool queue before the first one is written.
+    """
+    pending = deque()
+    for job in jobs:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, job))
+    while pending:
+        yield pending.popleft().result()
+
+
+def filter_articles(articles_df, keywords, sample_size=5):
+    """
+    Filter articles based on keywords in titles and abstracts.
+    Randomly sample non-relevant articles for manual review.
+
+    Args:
+        articles_df (pd.DataFrame): DataFrame containing article metadata.
+        keywords (list): List of keywords to check for relevance.
+        sample_size (int): Number of non-relevant articles to sample.
+
+    Returns:
+        relevant_articles (pd.DataFrame): Articles marked as relevant.
+        non_relevant_sample (pd.DataFrame): Random sample of non-relevant articles.
+        discarded_articles (pd.DataFrame): All non-relevant articles in original format.
+    """
+    mark_relevant(articles_df, compile_keywords(keywords))
+
+    # Separate relevant and non-relevant articles
+    relevant_articles = articles_df[articles_df['Relevant']]
+    non_relevant_articles = articles_df[~articles_df['Relevant']]
+
+    # Randomly sample non-relevant articles for manual review
+    non_relevant_sample = non_relevant_articles.sample(n=min(sample_size, len(non_relevant_articles)), random_state=42)
+
+    return relevant_articles, non_relevant_sample, non_relevant_articles
+
+
+def filter_articles_file(articles_path, keywords, relevant_path, discarded_path,
+                         chunksize=50000, workers=None, encoding=None):
+    """
+    Stream an articles CSV in chunks, mark relevance in a process pool and write
+    the relevant and discarded articles incrementally.
+
+    The output files are identical to saving the frames returned by
+    `filter_articles` with `index=False`, but at most two chunks per worker are
+    read ahead, so memory stays bounded by the chunk size. Every column is read
+    as text without NA parsing, so values such as 'Year' are written back
+    exactly as in the source instead of being re-inferred (and reformatted)
+    chunk by chunk.
+
+    Args:
+        articles_path (str): Path to the `articles.*.csv` file.
+        keywords (list): List of keywords to check for relevance.
+        relevant_path (str): Output path for the relevant articles.
+        discarded_path (str): Output path for the non-relevant articles.
+        chunksize (int): Number of rows read per chunk.
+        workers (int): Number of worker processes. Defaults to the CPU count;
+            use 1 to run in the current process.
+        encoding (str): Encoding of the source CSV.
+
+    Returns:
+        tuple: Number of relevant and discarded articles written.
+    """
+    pattern = compile_keywords(keywords)
+    workers = workers or os.cpu_count() or 1
+    chunks = pd.read_csv(articles_path, chunksize=chunksize, encoding=encoding, dtype=str, keep_default_na=False)
+
+    n_relevant = n_discarded = 0
+    header = True
+    with open(relevant_path, 'w', newline='', encoding='utf-8') as relevant_file, \
+            open(discarded_path, 'w', newline='', encoding='utf-8') as discarded_file:
+        if workers == 1:
+            marked_chunks = (mark_relevant(chunk, pattern) for chunk in chunks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            # Results are yielded in submission order, so the output keeps the source row order
+            marked_chunks = bounded_map(executor, _mark_chunk, ((chunk, pattern) for chunk in chunks), 2 * workers)
+        try:
+            for marked in marked_chunks:
+                relevant = marked[marked['Relevant']]
+                discarded = marked[~marked['Relevant']]
+                relevant.to_csv(relevant_file, index=False, header=header)
+                discarded.to_csv(discarded_file, index=False, header=header)
+                header = False
+                n_relevant += len(relevant)
+                n_discarded += len(discarded)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    return n_relevant, n_discarded
+
+
+def sample_discarded(discarded_path, sample_size=5, columns=('PMID', 'Abstract')):
+    """Draw the same review sample as `filter_articles` from a written discarded-articles file."""
+    discarded = pd.read_csv(discarded_path, usecols=list(columns))
+    return discarded.sample(n=min(sample_size, len(discarded)), random_state=42)
+
+
+def generate_relevant_authors_file(relevant_articles_path, authors_path, output_path,
+                                   chunksize=200000, encoding=None):
+    """
+    Stream the authors table and keep the rows whose PMID is in the relevant articles.
+
+    Like `filter_articles_file`, every column is read as text, so a column that
+    is missing in some chunks is not written as "3" in some rows and "3.0" in
+    others.
+
+    Args:
+        relevant_articles_path (str): Path to the relevant articles CSV.
+        authors_path (str): Path to the `authors.*.csv` file.
+        output_path (str): Path to save the resulting relevant authors CSV file.
+        chunksize (int): Number of author rows read per chunk.
+        encoding (str): Encoding of the authors CSV.
+
+    Returns:
+        int: Number of author rows written.
+    """
+    relevant_pmids = pd.read_csv(relevant_articles_path, usecols=['PMID'])['PMID'].unique()
+
+    n_rows = 0
+    header = True
+    with open(output_path, 'w', newline='', encoding='utf-8') as output_file:
+        for chunk in pd.read_csv(authors_path, chunksize=chunksize, encoding=encoding, dtype=str,
+                                 keep_default_na=False):
+            relevant = chunk[pd.to_numeric(chunk['PMID'], errors='coerce').isin(relevant_pmids)]
+            relevant.to_csv(output_file, index=False, header=header)
+            header = False
+            n_rows += len(relevant)
+    return n_rows
@@ -0,0 +1,245 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from keyword_filter import bounded_map, normalize_series
+
+# Word n-grams compared between articles. Articles without an abstract or with fewer words than this
+# are never clustered, so two different title-only records such as "Erratum" are not merged
+SHINGLE_SIZE = 5
+# MinHash permutations per signature, split into LSH_BANDS bands of NUM_PERM // LSH_BANDS rows.
+# With 16 bands of 8 rows, pairs above about 0.7 Jaccard similarity become candidates.
+NUM_PERM = 128
+LSH_BANDS = 16
+# Candidate pairs whose estimated Jaccard similarity of shingles reaches this are duplicates
+SIMILARITY_THRESHOLD = 0.8
+# Seed of the MinHash permutations; signatures are only comparable for the same seed
+MINHASH_SEED = 42
+
+_MAX_HASH = np.uint64(np.iinfo(np.uint64).max)
+
+
+def _mix(x):
+    """Scramble 64-bit hashes with the splitmix64 finalizer; wraps around by design."""
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def article_texts(articles_df):
+    """Return the normalized 'Title' and 'Abstract' of every article as one text."""
+    return normalize_series(articles_df['Title']) + " " + normalize_series(articles_df['Abstract'])
+
+
+def shingle_hashes(texts, size=SHINGLE_SIZE):
+    """
+    Hash the word shingles of every text.
+
+    Words of all texts are hashed in one flat array and every shingle hash
+    combines `size` consecutive word hashes, so no Python loop runs per text.
+    Texts with fewer than `size` words have no shingle.
+
+    Returns:
+        tuple: (shingle hashes grouped by text, their text index), as uint64 and int64 arrays.
+    """
+    words = texts.str.findall(r"\w+")
+    lengths = words.str.len().to_numpy(dtype=np.int64)
+    flat = words.explode().dropna()
+    word_hashes = pd.util.hash_array(flat.to_numpy(dtype=object))
+    doc = np.repeat(np.arange(len(lengths)), lengths)
+
+    # Position of every word in its text; a shingle starts where `size` words remain in the same text
+    position = np.arange(len(doc)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    starts = np.flatnonzero(position + size <= lengths[doc])
+    hashes = word_hashes[starts]
+    with np.errstate(over="ignore"):
+        for offset in range(1, size):
+            hashes = _mix(hashes * np.uint64(0x9E3779B97F4A7C15) + word_hashes[starts + offset])
+    return hashes, doc[starts]
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, size=SHINGLE_SIZE, seed=MINHASH_SEED):
+    """
+    Compute the MinHash signature of every text.
+
+    Each permutation is a seeded remix of the shingle hashes, reduced to its
+    minimum per text with `np.minimum.reduceat`. Texts without any shingle
+    get an all-maximum signature and must be left out of the comparison.
+
+    Returns:
+        np.ndarray: (len(texts), num_perm) uint64 signatures.
+    """
+    hashes, docs = shingle_hashes(texts, size)
+    signatures = np.full((len(texts), num_perm), _MAX_HASH, dtype=np.uint64)
+    if len(hashes) == 0:
+        return signatures
+    present, first = np.unique(docs, return_index=True)
+    seeds = np.random.default_rng(seed).integers(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64)
+    for column, permutation_seed in enumerate(seeds.astype(np.uint64)):
+        signatures[present, column] = np.minimum.reduceat(_mix(hashes ^ permutation_seed), first)
+    return signatures
+
+
+def comparable_articles(articles_df, texts, size=SHINGLE_SIZE):
+    """Mark the articles with an abstract and at least `size` words of text, the only ones clustered."""
+    has_abstract = normalize_series(articles_df['Abstract']).str.contains(r"\w", regex=True)
+    return (has_abstract & (texts.str.count(r"\w+") >= size)).to_numpy()
+
+
+def _signature_chunk(args):
+    """Worker entry point: return the PMIDs and MinHash signatures of the comparable articles of one chunk."""
+    chunk, num_perm, size, seed = args
+    texts = article_texts(chunk)
+    comparable = comparable_articles(chunk, texts, size)
+    signatures = minhash_signatures(texts[comparable], num_perm, size, seed)
+    return chunk['PMID'].to_numpy()[comparable], signatures
+
+
+def signatures_file(articles_path, num_perm=NUM_PERM, size=SHINGLE_SIZE, seed=MINHASH_SEED, chunksize=20000,
+                    workers=None):
+    """
+    Compute the MinHash signatures of an articles CSV in chunks across a process pool.
+
+    Only `comparable_articles` get a signature. At most two chunks per worker
+    are read ahead, so memory stays bounded by the chunk size and the signatures.
+
+    Returns:
+        tuple: (PMIDs, (n, num_perm) uint64 signatures).
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = pd.read_csv(articles_path, usecols=['PMID', 'Title', 'Abstract'], chunksize=chunksize)
+    jobs = ((chunk, num_perm, size, seed) for chunk in chunks)
+    if workers == 1:
+        results = list(map(_signature_chunk, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(bounded_map(executor, _signature_chunk, jobs, 2 * workers))
+    if not results:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, num_perm), dtype=np.uint64)
+    return np.concatenate([pmids for pmids, _ in results]), np.vstack([signatures for _, signatures in results])
+
+
+def lsh_candidate_pairs(signatures, bands=LSH_BANDS):
+    """
+    Find candidate near-duplicate pairs by LSH banding.
+
+    Signatures are split into `bands` bands; rows whose band hashes are equal
+    share a bucket. Every bucket member is paired with the bucket's first row
+    and with its predecessor in the bucket, so a bucket of boilerplate texts
+    costs linear rather than quadratic work. Near-duplicates that are not
+    similar to the first row, such as two versions of one article sharing a
+    bucket with a boilerplate text, are still paired when they are adjacent;
+    pairs separated by other members in every band they share are missed.
+
+    Returns:
+        tuple: (first, second) row index arrays of the unique candidate pairs, first < second.
+    """
+    n, num_perm = signatures.shape
+    rows_per_band = num_perm // bands
+    firsts, seconds = [], []
+    for band in range(bands):
+        keys = np.zeros(n, dtype=np.uint64)
+        for column in range(band * rows_per_band, (band + 1) * rows_per_band):
+            keys = _mix(keys ^ signatures[:, column])
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        new_bucket = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+        bucket_first = order[np.flatnonzero(new_bucket)][np.cumsum(new_bucket) - 1]
+        paired = np.flatnonzero(~new_bucket)
+        firsts.extend([bucket_first[paired], order[paired - 1]])
+        seconds.extend([order[paired], order[paired]])
+    # Within a bucket rows are in index order, so every pair already has first < second
+    pairs = np.unique(np.stack([np.concatenate(firsts), np.concatenate(seconds)]), axis=1)
+    return pairs[0], pairs[1]
+
+
+def signature_similarity(signatures, first, second, block=100000):
+    """Estimate the Jaccard similarity of row pairs as the fraction of equal MinHash values."""
+    similarity = np.empty(len(first))
+    for start in range(0, len(first), block):
+        end = start + block
+        similarity[start:end] = (signatures[first[start:end]] == signatures[second[start:end]]).mean(axis=1)
+    return similarity
+
+
+def duplicate_clusters(pmids, signatures, threshold=SIMILARITY_THRESHOLD, bands=LSH_BANDS):
+    """
+    Group articles whose estimated shingle similarity reaches `threshold`.
+
+    LSH candidates are verified on the full signatures; clusters are the
+    connected components of the verified pairs. The lowest PMID of a cluster,
+    normally the first indexed version, is its canonical article.
+
+    Returns:
+        pd.DataFrame: 'ClusterID', 'CanonicalPMID', 'PMID' and 'Similarity'
+            (estimated Jaccard similarity to the canonical article) of every
+            article in a cluster of two or more, canonical article first.
+    """
+    columns = ['ClusterID', 'CanonicalPMID', 'PMID', 'Similarity']
+    n = len(pmids)
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+    first, second = lsh_candidate_pairs(signatures, bands)
+    keep = signature_similarity(signatures, first, second) >= threshold
+    graph = sparse.csr_matrix((np.ones(keep.sum()), (first[keep], second[keep])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    sizes = np.bincount(labels)
+    members = np.flatnonzero(sizes[labels] > 1)
+    if len(members) == 0:
+        return pd.DataFrame(columns=columns)
+
+    clusters = pd.DataFrame({"Label": labels[members], "Row": members, "PMID": pmids[members]})
+    clusters = clusters.sort_values(["Label", "PMID"], kind="stable")
+    canonical_row = clusters.groupby("Label")["Row"].transform("first").to_numpy()
+    clusters["CanonicalPMID"] = pmids[canonical_row]
+    clusters["Similarity"] = signature_similarity(signatures, canonical_row, clusters["Row"].to_numpy())
+    clusters = clusters.sort_values(["CanonicalPMID", "PMID"], kind="stable")
+    clusters["ClusterID"] = pd.factorize(clusters["CanonicalPMID"])[0]
+    return clusters[columns].reset_index(drop=True)
+
+
+def find_duplicates_file(articles_path, clusters_path, unique_path=None, threshold=SIMILARITY_THRESHOLD,
+                         chunksize=20000, workers=None):
+    """
+    Detect near-duplicate articles of an articles CSV and write the duplicate clusters.
+
+    Args:
+        articles_path (str): Articles with 'PMID', 'Title' and 'Abstract' columns.
+        clusters_path (str): Output path of the `duplicate_clusters` table, with
+            the 'Year' and 'Title' of every article for review.
+        unique_path (str): When given, the articles are written here with every
+            cluster collapsed to its canonical article, in the original order.
+        threshold (float): Estimated Jaccard similarity of duplicates.
+        chunksize (int): Number of articles read per chunk.
+        workers (int): Number of worker processes. Defaults to the CPU count;
+            use 1 to run in the current process.
+
+    Returns:
+        tuple: Number of clusters and of non-canonical duplicate articles.
+    """
+    pmids, signatures = signatures_file(articles_path, chunksize=chunksize, workers=workers)
+    clusters = duplicate_clusters(pmids, signatures, threshold)
+    duplicates = clusters.loc[clusters['PMID'] != clusters['CanonicalPMID'], 'PMID'].to_numpy()
+
+    # Second pass: collect the review columns of the clustered articles and drop the duplicates
+    details = []
+    header = True
+    output_file = open(unique_path, 'w', newline='', encoding='utf-8') if unique_path else None
+    try:
+        for chunk in pd.read_csv(articles_path, chunksize=chunksize):
+            details.append(chunk.loc[chunk['PMID'].isin(clusters['PMID']), ['PMID', 'Year', 'Title']])
+            if output_file is not None:
+                chunk[~chunk['PMID'].isin(duplicates)].to_csv(output_file, index=False, header=header)
+                header = False
+    finally:
+        if output_file is not None:
+            output_file.close()
+    details = pd.concat(details).drop_duplicates('PMID') if details else pd.DataFrame(columns=['PMID', 'Year',
+                                                                                              'Title'])
+    clusters.merge(details, on='PMID', how='left').to_csv(clusters_path, index=False)
+    return clusters['ClusterID'].nunique(), len(duplicates)
@@ -0,0 +1,202 @@
+import hashlib
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+from scipy import sparse
+
+from data_cache import CACHE_DIR
+
+
+def graph_hash(adjacency, keys, **params):
+    """Hash an adjacency, its node keys and the layout parameters into a cache key."""
+    adjacency = sparse.csr_matrix(adjacency)
+    adjacency.sort_indices()
+    digest = hashlib.sha256()
+    for array in (adjacency.indptr, adjacency.indices, adjacency.data, np.asarray(keys).astype(str)):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()[:32]
+
+
+def _grid_repulsion(pos, k, grid_size, block_size=4096):
+    """
+    Approximate all-pairs repulsion Barnes-Hut style on a uniform grid.
+
+    Nodes are binned into grid_size x grid_size cells and every node is pushed
+    away from the centroid of each occupied cell, weighted by the number of
+    nodes in it, instead of from every other node. Cost is O(n * cells).
+    """
+    low = pos.min(axis=0)
+    span = np.maximum(pos.max(axis=0) - low, 1e-9)
+    cell = np.minimum(((pos - low) / span * grid_size).astype(np.int64), grid_size - 1)
+    cell_id = cell[:, 0] * grid_size + cell[:, 1]
+    mass = np.bincount(cell_id, minlength=grid_size * grid_size).astype(float)
+    occupied = np.flatnonzero(mass)
+    centroids = np.stack([np.bincount(cell_id, weights=pos[:, d], minlength=grid_size * grid_size)[occupied]
+                          for d in range(2)], axis=1) / mass[occupied, None]
+    mass = mass[occupied]
+
+    force = np.empty_like(pos)
+    for start in range(0, len(pos), block_size):
+        block = pos[start:start + block_size]
+        dx = np.subtract.outer(block[:, 0], centroids[:, 0])
+        dy = np.subtract.outer(block[:, 1], centroids[:, 1])
+        scale = (k * k) * mass / np.maximum(dx * dx + dy * dy, (k * 0.01) ** 2)
+        # sum_c scale * (p - c) == p * sum_c scale - scale @ c
+        force[start:start + block_size] = block * scale.sum(axis=1)[:, None] - scale @ centroids
+    return force
+
+
+def force_layout(adjacency, iterations=100, seed=42, grid_size=16):
+    """
+    Fruchterman-Reingold layout with grid-approximated repulsion.
+
+    Attraction runs over the sparse edge list and repulsion over grid cell
+    centroids, so each iteration is O(E + n * grid_size^2) instead of O(n^2).
+
+    Args:
+        adjacency (csr_matrix): Symmetric weighted adjacency.
+        iterations (int): Number of cooling iterations.
+        seed (int): Seed of the initial random positions.
+        grid_size (int): Cells per axis of the repulsion grid.
+
+    Returns:
+        np.ndarray: n x 2 node positions scaled to [-1, 1].
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros((0, 2))
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2))
+    if n == 1:
+        return np.zeros((1, 2))
+
+    upper = sparse.triu(adjacency, k=1).tocoo()
+    rows, cols = upper.row, upper.col
+    # Repeated co-authorship pulls harder, but only logarithmically
+    strength = np.log1p(upper.data.astype(float))
+    k = np.sqrt(1.0 / n)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        force = _grid_repulsion(pos, k, grid_size)
+        delta = pos[rows] - pos[cols]
+        dist = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-9)
+        pull = delta * (dist * strength / k)[:, None]
+        for d in range(2):
+            force[:, d] -= np.bincount(rows, weights=pull[:, d], minlength=n)
+            force[:, d] += np.bincount(cols, weights=pull[:, d], minlength=n)
+        length = np.maximum(np.sqrt((force ** 2).sum(axis=1)), 1e-9)
+        pos += force * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    return pos / max(np.abs(pos).max(), 1e-9)
+
+
+def cached_layout(adjacency, keys, cache_dir=CACHE_DIR, iterations=100, seed=42, grid_size=16):
+    """Return `force_layout` positions, reusing the cached result for an identical graph."""
+    key = graph_hash(adjacency, keys, iterations=iterations, seed=seed, grid_size=grid_size)
+    path = os.path.join(cache_dir, f"layout_{key}.npy")
+    if os.path.exists(path):
+        return np.load(path)
+    pos = force_layout(adjacency, iterations=iterations, seed=seed, grid_size=grid_size)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(path, pos)
+    return pos
+
+
+def core_numbers(adjacency):
+    """Return the k-core number of every node by vectorized peeling."""
+    adjacency = sparse.csr_matrix(adjacency)
+    degree = np.diff(adjacency.indptr).astype(np.int64)
+    core = np.zeros(len(degree), dtype=np.int64)
+    alive = np.ones(len(degree), dtype=bool)
+    k = 0
+    while alive.any():
+        k = max(k, degree[alive].min())
+        peel = alive & (degree <= k)
+        while peel.any():
+            core[peel] = k
+            alive &= ~peel
+            # Each peeled node lowers the degree of its surviving neighbours
+            degree -= np.asarray(adjacency[peel].astype(bool).sum(axis=0)).ravel().astype(np.int64)
+            peel = alive & (degree <= k)
+    return core
+
+
+def level_of_detail(adjacency, scores=None, top_n=None, k_core=None, min_edge_weight=1):
+    """
+    Select the part of a large graph worth drawing.
+
+    Args:
+        adjacency (csr_matrix): Symmetric weighted adjacency.
+        scores (array-like): Node scores, e.g. a centrality, used by `top_n`.
+        top_n (int): Keep only the `top_n` highest scoring nodes.
+        k_core (int): Keep only nodes in the k-core.
+        min_edge_weight (int): Drop edges with fewer joint papers.
+
+    Returns:
+        tuple: (filtered adjacency, indices of the kept nodes).
+    """
+    adjacency = sparse.csr_matrix(adjacency)
+    if min_edge_weight > 1:
+        adjacency = adjacency.multiply(adjacency >= min_edge_weight).tocsr()
+        adjacency.eliminate_zeros()
+    keep = np.ones(adjacency.shape[0], dtype=bool)
+    if k_core is not None:
+        keep &= core_numbers(adjacency) >= k_core
+    if top_n is not None and scores is not None:
+        scores = np.where(keep, np.asarray(scores, dtype=float), -np.inf)
+        top = np.argsort(-scores, kind="stable")[:top_n]
+        keep &= np.isin(np.arange(len(keep)), top)
+    kept = np.flatnonzero(keep)
+    return adjacency[kept][:, kept].tocsr(), kept
+
+
+def edge_segments(adjacency, pos):
+    """
+    Build the edge line coordinates for a single Plotly trace.
+
+    Returns:
+        tuple: x and y arrays of [x0, x1, NaN] triples, one per edge.
+    """
+    upper = sparse.triu(adjacency, k=1).tocoo()
+    x = np.full((upper.nnz, 3), np.nan)
+    y = np.full((upper.nnz, 3), np.nan)
+    x[:, 0], x[:, 1] = pos[upper.row, 0], pos[upper.col, 0]
+    y[:, 0], y[:, 1] = pos[upper.row, 1], pos[upper.col, 1]
+    return x.ravel(), y.ravel()
+
+
+def network_figure(adjacency, pos, node_size, node_color, node_text, title, colorscale, colorbar_title,
+                   edge_color="gray", mode="markers"):
+    """Draw a network with WebGL traces so that tens of thousands of nodes stay responsive."""
+    edge_x, edge_y = edge_segments(adjacency, pos)
+    edge_trace = go.Scattergl(x=edge_x, y=edge_y, line=dict(width=0.5, color=edge_color), hoverinfo="none",
+                              mode="lines")
+    node_trace = go.Scattergl(
+        x=pos[:, 0],
+        y=pos[:, 1],
+        mode=mode,
+        hoverinfo="text",
+        text=node_text,
+        marker=dict(
+            showscale=True,
+            colorscale=colorscale,
+            color=node_color,
+            size=node_size,
+            colorbar=dict(thickness=15, title=dict(text=colorbar_title, side="right"), xanchor="left")
+        )
+    )
+    return go.Figure(data=[edge_trace, node_trace],
+                     layout=go.Layout(
+                         title=dict(text=title, font=dict(size=16)),
+                         showlegend=False,
+                         hovermode="closest",
+                         margin=dict(b=0, l=0, r=0, t=40),
+                         xaxis=dict(showgrid=False, zeroline=False),
+                         yaxis=dict(showgrid=False, zeroline=False)
+                     ))
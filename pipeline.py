@@ -0,0 +1,189 @@
+import hashlib
+import inspect
+import json
+import os
+from typing import Callable, NamedTuple
+
+from instrumentation import stage as trace_stage
+
+# File recording the fingerprint of every stage that has run
+DEFAULT_STATE_PATH = 'data/.pipeline_state.json'
+
+
+class Stage(NamedTuple):
+    """
+    One step of the pipeline.
+
+    `func` is called as `func(**inputs, **outputs, **params)`, where `inputs`
+    and `outputs` map argument names to file paths.
+    """
+    name: str
+    func: Callable
+    inputs: dict
+    outputs: dict
+    params: dict = {}
+
+
+def file_digest(path, state=None, block_size=1 << 20):
+    """
+    Return the SHA-256 of a file's content.
+
+    Digests are remembered in `state` by size and modification time, so an
+    unchanged file is not read again.
+    """
+    stat = os.stat(path)
+    known = (state or {}).get(path)
+    if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+        return known["sha256"]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    if state is not None:
+        state[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    return digest.hexdigest()
+
+
+def _referenced_names(code):
+    """Return the global names used by a code object and the functions and comprehensions nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _referenced_names(const)
+    return names
+
+
+def code_digest(func):
+    """
+    Hash the source of a stage function and of the project code it calls.
+
+    Functions and classes referenced by name are followed recursively as long
+    as they are defined in a module next to the stage's own module, so editing
+    a helper such as `field_classifier.classify_articles` changes the digest of
+    every stage that calls it, while library code is left out.
+    """
+    try:
+        root = os.path.dirname(os.path.abspath(inspect.getsourcefile(func)))
+    except TypeError:
+        return ""
+    digest = hashlib.sha256()
+    pending, seen = [func], set()
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            path = inspect.getsourcefile(obj)
+            source = inspect.getsource(obj)
+        except (OSError, TypeError):
+            continue
+        if path is None or os.path.dirname(os.path.abspath(path)) != root:
+            continue
+        digest.update(f"{obj.__module__}.{obj.__qualname__}\n{source}".encode())
+        members = [obj] if inspect.isfunction(obj) else \
+            [getattr(member, '__func__', member) for member in vars(obj).values()]
+        for function in members:
+            if not inspect.isfunction(function):
+                continue
+            for name in sorted(_referenced_names(function.__code__)):
+                target = function.__globals__.get(name)
+                if inspect.isfunction(target) or inspect.isclass(target):
+                    pending.append(target)
+    return digest.hexdigest()
+
+
+def stage_fingerprint(stage, file_state=None):
+    """Hash a stage's function and the project code it calls, its parameters and its input file contents."""
+    digest = hashlib.sha256()
+    digest.update(f"{stage.name}:{stage.func.__module__}.{stage.func.__qualname__}".encode())
+    digest.update(code_digest(stage.func).encode())
+    digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    for name, path in sorted(stage.inputs.items()):
+        digest.update(f"{name}={file_digest(path, file_state)}".encode())
+    return digest.hexdigest()
+
+
+def order_stages(stages):
+    """
+    Sort stages so that every stage runs after the stages producing its inputs.
+
+    Raises:
+        ValueError: If two stages write the same file or the stages form a cycle.
+    """
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs.values():
+            if path in producers:
+                raise ValueError(f"'{path}' is written by both '{producers[path].name}' and '{stage.name}'.")
+            producers[path] = stage
+
+    ordered, visiting, done = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"The pipeline has a cycle through '{stage.name}'.")
+        visiting.add(stage.name)
+        for path in stage.inputs.values():
+            if path in producers:
+                visit(producers[path])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+def load_state(path=DEFAULT_STATE_PATH):
+    """Load the recorded stage and file fingerprints."""
+    if not os.path.exists(path):
+        return {"stages": {}, "files": {}}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_state(state, path=DEFAULT_STATE_PATH):
+    """Record the stage and file fingerprints."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(state, file, indent=1, sort_keys=True)
+
+
+def run_pipeline(stages, state_path=DEFAULT_STATE_PATH, force=()):
+    """
+    Run the stages whose code, inputs, parameters or outputs changed since their last run.
+
+    A stage is skipped when its fingerprint matches the recorded one and all
+    of its outputs still exist. Because inputs are fingerprinted by content,
+    a stage whose upstream stage rewrote an identical file is skipped too.
+
+    Args:
+        stages (list): `Stage` definitions, in any order.
+        state_path (str): File recording the fingerprints between runs.
+        force (iterable): Names of stages to run regardless of their fingerprint.
+
+    Returns:
+        list: Names of the stages that ran.
+    """
+    state = load_state(state_path)
+    ran = []
+    for stage in order_stages(stages):
+        fingerprint = stage_fingerprint(stage, state["files"])
+        up_to_date = state["stages"].get(stage.name) == fingerprint and \
+            all(os.path.exists(path) for path in stage.outputs.values())
+        if up_to_date and stage.name not in force:
+            print(f"Skipping '{stage.name}': code and inputs unchanged")
+            continue
+
+        print(f"Running '{stage.name}'")
+        # Traced when GROUP6_TRACE is set; the rate is the input bytes processed per second
+        with trace_stage(stage.name, bytes=sum(os.path.getsize(path) for path in stage.inputs.values())):
+            stage.func(**stage.inputs, **stage.outputs, **stage.params)
+        state["stages"][stage.name] = fingerprint
+        # Save after every stage so that an interrupted run keeps its progress
+        save_state(state, state_path)
+        ran.append(stage.name)
+    return ran
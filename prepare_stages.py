@@ -0,0 +1,192 @@
+import pandas as pd
+
+from author_index import DEFAULT_INDEX_PATH
+from author_stats import stream_author_stats
+from data_cache import CACHE_DIR, load_table
+from field_classifier import classify_fields, load_field_keywords
+from inverted_index import update_index
+from journal_index import (MATCH_SOURCES, JournalLookup, build_journal_index, load_journal_index, save_journal_index,
+                           scimagojr_year)
+from keyword_filter import DEFAULT_KEYWORDS, filter_articles_file, generate_relevant_authors_file
+from near_duplicates import SIMILARITY_THRESHOLD, find_duplicates_file
+from pipeline import Stage
+
+
+def filter_relevant_articles(articles_path, relevant_articles_path, discarded_articles_path, keywords,
+                             chunksize=50000):
+    """Stage: keep the articles mentioning one of the keywords."""
+    n_relevant, n_discarded = filter_articles_file(articles_path, keywords, relevant_articles_path,
+                                                   discarded_articles_path, chunksize=chunksize)
+    print(f"Relevant articles: {n_relevant}, discarded articles: {n_discarded}")
+
+
+def index_articles(articles_path, article_index_dir, chunksize=50000):
+    """Stage: add the articles not indexed yet to the positional inverted index of titles and abstracts."""
+    n_added = update_index(articles_path, article_index_dir, chunksize=chunksize)
+    print(f"Indexed {n_added} new articles in {article_index_dir}")
+
+
+def find_duplicate_articles(relevant_articles_path, duplicate_clusters_path, unique_articles_path=None,
+                            threshold=SIMILARITY_THRESHOLD):
+    """
+    Stage: cluster near-duplicate relevant articles (re-publications, corrected versions, copied boilerplate).
+
+    Articles without an abstract are never clustered. With
+    `unique_articles_path` the articles are also written with every cluster
+    collapsed to its canonical PMID, so duplicates add no author rows or
+    co-authorships downstream.
+    """
+    n_clusters, n_duplicates = find_duplicates_file(relevant_articles_path, duplicate_clusters_path,
+                                                    unique_path=unique_articles_path, threshold=threshold)
+    print(f"Near-duplicate clusters: {n_clusters}, duplicate articles: {n_duplicates}")
+
+
+def filter_relevant_authors(relevant_articles_path, authors_path, relevant_authors_path):
+    """Stage: keep the author rows of the relevant articles."""
+    generate_relevant_authors_file(relevant_articles_path, authors_path, relevant_authors_path)
+
+
+def index_journals(journal_index_path, **scimagojr_paths):
+    """Stage: build the ISSN/eISSN/title -> SJR index of the SCImago exports, one file per year."""
+    index = build_journal_index(sorted(scimagojr_paths.values()))
+    save_journal_index(index, journal_index_path)
+    print(f"Journal index with {len(index)} keys over years {sorted(index['Year'].unique().tolist())} "
+          f"saved to {journal_index_path}")
+
+
+def enrich_articles(relevant_articles_path, journal_index_path, fields_path, relevant_articles_final_path,
+                    chunksize=50000):
+    """
+    Stage: add the journal SJR and the research field of every relevant article.
+
+    SJR is looked up by ISSN, then eISSN, then normalized journal title, for
+    the article's year or the closest ranked year. 'SJRMatch' records which
+    key matched and 'SJRYear' the year used; articles without a match get 0.
+    'FieldTie' marks articles whose field won a tie by keyword map order.
+    """
+    lookup = JournalLookup(load_journal_index(journal_index_path))
+    field_map = load_field_keywords(fields_path)
+
+    matches = pd.Series(0, index=MATCH_SOURCES + ["Unmatched"])
+    header = True
+    with open(relevant_articles_final_path, 'w', newline='', encoding='utf-8') as output_file:
+        for chunk in pd.read_csv(relevant_articles_path, chunksize=chunksize):
+            chunk = chunk.join(lookup.lookup(chunk['ISSN'], chunk['Journal'], chunk['Year']))
+            chunk['SJR'] = chunk['SJR'].fillna(0)
+            chunk[['Field', 'FieldTie']] = classify_fields(chunk, field_map)
+            chunk.to_csv(output_file, index=False, header=header)
+            header = False
+            matches = matches.add(chunk['SJRMatch'].value_counts(), fill_value=0)
+    print(f"SJR matches: {matches.astype(int).to_dict()}")
+    print(f"Final dataset saved to {relevant_articles_final_path}")
+
+
+def author_field_stats(relevant_articles_final_path, relevant_authors_path, relevant_authors_with_field_path,
+                       cache_dir=CACHE_DIR):
+    """Stage: attach the field and SJR of each paper and per-author SJR statistics to every author row."""
+    articles_df = load_table(relevant_articles_final_path, columns=['PMID', 'Field', 'SJR'], categorical=False,
+                             cache_dir=cache_dir)
+    authors_df = load_table(relevant_authors_path, categorical=False, cache_dir=cache_dir)
+
+    # Ensure columns exist
+    if "PMID" not in authors_df.columns or "AuthorForename" not in authors_df.columns or \
+            "AuthorLastname" not in authors_df.columns:
+        raise KeyError("The 'relevant_authors.csv' must contain 'PMID', 'AuthorForename', and 'AuthorLastname' columns.")
+
+    # Merge authors with article fields and SJR (impact factors) using PMID
+    authors_with_field_df = pd.merge(authors_df, articles_df, on='PMID', how='left')
+
+    # Calculate the average impact factor and article count for each author
+    author_stats = (
+        authors_with_field_df.groupby(['AuthorForename', 'AuthorLastname'])
+        .agg(AverageImpactFactor=('SJR', 'mean'), ArticleCount=('PMID', 'count'))
+        .reset_index()
+    )
+
+    # Merge the calculated statistics back into the authors DataFrame
+    authors_with_field_df = pd.merge(authors_with_field_df, author_stats, on=['AuthorForename', 'AuthorLastname'],
+                                     how='left')
+    authors_with_field_df.to_csv(relevant_authors_with_field_path, index=False)
+    print(f"Relevant authors with fields, average impact factors, and article counts saved to: "
+          f"{relevant_authors_with_field_path}")
+
+
+def aggregate_author_stats(relevant_articles_final_path, relevant_authors_path, author_stats_path,
+                           author_index_path=DEFAULT_INDEX_PATH, chunksize=200000, cache_dir=CACHE_DIR):
+    """
+    Stage: write one row of statistics per author, aggregated from the author rows in chunks.
+
+    Unlike `author_field_stats` nothing is merged back onto the author rows:
+    memory grows with the number of distinct authors, and the table adds the
+    median SJR, first and last year and paper counts per field.
+    """
+    stats = stream_author_stats(relevant_articles_final_path, relevant_authors_path, index_path=author_index_path,
+                                chunksize=chunksize, cache_dir=cache_dir)
+    stats.to_csv(author_stats_path, index=False)
+    print(f"Statistics of {len(stats)} authors saved to: {author_stats_path}")
+
+
+def data_prepare_stages(articles_path='data/articles.schistosomiasis.csv',
+                        authors_path='data/authors.schistosomiasis.csv',
+                        scimagojr_paths=('data/scimagojr_2023.csv',),
+                        fields_path='data/articles_field.csv',
+                        keywords=DEFAULT_KEYWORDS,
+                        data_dir='data',
+                        collapse_duplicates=False):
+    """
+    Declare the data_prepare stages for `pipeline.run_pipeline`.
+
+    The keyword list is a parameter of the filter stage and the fields map an
+    input of the enrichment stage, so changing the field keywords only re-runs
+    classification and the author statistics that depend on it. The journal
+    index is rebuilt only when one of the SCImago files (one per SJR year) changes.
+
+    Near-duplicate clusters of the relevant articles are always written; with
+    `collapse_duplicates` the author and enrichment stages read the articles
+    with every cluster collapsed to its canonical PMID instead. The inverted
+    index of all articles only tokenizes PMIDs it has not indexed yet.
+
+    Returns:
+        list: `Stage` definitions.
+    """
+    relevant_articles = f'{data_dir}/relevant_articles.csv'
+    relevant_authors = f'{data_dir}/relevant_authors.csv'
+    relevant_articles_final = f'{data_dir}/relevant_articles_final.csv'
+    journal_index = f'{data_dir}/journal_index.csv'
+    unique_articles = f'{data_dir}/relevant_articles_unique.csv'
+    # Articles the later stages are built from
+    articles = unique_articles if collapse_duplicates else relevant_articles
+    return [
+        Stage("filter_articles", filter_relevant_articles,
+              inputs={"articles_path": articles_path},
+              outputs={"relevant_articles_path": relevant_articles,
+                       "discarded_articles_path": f'{data_dir}/discarded_articles.csv'},
+              params={"keywords": sorted(keywords)}),
+        Stage("index_articles", index_articles,
+              inputs={"articles_path": articles_path},
+              outputs={"article_index_dir": f'{data_dir}/article_index'}),
+        Stage("find_duplicates", find_duplicate_articles,
+              inputs={"relevant_articles_path": relevant_articles},
+              outputs={"duplicate_clusters_path": f'{data_dir}/duplicate_clusters.csv',
+                       **({"unique_articles_path": unique_articles} if collapse_duplicates else {})}),
+        Stage("filter_authors", filter_relevant_authors,
+              inputs={"relevant_articles_path": articles, "authors_path": authors_path},
+              outputs={"relevant_authors_path": relevant_authors}),
+        Stage("index_journals", index_journals,
+              inputs={f"scimagojr_{scimagojr_year(path)}": path for path in scimagojr_paths},
+              outputs={"journal_index_path": journal_index}),
+        Stage("enrich_articles", enrich_articles,
+              inputs={"relevant_articles_path": articles, "journal_index_path": journal_index,
+                      "fields_path": fields_path},
+              outputs={"relevant_articles_final_path": relevant_articles_final}),
+        Stage("author_field_stats", author_field_stats,
+              inputs={"relevant_articles_final_path": relevant_articles_final,
+                      "relevant_authors_path": relevant_authors},
+              outputs={"relevant_authors_with_field_path": f'{data_dir}/relevant_authors_with_field.csv'},
+              params={"cache_dir": f'{data_dir}/.cache'}),
+        Stage("author_stats", aggregate_author_stats,
+              inputs={"relevant_articles_final_path": relevant_articles_final,
+                      "relevant_authors_path": relevant_authors},
+              outputs={"author_stats_path": f'{data_dir}/author_stats.csv'},
+              params={"author_index_path": f'{data_dir}/author_index.csv', "cache_dir": f'{data_dir}/.cache'}),
+    ]
@@ -0,0 +1,399 @@
+import asyncio
+import json
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from author_index import attach_author_ids, author_names
+from author_reports import trend_fits
+from centrality import betweenness_centrality
+from coauthor_graph import build_coauthor_adjacency, build_field_adjacencies, to_networkx
+from data_cache import load_table
+
+# Prepared tables served by the query server
+authors_path = "data/relevant_authors_with_field.csv"
+articles_path = "data/relevant_articles_final.csv"
+paper_counts_path = "data/paper_counts.csv"
+
+# Listen on HOST:PORT, or on a Unix socket at UNIX_SOCKET when it is set
+HOST = "127.0.0.1"
+PORT = 8765
+UNIX_SOCKET = None
+
+# Number of query results kept in the LRU cache
+CACHE_SIZE = 1024
+# Worker processes for heavy queries (field betweenness, ego networks deeper than one hop)
+QUERY_WORKERS = 2
+# Sampled pivot sources of the per-field betweenness (None for the exact scores of top_researcher_by_field.py)
+FIELD_BETWEENNESS_PIVOTS = 256
+# Largest ego network depth and number of ego network nodes returned
+MAX_EGO_DEPTH = 3
+MAX_EGO_NODES = 5000
+
+# Metrics of the top-k query and the precomputed column holding each one
+CHEAP_METRICS = {"degree": "Degree Centrality", "strength": "Strength", "papers": "PaperCount"}
+HEAVY_METRICS = {"betweenness": "Betweenness Centrality"}
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        """Return the cached value of `key` and mark it as recently used, or None."""
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+def ego_network(adjacency, node, depth, max_nodes=MAX_EGO_NODES):
+    """
+    Return the authors within `depth` hops of a node and the edges among them.
+
+    The breadth-first search expands a whole frontier per step with one CSR
+    row slice. When more than `max_nodes` authors are reached, the closest
+    ones are kept.
+
+    Returns:
+        tuple: (node indices ordered by distance, their distances, (source,
+            target, weight) arrays of the edges, whether the result was truncated).
+    """
+    distance = np.full(adjacency.shape[0], -1, dtype=np.int32)
+    distance[node] = 0
+    frontier = np.array([node])
+    for hop in range(1, depth + 1):
+        neighbours = np.unique(adjacency[frontier].indices)
+        frontier = neighbours[distance[neighbours] < 0]
+        if len(frontier) == 0:
+            break
+        distance[frontier] = hop
+    nodes = np.flatnonzero(distance >= 0)
+    nodes = nodes[np.argsort(distance[nodes], kind="stable")]
+    truncated = len(nodes) > max_nodes
+    nodes = nodes[:max_nodes]
+    upper = sparse.triu(adjacency[nodes][:, nodes], k=1).tocoo()
+    return nodes, distance[nodes], (nodes[upper.row], nodes[upper.col], upper.data), truncated
+
+
+def _init_worker(adjacency, field_graphs):
+    global _worker_adjacency, _worker_field_graphs
+    _worker_adjacency = adjacency
+    _worker_field_graphs = field_graphs
+
+
+def _worker_ego_network(node, depth, max_nodes):
+    return ego_network(_worker_adjacency, node, depth, max_nodes)
+
+
+def _worker_field_betweenness(field, pivots):
+    """Betweenness of a field's graph, computed like top_researcher_by_field.py (unweighted, no endpoints)."""
+    adjacency, author_ids = _worker_field_graphs[field]
+    G = to_networkx(adjacency, np.arange(len(author_ids)))
+    scores = betweenness_centrality(G, k=pivots, weight=None, endpoints=False, workers=1)
+    return np.fromiter((scores[node] for node in range(len(author_ids))), dtype=float, count=len(author_ids))
+
+
+class QueryEngine:
+    """
+    The prepared tables, author index and co-authorship graphs, loaded once.
+
+    Cheap queries are answered from precomputed arrays in the event loop;
+    heavy ones run in a process pool holding its own copy of the graphs.
+    Results are kept in an LRU cache and concurrent identical heavy queries
+    share one computation.
+    """
+
+    def __init__(self, authors_path=authors_path, articles_path=articles_path,
+                 paper_counts_path=paper_counts_path, cache_size=CACHE_SIZE, workers=QUERY_WORKERS):
+        start = time.perf_counter()
+        authors_df = load_table(authors_path, columns=["PMID", "Field", "AuthorForename", "AuthorLastname",
+                                                       "AuthorInitials", "SJR"])
+        articles_df = load_table(articles_path, columns=["PMID", "Year", "Field"]).drop_duplicates("PMID")
+        self.author_index = attach_author_ids(authors_df)
+        authors_df = authors_df.dropna(subset=["AuthorID"])
+        authors_df["AuthorID"] = authors_df["AuthorID"].astype(np.int64)
+        self.names = self.author_index["DisplayName"].to_numpy()
+        # Case-insensitive display name -> ID; namesakes resolve to the lowest ID, other ones need 'id'
+        folded = pd.Series(self.author_index["AuthorID"].to_numpy(), index=pd.Series(self.names).str.casefold())
+        self.ids_by_name = folded[~folded.index.duplicated()].to_dict()
+
+        # Global co-authorship graph with every author as a node, indexed by author ID
+        adjacency, keys = build_coauthor_adjacency(authors_df, name_column="AuthorID", keep_isolates=True)
+        order = np.argsort(keys)
+        self.adjacency = adjacency[order][:, order].tocsr()
+        self.node_ids = keys[order].astype(np.int64)
+
+        # Per-field graphs and their cheap metrics, as computed by top_researcher_by_field.py
+        self.field_graphs = build_field_adjacencies(authors_df, field_column="Field", name_column="AuthorID")
+        field_papers = authors_df.drop_duplicates(["PMID", "AuthorID"]).groupby(["Field", "AuthorID"],
+                                                                                observed=True).size()
+        self.field_metrics = {}
+        for field, (field_adjacency, field_ids) in self.field_graphs.items():
+            n = len(field_ids)
+            self.field_metrics[field] = pd.DataFrame({
+                "AuthorID": field_ids.astype(np.int64),
+                "Degree Centrality": np.diff(field_adjacency.indptr) / (n - 1) if n > 1 else np.ones(n),
+                "Strength": np.asarray(field_adjacency.sum(axis=1)).ravel(),
+                "PaperCount": field_papers[field].reindex(field_ids, fill_value=0).to_numpy(),
+            })
+
+        # Author rows sorted by ID with their paper's year, for per-author summaries
+        years = articles_df.set_index("PMID")["Year"]
+        rows = authors_df[["AuthorID", "PMID", "Field", "SJR"]].copy()
+        rows["Year"] = rows["PMID"].map(years).astype(float)
+        self.author_rows = rows.sort_values("AuthorID", kind="stable").reset_index(drop=True)
+        self.row_ids = self.author_rows["AuthorID"].to_numpy()
+        self.trends = trend_fits(self.author_rows)
+
+        # Relevant articles per year and field, next to the PubMed total of the year
+        totals = pd.read_csv(paper_counts_path).set_index("Year")["Count"]
+        counts = articles_df.dropna(subset=["Year"]).groupby(["Year", "Field"], observed=True).size()
+        self.yearly_counts = counts.unstack(fill_value=0)
+        self.yearly_totals = totals
+
+        self.cache = LRUCache(cache_size)
+        self.pending = {}
+        self.workers = workers
+        self.pool = None
+        print(f"Loaded {len(authors_df)} author rows, {len(self.node_ids)} authors and {len(self.field_graphs)} "
+              f"fields in {time.perf_counter() - start:.1f}s")
+
+    def start_pool(self):
+        """Start the worker pool of heavy queries; workers receive the graphs once."""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.adjacency, self.field_graphs))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def author_id(self, params):
+        """Resolve the 'id' or 'name' query parameter to an author ID."""
+        if "id" in params:
+            author_id = int(params["id"])
+            if not 0 <= author_id < len(self.names):
+                raise LookupError(f"Unknown author ID {author_id}.")
+            return author_id
+        if "name" in params:
+            author_id = self.ids_by_name.get(params["name"].casefold())
+            if author_id is None:
+                raise LookupError(f"Unknown author '{params['name']}'.")
+            return int(author_id)
+        raise ValueError("Give the author as 'id' or 'name'.")
+
+    def node(self, author_id):
+        """Return the global graph node of an author ID."""
+        node = int(np.searchsorted(self.node_ids, author_id))
+        if node == len(self.node_ids) or self.node_ids[node] != author_id:
+            raise LookupError(f"Author {author_id} has no rows in {authors_path}.")
+        return node
+
+    async def run_heavy(self, key, func, *args):
+        """Run a heavy computation in the pool, sharing it with identical queries already running."""
+        if key not in self.pending:
+            loop = asyncio.get_running_loop()
+            self.pending[key] = loop.run_in_executor(self.pool, func, *args)
+        try:
+            return await asyncio.shield(self.pending[key])
+        finally:
+            self.pending.pop(key, None)
+
+    async def top(self, params):
+        """Top-k authors of a field by 'degree', 'strength', 'papers' or 'betweenness'."""
+        field = params.get("field")
+        if field not in self.field_metrics:
+            raise LookupError(f"Unknown field '{field}'; fields are {sorted(self.field_metrics)}.")
+        metric = params.get("metric", "degree")
+        k = int(params.get("k", 10))
+        if k < 1:
+            raise ValueError("'k' must be at least 1.")
+        metrics = self.field_metrics[field]
+        if metric in CHEAP_METRICS:
+            scores = metrics[CHEAP_METRICS[metric]].to_numpy()
+        elif metric in HEAVY_METRICS:
+            scores = await self.run_heavy(("betweenness", field), _worker_field_betweenness, field,
+                                          FIELD_BETWEENNESS_PIVOTS)
+        else:
+            raise ValueError(f"Unknown metric '{metric}'; use one of {sorted(CHEAP_METRICS) + sorted(HEAVY_METRICS)}.")
+        best = np.argsort(-scores, kind="stable")[:k]
+        ids = metrics["AuthorID"].to_numpy()[best]
+        return {"field": field, "metric": metric,
+                "authors": [{"id": int(author_id), "name": name, "score": float(score)}
+                            for author_id, name, score in zip(ids, author_names(ids, self.author_index),
+                                                              scores[best])]}
+
+    async def ego(self, params):
+        """Co-authors of an author up to 'depth' hops, with the edges among them."""
+        node = self.node(self.author_id(params))
+        depth = int(params.get("depth", 1))
+        if not 1 <= depth <= MAX_EGO_DEPTH:
+            raise ValueError(f"'depth' must be between 1 and {MAX_EGO_DEPTH}.")
+        if depth == 1:
+            nodes, distance, (source, target, weight), truncated = ego_network(self.adjacency, node, depth)
+        else:
+            nodes, distance, (source, target, weight), truncated = await self.run_heavy(
+                ("ego", node, depth), _worker_ego_network, node, depth, MAX_EGO_NODES)
+        ids = self.node_ids[nodes]
+        return {"author": int(self.node_ids[node]), "depth": depth, "truncated": bool(truncated),
+                "nodes": [{"id": int(author_id), "name": name, "distance": int(hops)}
+                          for author_id, name, hops in zip(ids, author_names(ids, self.author_index), distance)],
+                "edges": [[int(a), int(b), int(w)] for a, b, w in
+                          zip(self.node_ids[source], self.node_ids[target], weight)]}
+
+    async def author(self, params):
+        """Papers, fields, years, SJR trend and top co-authors of one author."""
+        author_id = self.author_id(params)
+        node = self.node(author_id)
+        start, end = np.searchsorted(self.row_ids, [author_id, author_id + 1])
+        rows = self.author_rows.iloc[start:end]
+        row = self.adjacency[node]
+        top = np.argsort(-row.data, kind="stable")[:5]
+        coauthors = self.node_ids[row.indices[top]]
+        summary = {
+            "id": author_id,
+            "name": self.names[author_id],
+            "papers": int(rows["PMID"].nunique()),
+            "fields": {str(field): int(count) for field, count in rows["Field"].value_counts().items() if count},
+            "first_year": None if rows["Year"].isna().all() else int(rows["Year"].min()),
+            "last_year": None if rows["Year"].isna().all() else int(rows["Year"].max()),
+            "mean_sjr": None if rows["SJR"].isna().all() else float(rows["SJR"].mean()),
+            "sjr_trend_slope": float(self.trends["TrendSlope"].get(author_id, np.nan)),
+            "coauthors": len(row.indices),
+            "top_coauthors": [{"id": int(coauthor), "name": name, "joint_papers": int(weight)}
+                              for coauthor, name, weight in zip(coauthors, author_names(coauthors, self.author_index),
+                                                                row.data[top])],
+        }
+        if np.isnan(summary["sjr_trend_slope"]):
+            summary["sjr_trend_slope"] = None
+        return summary
+
+    async def yearly(self, params):
+        """Relevant articles per year, optionally of one field, per 10,000 PubMed papers of the year."""
+        field = params.get("field")
+        if field is not None and field not in self.yearly_counts.columns:
+            raise LookupError(f"Unknown field '{field}'.")
+        counts = self.yearly_counts[field] if field is not None else self.yearly_counts.sum(axis=1)
+        totals = self.yearly_totals.reindex(counts.index)
+        return {"field": field, "years": [
+            {"year": int(year), "count": int(count), "pubmed_total": None if pd.isna(total) else int(total),
+             "per_10000": None if pd.isna(total) or total == 0 else float(count / total * 10000)}
+            for year, count, total in zip(counts.index, counts.to_numpy(), totals.to_numpy())]}
+
+    async def stats(self, params):
+        """Cache statistics."""
+        return {"cached": len(self.cache.entries), "hits": self.cache.hits, "misses": self.cache.misses,
+                "pending": len(self.pending)}
+
+    async def query(self, path, params):
+        """
+        Answer one query, from the cache when possible.
+
+        Returns:
+            tuple: (HTTP status, JSON-serializable body).
+        """
+        routes = {"/top": self.top, "/ego": self.ego, "/author": self.author, "/yearly": self.yearly,
+                  "/stats": self.stats}
+        if path not in routes:
+            return 404, {"error": f"Unknown query '{path}'; use one of {sorted(routes)}."}
+        key = (path, tuple(sorted(params.items())))
+        if path != "/stats":
+            cached = self.cache.get(key)
+            if cached is not None:
+                return 200, cached
+        try:
+            result = await routes[path](params)
+        except LookupError as error:
+            return 404, {"error": str(error.args[0] if error.args else error)}
+        except ValueError as error:
+            return 400, {"error": str(error)}
+        if path != "/stats":
+            self.cache.put(key, result)
+        return 200, result
+
+
+async def handle_connection(engine, reader, writer):
+    """Serve HTTP/1.1 GET queries on one connection, keeping it open between requests."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            start = time.perf_counter()
+            method, target, _ = (request_line.decode("latin-1").split() + ["", "", ""])[:3]
+            if method != "GET":
+                status, body = 405, {"error": "Only GET queries are supported."}
+            else:
+                url = urlsplit(target)
+                try:
+                    status, body = await engine.query(url.path, dict(parse_qsl(url.query)))
+                except Exception as error:
+                    traceback.print_exc()
+                    status, body = 500, {"error": f"{type(error).__name__}: {error}"}
+            payload = json.dumps(body).encode()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                      500: "Internal Server Error"}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nX-Elapsed-Ms: {elapsed_ms:.3f}\r\n\r\n".encode()
+                         + payload)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(engine, host=HOST, port=PORT, unix_socket=UNIX_SOCKET):
+    """Serve queries until the process is interrupted."""
+    engine.start_pool()
+    handler = lambda reader, writer: handle_connection(engine, reader, writer)
+    if unix_socket:
+        server = await asyncio.start_unix_server(handler, path=unix_socket)
+        print(f"Serving queries on unix socket {unix_socket}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        print(f"Serving queries on http://{host}:{port}, e.g. /top?field=Immunology&metric=degree&k=10")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        engine.close()
+
+
+def main():
+    engine = QueryEngine()
+    try:
+        asyncio.run(serve(engine))
+    except KeyboardInterrupt:
+        print("Query server stopped")
+
+
+# The query worker pool re-imports this module, so only start the server as a script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import os
+import string
+
+import numpy as np
+import pandas as pd
+
+from field_classifier import DEFAULT_FIELDS_PATH
+from keyword_filter import DEFAULT_KEYWORDS
+
+# Fraction of papers that mention one of the DEFAULT_KEYWORDS
+RELEVANT_FRACTION = 0.7
+# Fractions of rows with a missing value, roughly as in the PubMed exports
+MISSING_ABSTRACT = 0.08
+MISSING_FORENAME = 0.12
+
+
+def _zipf_sampler(rng, n, exponent):
+    """Return a function drawing indices in [0, n) with probability proportional to 1 / (rank + 1)^exponent."""
+    cumulative = np.cumsum(1.0 / np.arange(1, n + 1) ** exponent)
+    cumulative /= cumulative[-1]
+    return lambda size: np.minimum(np.searchsorted(cumulative, rng.random(size)), n - 1)
+
+
+def _pseudo_words(rng, n, syllables=("ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "xe", "zu", "ba", "de", "fi",
+                                     "go", "hu", "ja", "pe", "qi", "wo", "ya")):
+    """Return n distinct lowercase pseudo-words of two to four syllables, in random order."""
+    words = set()
+    while len(words) < n:
+        length = rng.integers(2, 5)
+        words.add("".join(rng.choice(syllables, length)))
+    # Object dtype, so that longer keywords can be written into word matrices without truncation
+    return rng.permutation(np.array(sorted(words), dtype=object))
+
+
+def _join_words(words, lengths):
+    """Join the first `lengths[i]` words of every row of a word matrix."""
+    return [" ".join(row[:length]) for row, length in zip(words, lengths)]
+
+
+def _initials(forenames, rng):
+    """Return PubMed-style initials: the first letter of every forename part, or a random letter when missing."""
+    initials = forenames.str.split().apply(lambda parts: "".join(part[0].upper() for part in parts)
+                                           if isinstance(parts, list) else None)
+    random_letters = pd.Series(rng.choice(list(string.ascii_uppercase), len(forenames)), index=forenames.index)
+    return initials.fillna(random_letters)
+
+
+def generate_corpus(directory, n_papers, seed=42, chunksize=100000, fields_path=DEFAULT_FIELDS_PATH):
+    """
+    Write a deterministic PubMed-shaped corpus with the columns described in the README.
+
+    Author counts per paper follow a shifted negative binomial (mean about 5),
+    author productivity and journal popularity are Zipf-distributed, and last
+    names are drawn from a much smaller pool than authors so that different
+    authors share names. About RELEVANT_FRACTION of the papers mention a
+    schistosomiasis keyword and most mention a few field keywords. A
+    SCImago-style export of the journals is written as well, so every
+    data_prepare stage can run on the corpus.
+
+    Args:
+        directory (str): Output directory.
+        n_papers (int): Number of papers.
+        seed (int): Random seed; the same seed and size give identical files.
+        chunksize (int): Papers generated and written per batch.
+        fields_path (str): Field keyword map whose keywords are mixed into the text.
+
+    Returns:
+        dict: Paths of the 'articles', 'authors', 'paper_counts' and 'scimagojr' files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = {
+        "articles": os.path.join(directory, "articles.synthetic.csv"),
+        "authors": os.path.join(directory, "authors.synthetic.csv"),
+        "paper_counts": os.path.join(directory, "paper_counts.csv"),
+        "scimagojr": os.path.join(directory, "scimagojr_2023.csv"),
+    }
+
+    # Vocabulary of filler words, drawn with Zipf frequencies
+    filler = _pseudo_words(rng, 3000)
+    field_words = pd.read_csv(fields_path)["Keyword"].to_numpy(dtype=object)
+    keywords = np.array(DEFAULT_KEYWORDS, dtype=object)
+
+    # Author identities, journals and affiliations
+    n_authors = max(1000, int(n_papers * 1.2))
+    lastnames = np.array([word.capitalize() for word in _pseudo_words(rng, max(300, n_authors // 8))], dtype=object)
+    forenames = np.array([word.capitalize() for word in _pseudo_words(rng, 3000)], dtype=object)
+    author_lastname = lastnames[_zipf_sampler(rng, len(lastnames), 0.7)(n_authors)]
+    author_forename = forenames[_zipf_sampler(rng, len(forenames), 0.7)(n_authors)]
+    # Some authors publish with a double forename, e.g. "Donald P"
+    middle = rng.random(n_authors) < 0.2
+    author_forename[middle] = author_forename[middle] + " " + rng.choice(list(string.ascii_uppercase), middle.sum())
+    affiliations = np.array([f"Department of {word.capitalize()}, University of {place.capitalize()}"
+                             for word, place in zip(rng.choice(filler, 500), rng.choice(filler, 500))])
+
+    n_journals = int(np.clip(n_papers // 50, 200, 20000))
+    issn_numbers = rng.choice(10 ** 7, size=2 * n_journals, replace=False)
+    issns = np.array([f"{number:08d}" for number in issn_numbers])
+    journal_titles = np.array([f"Journal of {a.capitalize()} {b}" for a, b in
+                               zip(rng.choice(filler, n_journals), _pseudo_words(rng, n_journals))])
+
+    # Flatter than the rank-frequency form of Lotka's law, so no author dominates small corpora
+    draw_author = _zipf_sampler(rng, n_authors, 0.6)
+    draw_journal = _zipf_sampler(rng, n_journals, 1.1)
+    draw_word = _zipf_sampler(rng, len(filler), 1.0)
+    years = np.arange(2000, 2025)
+    year_weights = np.exp(0.05 * (years - years[0]))
+    year_weights /= year_weights.sum()
+
+    header = True
+    papers_per_year = pd.Series(0, index=years)
+    with open(paths["articles"], 'w', newline='', encoding='utf-8') as articles_file, \
+            open(paths["authors"], 'w', newline='', encoding='utf-8') as authors_file:
+        for start in range(0, n_papers, chunksize):
+            n = min(chunksize, n_papers - start)
+            pmids = 10_000_000 + start + np.arange(n)
+
+            # Titles and abstracts: filler words with keywords at random positions
+            title_words = filler[draw_word(n * 10)].reshape(n, 10)
+            abstract_lengths = rng.integers(40, 160, n)
+            abstract_words = filler[draw_word(n * 160)].reshape(n, 160)
+            relevant = rng.random(n) < RELEVANT_FRACTION
+            title_words[relevant, rng.integers(0, 10, relevant.sum())] = rng.choice(keywords, relevant.sum())
+            for _ in range(3):
+                rows = np.flatnonzero(rng.random(n) < 0.6)
+                abstract_words[rows, rng.integers(0, 40, len(rows))] = rng.choice(field_words, len(rows))
+            titles = [title.capitalize() + "." for title in _join_words(title_words, np.full(n, 10))]
+            abstracts = pd.Series(_join_words(abstract_words, abstract_lengths), dtype=object)
+            abstracts[rng.random(n) < MISSING_ABSTRACT] = None
+
+            journal = draw_journal(n)
+            # Most articles carry the print ISSN, some the electronic one
+            article_issn = np.where(rng.random(n) < 0.85, issns[journal], issns[journal + n_journals])
+            year = rng.choice(years, n, p=year_weights)
+            papers_per_year = papers_per_year.add(pd.Series(year).value_counts(), fill_value=0)
+
+            # Author lists
+            n_paper_authors = 1 + rng.negative_binomial(2, 0.33, n)
+            paper_of_row = np.repeat(np.arange(n), n_paper_authors)
+            author = draw_author(len(paper_of_row))
+            author_n = np.arange(len(paper_of_row)) - np.repeat(np.cumsum(n_paper_authors) - n_paper_authors,
+                                                                n_paper_authors) + 1
+            forename = pd.Series(author_forename[author])
+            forename[rng.random(len(author)) < MISSING_FORENAME] = None
+            authors_chunk = pd.DataFrame({
+                "PMID": pmids[paper_of_row],
+                "AuthorN": author_n,
+                "AuthorForename": forename,
+                "AuthorLastname": author_lastname[author],
+                "AuthorInitials": _initials(forename, rng),
+                "AuthorAffiliation": affiliations[author % len(affiliations)],
+            })
+
+            first = authors_chunk[authors_chunk["AuthorN"] == 1]
+            articles_chunk = pd.DataFrame({
+                "PMID": pmids,
+                "Title": titles,
+                "Abstract": abstracts,
+                "ISSN": [f"{issn[:4]}-{issn[4:]}" for issn in article_issn],
+                "Journal": journal_titles[journal],
+                "Location": [f"({volume}) {page}-{page + 9}" for volume, page in
+                             zip(rng.integers(1, 60, n), rng.integers(1, 900, n))],
+                "Year": year,
+                "FirstAuthorForename": first["AuthorForename"].to_numpy(),
+                "FirstAuthorLastname": first["AuthorLastname"].to_numpy(),
+                "FirstAuthorInitials": first["AuthorInitials"].to_numpy(),
+                "FirstAuthorAffiliation": first["AuthorAffiliation"].to_numpy(),
+            })
+            articles_chunk.to_csv(articles_file, index=False, header=header)
+            authors_chunk.to_csv(authors_file, index=False, header=header)
+            header = False
+
+    pd.DataFrame({"Year": years, "Count": (papers_per_year.to_numpy() * 200).astype(np.int64)}) \
+        .to_csv(paths["paper_counts"], index=False)
+
+    # SCImago lists "print, electronic" ISSNs without hyphens and uses decimal commas; some journals are unranked
+    ranked = np.flatnonzero(rng.random(n_journals) < 0.8)
+    sjr = np.sort(rng.lognormal(0, 0.8, len(ranked)))[::-1]
+    pd.DataFrame({
+        "Rank": np.arange(1, len(ranked) + 1),
+        "Title": journal_titles[ranked],
+        "Issn": [f"{issns[j]}, {issns[j + n_journals]}" for j in ranked],
+        "SJR": [f"{value:.3f}".replace(".", ",") for value in sjr],
+    }).to_csv(paths["scimagojr"], sep=';', index=False)
+    return paths
@@ -0,0 +1,183 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from centrality import add_distance_weights, betweenness_centrality
+from coauthor_graph import to_networkx
+
+
+class YearDelta(NamedTuple):
+    """Co-authorship counts and paper counts added by the papers of one year, over all author IDs."""
+    adjacency: sparse.csr_matrix
+    papers: np.ndarray
+
+
+def yearly_deltas(authors_df, year_column="Year", id_column="AuthorID"):
+    """
+    Split the co-authorship network of an authors table by publication year.
+
+    Every edge is timestamped with the year of the papers it comes from, so
+    the network of any range of years is the sum of its yearly deltas.
+
+    Args:
+        authors_df (pd.DataFrame): Author rows with 'PMID', year and integer author ID columns.
+        year_column (str): Column holding the publication year of the paper.
+        id_column (str): Column holding the integer author ID.
+
+    Returns:
+        dict: Year -> `YearDelta`, in year order. Rows without a year or ID are skipped.
+    """
+    rows = authors_df[["PMID", year_column, id_column]].dropna().drop_duplicates(["PMID", id_column])
+    n_authors = int(rows[id_column].max()) + 1 if len(rows) else 0
+    deltas = {}
+    for year, year_rows in rows.groupby(year_column, sort=True):
+        paper_idx, pmids = pd.factorize(year_rows["PMID"])
+        author_ids = year_rows[id_column].to_numpy(dtype=np.int64)
+        incidence = sparse.csr_matrix((np.ones(len(year_rows), dtype=np.int32), (paper_idx, author_ids)),
+                                      shape=(len(pmids), n_authors))
+        adjacency = (incidence.T @ incidence).tocsr()
+        adjacency.setdiag(0)
+        adjacency.eliminate_zeros()
+        deltas[int(year)] = YearDelta(adjacency, np.bincount(author_ids, minlength=n_authors).astype(np.int32))
+    return deltas
+
+
+def window_bounds(years, window=5, start=None, step=1, cumulative=False):
+    """
+    Return the (first year, last year) of every snapshot window.
+
+    Sliding windows span `window` years and move by `step` years from `start`;
+    cumulative windows all begin at `start` and end every `step` years after
+    the first `window` years. A range shorter than one window gives a single
+    window over all years.
+    """
+    first, last = (min(years) if start is None else start), max(years)
+    if cumulative:
+        bounds = [(first, end) for end in range(first + window - 1, last + 1, step)]
+    else:
+        bounds = [(begin, begin + window - 1) for begin in range(first, last - window + 2, step)]
+    return bounds or [(first, last)]
+
+
+def snapshots(deltas, bounds):
+    """
+    Yield the network of every window by applying yearly deltas to the previous window.
+
+    Moving a window adds the deltas of the years entering it and subtracts
+    those of the years leaving it, so each snapshot costs a few sparse
+    additions instead of a rebuild from the author rows.
+
+    Yields:
+        tuple: (first year, last year, csr adjacency over all author IDs, paper count per author ID).
+    """
+    n_authors = next(iter(deltas.values())).adjacency.shape[0] if deltas else 0
+    adjacency = sparse.csr_matrix((n_authors, n_authors), dtype=np.int32)
+    papers = np.zeros(n_authors, dtype=np.int32)
+    current = set()
+    for first, last in bounds:
+        target = {year for year in deltas if first <= year <= last}
+        for year in sorted(current - target):
+            adjacency = adjacency - deltas[year].adjacency
+            papers -= deltas[year].papers
+        for year in sorted(target - current):
+            adjacency = adjacency + deltas[year].adjacency
+            papers += deltas[year].papers
+        # Pairs whose joint papers all left the window are no longer edges
+        adjacency.eliminate_zeros()
+        current = target
+        yield first, last, adjacency, papers.copy()
+
+
+def snapshot_centrality(adjacency, papers, betweenness_pivots=256, workers=None):
+    """
+    Compute the centrality of the authors with at least one co-author in a snapshot.
+
+    Degree centrality is normalized as by `nx.degree_centrality`; 'Strength'
+    is the number of co-authorships. Betweenness uses inverse co-authorship
+    counts as path lengths and `betweenness_pivots` sampled sources (None for
+    exact scores, 0 to skip it).
+
+    Returns:
+        pd.DataFrame: 'AuthorID', 'Degree Centrality', 'Strength',
+            'Betweenness Centrality' and 'PaperCount'.
+    """
+    nodes = np.flatnonzero(np.diff(adjacency.indptr))
+    graph = adjacency[nodes][:, nodes].tocsr()
+    n = len(nodes)
+    degree = np.diff(graph.indptr)
+    betweenness = np.full(n, np.nan)
+    if n and betweenness_pivots != 0:
+        G = to_networkx(graph, nodes)
+        scores = betweenness_centrality(G, k=betweenness_pivots, weight=add_distance_weights(G), workers=workers)
+        betweenness = np.fromiter((scores[node] for node in nodes.tolist()), dtype=float, count=n)
+    return pd.DataFrame({
+        "AuthorID": nodes.astype(np.int32),
+        "Degree Centrality": degree / (n - 1) if n > 1 else np.ones(n),
+        "Strength": np.asarray(graph.sum(axis=1)).ravel(),
+        "Betweenness Centrality": betweenness,
+        "PaperCount": papers[nodes],
+    })
+
+
+def centrality_time_series(authors_df, window=5, start=None, step=1, cumulative=False, betweenness_pivots=256,
+                           workers=None, year_column="Year", id_column="AuthorID"):
+    """
+    Compute per-author centrality for every window of a temporal co-authorship network.
+
+    Args:
+        authors_df (pd.DataFrame): See `yearly_deltas`.
+        window, start, step, cumulative: See `window_bounds`.
+        betweenness_pivots (int): See `snapshot_centrality`.
+        workers (int): Worker processes of the betweenness computation.
+        year_column, id_column: See `yearly_deltas`.
+
+    Returns:
+        pd.DataFrame: One `snapshot_centrality` row per author and window,
+            with 'WindowStart' and 'WindowEnd' years.
+    """
+    deltas = yearly_deltas(authors_df, year_column, id_column)
+    if not deltas:
+        return pd.DataFrame(columns=["WindowStart", "WindowEnd", "AuthorID", "Degree Centrality", "Strength",
+                                     "Betweenness Centrality", "PaperCount"])
+    frames = []
+    for first, last, adjacency, papers in snapshots(deltas, window_bounds(list(deltas), window, start, step,
+                                                                          cumulative)):
+        metrics = snapshot_centrality(adjacency, papers, betweenness_pivots, workers)
+        metrics.insert(0, "WindowEnd", last)
+        metrics.insert(0, "WindowStart", first)
+        frames.append(metrics)
+        print(f"Window {first}-{last}: {len(metrics)} authors, {adjacency.nnz // 2} edges")
+    return pd.concat(frames, ignore_index=True)
+
+
+def author_trends(series, metric="Degree Centrality"):
+    """
+    Fit the trend of one metric over the windows for every author.
+
+    Windows where an author has no co-author count as 0, so researchers who
+    stop publishing fade rather than keeping their last score.
+
+    Returns:
+        pd.DataFrame: 'AuthorID', 'Trend' (least-squares slope per window),
+            'First' and 'Last' window values, 'Peak', 'PeakWindowEnd' and
+            'Windows' (number of windows present), sorted by falling 'Trend'.
+    """
+    # Windows are keyed by their last year, which is unique for sliding and cumulative windows
+    table = series.pivot_table(index="AuthorID", columns="WindowEnd", values=metric, aggfunc="first")
+    present = table.notna().sum(axis=1).to_numpy()
+    values = table.fillna(0).to_numpy()
+    x = np.arange(values.shape[1], dtype=float)
+    x -= x.mean()
+    denominator = (x ** 2).sum()
+    slope = values @ x / denominator if denominator > 0 else np.zeros(len(values))
+    return pd.DataFrame({
+        "AuthorID": table.index.to_numpy(),
+        "Trend": slope,
+        "First": values[:, 0],
+        "Last": values[:, -1],
+        "Peak": values.max(axis=1),
+        "PeakWindowEnd": table.columns.to_numpy()[values.argmax(axis=1)],
+        "Windows": present,
+    }).sort_values("Trend", ascending=False, kind="stable", ignore_index=True)
@@ -0,0 +1,84 @@
+import os
+
+import matplotlib.pyplot as plt
+from matplotlib.ticker import MaxNLocator
+
+from author_index import attach_author_ids, author_names
+from data_cache import load_table
+from instrumentation import stage
+from temporal_graph import author_trends, centrality_time_series
+
+# Input data and output directory
+authors_path = "data/relevant_authors_with_field.csv"
+articles_path = "data/relevant_articles_final.csv"
+output_folder = "output"
+
+# Snapshot windows: WINDOW years moving by STEP years from START_YEAR (None starts at the first year).
+# With CUMULATIVE every window starts at START_YEAR and grows by STEP years instead.
+WINDOW = 5
+START_YEAR = 2000
+STEP = 1
+CUMULATIVE = False
+
+# Sampled pivot sources of the per-window betweenness (None for exact scores, 0 to skip betweenness)
+BETWEENNESS_PIVOTS = 256
+# Number of worker processes for betweenness (None uses every core)
+BETWEENNESS_WORKERS = None
+
+# Metric whose trend ranks rising and fading researchers, and how many of each to report and plot
+TREND_METRIC = "Degree Centrality"
+TOP_N = 10
+
+
+def main():
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Load the author rows and the publication year of every paper
+    with stage("load") as record:
+        authors_df = load_table(authors_path, columns=["PMID", "AuthorForename", "AuthorLastname", "AuthorInitials"])
+        years = load_table(articles_path, columns=["PMID", "Year"]).drop_duplicates("PMID").set_index("PMID")["Year"]
+        authors_df["Year"] = authors_df["PMID"].map(years)
+        record["rows"] = len(authors_df)
+
+    # Key authors by their integer ID; names are only looked up for the outputs
+    author_index = attach_author_ids(authors_df)
+
+    # Per-author centrality in every window, each snapshot derived from the previous one by yearly edge deltas
+    with stage("centrality", rows=len(authors_df)):
+        series = centrality_time_series(authors_df, window=WINDOW, start=START_YEAR, step=STEP,
+                                        cumulative=CUMULATIVE, betweenness_pivots=BETWEENNESS_PIVOTS,
+                                        workers=BETWEENNESS_WORKERS)
+    series.insert(3, "Author", author_names(series["AuthorID"], author_index))
+    series_output_path = os.path.join(output_folder, "author_centrality_windows.csv")
+    series.to_csv(series_output_path, index=False)
+    print(f"Centrality per window saved to: {series_output_path}")
+
+    # Rank researchers by the trend of their centrality across the windows
+    trends = author_trends(series, metric=TREND_METRIC)
+    trends.insert(1, "Author", author_names(trends["AuthorID"], author_index))
+    trends_output_path = os.path.join(output_folder, "author_centrality_trends.csv")
+    trends.to_csv(trends_output_path, index=False)
+    print(f"Centrality trends saved to: {trends_output_path}")
+
+    with stage("render"):
+        table = series.pivot_table(index="WindowEnd", columns="AuthorID", values=TREND_METRIC, aggfunc="first")
+        fig, axes = plt.subplots(1, 2, figsize=(16, 6), sharey=True)
+        for ax, selection, label in [(axes[0], trends.head(TOP_N), "Rising"),
+                                     (axes[1], trends.tail(TOP_N).iloc[::-1], "Fading")]:
+            for author_id, author in zip(selection["AuthorID"], selection["Author"]):
+                ax.plot(table.index, table[author_id].fillna(0), marker="o", label=author)
+            ax.set_title(f"{label} Researchers by {TREND_METRIC}", fontsize=14)
+            ax.set_xlabel("Last Year of Window", fontsize=12)
+            ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+            ax.legend(fontsize=8)
+        axes[0].set_ylabel(TREND_METRIC, fontsize=12)
+        fig.tight_layout()
+        visualization_output_path = os.path.join(output_folder, "author_centrality_trends.png")
+        fig.savefig(visualization_output_path, dpi=300)
+        plt.close(fig)
+    print(f"Visualization saved to: {visualization_output_path}")
+
+
+# The betweenness worker pool re-imports this module, so only run the analysis as a script
+if __name__ == "__main__":
+    main()
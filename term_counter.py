@@ -0,0 +1,149 @@
+import heapq
+import os
+import re
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import NamedTuple
+
+import pandas as pd
+
+# Words ignored when counting terms in titles and abstracts
+DEFAULT_STOPWORDS = frozenset(['the', 'and', 'of', 'to', 'in', 'for', 'with', 'on', 'a', 'by', 'as', 'an', 'at', 'or',
+                               'from', 'that', 'this', 'among', 'after', 'based', 'more', 'than', 'both', 'have',
+                               'these', 'study', 'other', 'between', 'been', 'which', 'were', 'china', 'also'])
+
+_WORD = re.compile(r'\b\w+\b')
+
+
+class TermCounts(NamedTuple):
+    """Term counts of a corpus: `total` over all rows and `groups[column][value]` per group value."""
+    total: Counter
+    groups: dict
+
+
+def tokenize(text, stopwords=DEFAULT_STOPWORDS, min_length=4):
+    """Return the lowercase words of a text, without stopwords and words of `min_length - 1` letters or fewer."""
+    return [word for word in _WORD.findall(text.lower()) if len(word) >= min_length and word not in stopwords]
+
+
+def text_terms(text, ngrams=(1,), stopwords=DEFAULT_STOPWORDS, min_length=4):
+    """
+    Return the terms of one text.
+
+    Bigrams join two consecutive kept words with a space; they never span two
+    texts, e.g. the end of a title and the start of its abstract.
+    """
+    words = tokenize(text, stopwords, min_length)
+    terms = []
+    for n in ngrams:
+        terms.extend(words if n == 1 else (' '.join(words[i:i + n]) for i in range(len(words) - n + 1)))
+    return terms
+
+
+def count_chunk(chunk, text_columns=('Title', 'Abstract'), group_by=(), ngrams=(1,), stopwords=DEFAULT_STOPWORDS,
+                min_length=4):
+    """
+    Count the terms of a chunk of articles, overall and per group value.
+
+    Args:
+        chunk (pd.DataFrame): Articles with the text and group columns.
+        text_columns (tuple): Columns whose text is counted.
+        group_by (tuple): Columns such as 'Year' or 'Field' to count terms per value of.
+        ngrams (tuple): Term lengths to count, e.g. (1, 2) for unigrams and bigrams.
+        stopwords (frozenset): Words to ignore.
+        min_length (int): Minimum word length.
+
+    Returns:
+        TermCounts: Counts of the chunk.
+    """
+    counts = TermCounts(Counter(), {column: {} for column in group_by})
+    groups = [chunk[column].tolist() for column in group_by]
+    texts = [chunk[column].tolist() for column in text_columns]
+    for row, row_texts in enumerate(zip(*texts)):
+        row_counts = Counter()
+        for text in row_texts:
+            if isinstance(text, str):
+                row_counts.update(text_terms(text, ngrams, stopwords, min_length))
+        counts.total.update(row_counts)
+        for column, values in zip(group_by, groups):
+            value = values[row]
+            if not pd.isna(value):
+                counts.groups[column].setdefault(value, Counter()).update(row_counts)
+    return counts
+
+
+def _count_chunk(args):
+    """Worker: unpack the arguments of `count_chunk`."""
+    return count_chunk(*args)
+
+
+def merge_counts(counts, other):
+    """Add the counts of `other` into `counts` and return `counts`."""
+    counts.total.update(other.total)
+    for column, values in other.groups.items():
+        for value, counter in values.items():
+            counts.groups.setdefault(column, {}).setdefault(value, Counter()).update(counter)
+    return counts
+
+
+def count_terms_file(articles_path, text_columns=('Title', 'Abstract'), group_by=(), ngrams=(1,),
+                     stopwords=DEFAULT_STOPWORDS, min_length=4, chunksize=20000, workers=None, encoding=None):
+    """
+    Stream an articles CSV in chunks and count its terms in a process pool.
+
+    At most two chunks per worker are read ahead, so memory stays bounded by
+    the chunk size and the vocabulary rather than the corpus size.
+
+    Args:
+        articles_path (str): Path to the articles CSV.
+        text_columns, group_by, ngrams, stopwords, min_length: See `count_chunk`.
+        chunksize (int): Number of rows read per chunk.
+        workers (int): Number of worker processes. Defaults to the CPU count;
+            use 1 to run in the current process.
+        encoding (str): Encoding of the source CSV.
+
+    Returns:
+        TermCounts: Counts of the whole file.
+    """
+    workers = workers or os.cpu_count() or 1
+    options = (tuple(text_columns), tuple(group_by), tuple(ngrams), frozenset(stopwords), min_length)
+    chunks = pd.read_csv(articles_path, usecols=list(text_columns) + list(group_by), chunksize=chunksize,
+                         encoding=encoding)
+
+    counts = TermCounts(Counter(), {column: {} for column in group_by})
+    if workers == 1:
+        for chunk in chunks:
+            merge_counts(counts, count_chunk(chunk, *options))
+        return counts
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge_counts(counts, future.result())
+            pending.add(executor.submit(_count_chunk, (chunk,) + options))
+        for future in pending:
+            merge_counts(counts, future.result())
+    return counts
+
+
+def top_terms(counter, k=50):
+    """
+    Return the `k` most frequent terms as a 'Keyword', 'Count' DataFrame, selected with a bounded heap.
+
+    Terms with equal counts are ordered alphabetically, so the result does not
+    depend on the order in which the chunk counts were merged.
+    """
+    top = heapq.nsmallest(k, counter.items(), key=lambda item: (-item[1], item[0]))
+    return pd.DataFrame(top, columns=["Keyword", "Count"])
+
+
+def top_terms_by_group(counts, column, k=10):
+    """Return the `k` most frequent terms of every value of a group column."""
+    frames = [top_terms(counter, k).assign(**{column: value}) for value, counter in counts.groups[column].items()]
+    if not frames:
+        return pd.DataFrame(columns=[column, "Keyword", "Count"])
+    return pd.concat(frames, ignore_index=True)[[column, "Keyword", "Count"]].sort_values(
+        [column, "Count"], ascending=[True, False], kind="stable", ignore_index=True)
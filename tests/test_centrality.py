@@ -0,0 +1,94 @@
+import networkx as nx
+import numpy as np
+import pytest
+from scipy import sparse
+
+from centrality import (add_distance_weights, betweenness_centrality, eigenvector_centrality, katz_centrality,
+                        pagerank, sparse_centrality, strength_centrality)
+from coauthor_graph import to_networkx
+
+
+def coauthor_graph(n=40, p=0.12, seed=7):
+    """Random graph with co-authorship counts as weights, an isolated node and a second component."""
+    rng = np.random.default_rng(seed)
+    G = nx.gnp_random_graph(n, p, seed=seed)
+    for u, v in G.edges:
+        G.edges[u, v]["weight"] = int(rng.integers(1, 6))
+    G.add_edge(n, n + 1, weight=2)
+    G.add_node(n + 2)
+    return G
+
+
+def adjacency_of(G):
+    return nx.to_scipy_sparse_array(G, nodelist=sorted(G), weight="weight", format="csr").astype(float)
+
+
+@pytest.mark.parametrize("endpoints", [True, False])
+@pytest.mark.parametrize("normalized", [True, False])
+@pytest.mark.parametrize("weight", [None, "distance"])
+def test_exact_betweenness_matches_networkx(endpoints, normalized, weight):
+    G = coauthor_graph()
+    add_distance_weights(G)
+    expected = nx.betweenness_centrality(G, weight=weight, endpoints=endpoints, normalized=normalized)
+    for workers in (1, 2):
+        scores = betweenness_centrality(G, weight=weight, endpoints=endpoints, normalized=normalized,
+                                        workers=workers)
+        assert scores == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize("endpoints", [True, False])
+def test_sampled_betweenness_matches_networkx_with_the_same_seed(endpoints):
+    G = coauthor_graph()
+    expected = nx.betweenness_centrality(G, k=10, weight=None, endpoints=endpoints, seed=3)
+    scores = betweenness_centrality(G, k=10, weight=None, endpoints=endpoints, seed=3, workers=1)
+    assert scores == pytest.approx(expected, abs=1e-12)
+
+
+def test_distance_weights_invert_counts():
+    G = nx.Graph()
+    G.add_edge("a", "b", weight=4)
+    assert G.edges["a", "b"][add_distance_weights(G)] == 0.25
+
+
+def test_power_iterations_match_networkx():
+    G = coauthor_graph()
+    nodes = sorted(G)
+    adjacency = adjacency_of(G)
+
+    def as_array(scores):
+        return np.array([scores[node] for node in nodes])
+
+    np.testing.assert_allclose(strength_centrality(adjacency), as_array(dict(G.degree(weight="weight"))))
+    np.testing.assert_allclose(pagerank(adjacency), as_array(nx.pagerank(G, weight="weight", tol=1e-10)),
+                               atol=1e-6)
+    np.testing.assert_allclose(eigenvector_centrality(adjacency, tol=1e-10),
+                               as_array(nx.eigenvector_centrality(G, weight="weight", tol=1e-10)), atol=1e-6)
+    radius = max(abs(np.linalg.eigvalsh(adjacency.toarray())))
+    alpha = 0.5 / radius
+    np.testing.assert_allclose(katz_centrality(adjacency, alpha=alpha, tol=1e-10),
+                               as_array(nx.katz_centrality(G, alpha=alpha, weight="weight", tol=1e-10)), atol=1e-6)
+
+
+def test_sparse_centrality_frame():
+    G = coauthor_graph()
+    adjacency = adjacency_of(G)
+    frame = sparse_centrality(adjacency, nodes=sorted(G), tol=1e-10)
+    assert list(frame.columns) == ["Strength", "PageRank", "Eigenvector Centrality", "Katz Centrality"]
+    assert list(frame.index) == sorted(G)
+    np.testing.assert_allclose(frame["PageRank"].sum(), 1.0)
+    radius = max(abs(np.linalg.eigvalsh(adjacency.toarray())))
+    np.testing.assert_allclose(frame["Katz Centrality"], katz_centrality(adjacency, alpha=0.5 / radius, tol=1e-10),
+                               atol=1e-6)
+
+
+def test_power_iterations_on_an_exported_coauthor_adjacency():
+    adjacency = sparse.csr_matrix(np.array([[0, 2, 1, 0], [2, 0, 0, 0], [1, 0, 0, 3], [0, 0, 3, 0]], dtype=float))
+    G = to_networkx(adjacency, np.arange(4))
+    np.testing.assert_allclose(pagerank(adjacency, tol=1e-10),
+                               list(nx.pagerank(G, weight="weight", tol=1e-10).values()), atol=1e-6)
+
+
+def test_empty_graph():
+    empty = sparse.csr_matrix((0, 0))
+    assert len(sparse_centrality(empty)) == 0
+    assert betweenness_centrality(nx.Graph()) == {}
@@ -0,0 +1,44 @@
+from itertools import combinations
+
+import networkx as nx
+import pandas as pd
+
+from author_index import attach_author_ids, author_names
+from coauthor_graph import (author_paper_counts, build_coauthor_adjacency, collaboration_matrix, to_networkx,
+                            top_authors, total_collaborations)
+
+
+def authors_table():
+    return pd.DataFrame({"PMID": [1, 1, 1, 2, 2, 3, 3, 4],
+                         "AuthorForename": ["Ann", None, "Bo", "Ann", None, "Cy", "Ann", "Bo"],
+                         "AuthorLastname": ["Lee", "Wu", "Kim", "Lee", "Wu", "Ng", "Lee", "Kim"],
+                         "AuthorInitials": ["A", "J", "B", "A", "J", "C", "A", "B"]})
+
+
+def test_adjacency_matches_the_pairwise_loop():
+    authors_df = authors_table()
+    expected = nx.Graph()
+    for _, group in authors_df.groupby("PMID"):
+        names = (group["AuthorForename"] + " " + group["AuthorLastname"]).dropna()
+        for a, b in combinations(names, 2):
+            weight = expected.edges[a, b]["weight"] + 1 if expected.has_edge(a, b) else 1
+            expected.add_edge(a, b, weight=weight)
+    G = to_networkx(*build_coauthor_adjacency(authors_df))
+    assert nx.utils.graphs_equal(G, expected)
+
+
+def test_author_ids_are_the_default_key(tmp_path):
+    authors_df = authors_table()
+    index = attach_author_ids(authors_df, path=str(tmp_path / "author_index.csv"))
+    selection = top_authors(authors_df, n=4)
+    assert list(author_names(selection, index)) == ["Ann Lee", "J Wu", "Bo Kim", "Cy Ng"]
+    assert author_paper_counts(authors_df).tolist() == [3, 2, 2, 1]
+
+    matrix = collaboration_matrix(authors_df, selection)
+    assert matrix.to_numpy().tolist() == [[0, 2, 1, 1], [2, 0, 1, 0], [1, 1, 0, 0], [1, 0, 0, 0]]
+    totals = total_collaborations(authors_df, selection=selection).reindex(selection)
+    assert totals.tolist() == matrix.sum(axis=1).tolist()
+
+
+def test_full_names_drop_authors_without_forename():
+    assert "J Wu" not in top_authors(authors_table(), n=4)
@@ -0,0 +1,62 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from communities import louvain, modularity
+
+
+def adjacency_of(G):
+    return nx.to_scipy_sparse_array(G, nodelist=sorted(G), weight="weight", format="csr").astype(float)
+
+
+def planted_graph(groups=6, size=8, seed=1):
+    """Dense groups of authors with heavy internal co-authorships and a few light links between groups."""
+    G = nx.planted_partition_graph(groups, size, 0.9, 0.02, seed=seed)
+    rng = np.random.default_rng(seed)
+    for u, v in G.edges:
+        same = G.nodes[u]["block"] == G.nodes[v]["block"]
+        G.edges[u, v]["weight"] = int(rng.integers(2, 6)) if same else 1
+    return G
+
+
+def test_modularity_matches_networkx():
+    G = planted_graph()
+    labels = np.random.default_rng(0).integers(0, 5, G.number_of_nodes())
+    communities = [set(np.flatnonzero(labels == label)) for label in np.unique(labels)]
+    for resolution in (0.5, 1.0, 2.0):
+        expected = nx.community.modularity(G, communities, weight="weight", resolution=resolution)
+        assert modularity(adjacency_of(G), labels, resolution) == pytest.approx(expected)
+
+
+def test_louvain_recovers_planted_groups():
+    G = planted_graph()
+    labels = louvain(adjacency_of(G))
+    blocks = np.array([G.nodes[node]["block"] for node in sorted(G)])
+    # The same partition up to renumbering: every group maps to one community and back
+    pairs = set(zip(blocks.tolist(), labels.tolist()))
+    assert len(pairs) == len(set(blocks)) == len(set(labels.tolist()))
+
+
+def test_louvain_modularity_is_close_to_networkx():
+    G = nx.karate_club_graph()
+    adjacency = adjacency_of(G)
+    labels = louvain(adjacency)
+    reference = nx.community.louvain_communities(G, weight="weight", seed=42)
+    expected = nx.community.modularity(G, reference, weight="weight")
+    assert modularity(adjacency, labels) >= expected - 0.02
+
+
+def test_louvain_is_deterministic_and_numbered_by_size():
+    adjacency = adjacency_of(planted_graph(groups=5, size=6, seed=3))
+    labels = louvain(adjacency, seed=11)
+    np.testing.assert_array_equal(labels, louvain(adjacency, seed=11))
+    sizes = np.bincount(labels)
+    assert np.all(np.diff(sizes) <= 0)
+
+
+def test_isolated_authors_stay_alone():
+    G = planted_graph(groups=3, size=5)
+    G.add_nodes_from([100, 101])
+    labels = louvain(adjacency_of(G))
+    assert len(set(labels[-2:].tolist())) == 2
+    assert not set(labels[-2:].tolist()) & set(labels[:-2].tolist())
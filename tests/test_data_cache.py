@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+import pytest
+
+import data_cache
+from data_cache import cache_path, load_table, refresh_cache
+
+pytest.importorskip("pyarrow")
+
+
+def write_articles(path, n=50, first_pmid=1):
+    pd.DataFrame({
+        "PMID": range(first_pmid, first_pmid + n),
+        "Year": [None if i % 7 == 0 else 1990 + i % 20 for i in range(n)],
+        "Title": [f"Title {i}" for i in range(n)],
+        "Journal": ["Acta Tropica", "Parasitology"] * (n // 2),
+        "SJR": [0.5 + i / 100 for i in range(n)],
+    }).to_csv(path, index=False)
+
+
+def test_cache_is_rebuilt_when_the_source_changes(tmp_path):
+    csv_path, cache_dir = str(tmp_path / "articles.csv"), str(tmp_path / "cache")
+    write_articles(csv_path)
+    assert load_table(csv_path, cache_dir=cache_dir)["PMID"].tolist() == list(range(1, 51))
+    target = cache_path(csv_path, cache_dir)
+    built = os.stat(target).st_mtime_ns
+
+    # An unchanged source reuses the cache file
+    assert refresh_cache(csv_path, cache_dir) == target
+    assert os.stat(target).st_mtime_ns == built
+
+    write_articles(csv_path, first_pmid=101)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_table(csv_path, cache_dir=cache_dir)["PMID"].tolist() == list(range(101, 151))
+    # Caches are written under a unique temporary name and renamed, so none are left behind
+    assert os.listdir(cache_dir) == [os.path.basename(target)]
+
+
+def test_same_base_name_in_different_directories(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    for directory, first_pmid in (("a", 1), ("b", 1000)):
+        os.makedirs(tmp_path / directory)
+        write_articles(str(tmp_path / directory / "articles.csv"), first_pmid=first_pmid)
+    assert load_table(str(tmp_path / "a" / "articles.csv"), cache_dir=cache_dir)["PMID"].iloc[0] == 1
+    assert load_table(str(tmp_path / "b" / "articles.csv"), cache_dir=cache_dir)["PMID"].iloc[0] == 1000
+
+
+def test_columns_are_projected_with_explicit_dtypes(tmp_path):
+    csv_path = str(tmp_path / "articles.csv")
+    write_articles(csv_path)
+    df = load_table(csv_path, columns=["Journal", "Year", "PMID"], cache_dir=str(tmp_path / "cache"))
+    assert list(df.columns) == ["Journal", "Year", "PMID"]
+    assert str(df["PMID"].dtype) == "int64" and str(df["Year"].dtype) == "Int16"
+    assert isinstance(df["Journal"].dtype, pd.CategoricalDtype)
+    assert not isinstance(load_table(csv_path, columns=["Journal"], categorical=False,
+                                     cache_dir=str(tmp_path / "cache"))["Journal"].dtype, pd.CategoricalDtype)
+    with pytest.raises(KeyError):
+        load_table(csv_path, columns=["PMID", "Abstract"], cache_dir=str(tmp_path / "cache"))
+
+
+@pytest.mark.parametrize("parquet", [True, False])
+def test_year_and_pmid_filters(tmp_path, monkeypatch, parquet):
+    csv_path = str(tmp_path / "articles.csv")
+    write_articles(csv_path)
+    if not parquet:
+        monkeypatch.setattr(data_cache, "pq", None)
+    expected = pd.read_csv(csv_path)
+    cache_dir = str(tmp_path / "cache")
+
+    df = load_table(csv_path, years=(1995, 2000), cache_dir=cache_dir)
+    assert df["PMID"].tolist() == expected.loc[expected["Year"].between(1995, 2000), "PMID"].tolist()
+    df = load_table(csv_path, years=(None, 1993), cache_dir=cache_dir)
+    assert df["PMID"].tolist() == expected.loc[expected["Year"] <= 1993, "PMID"].tolist()
+    df = load_table(csv_path, columns=["PMID", "SJR"], pmids=[3, 5, 99], cache_dir=cache_dir)
+    assert df["PMID"].tolist() == [3, 5]
+    assert df["SJR"].tolist() == pytest.approx([0.52, 0.54])
+
+
+def test_latin1_source_leaves_no_temporary_file(tmp_path):
+    csv_path, cache_dir = str(tmp_path / "authors.csv"), str(tmp_path / "cache")
+    with open(csv_path, "w", encoding="latin-1") as file:
+        file.write("PMID,AuthorLastname\n1,Müller\n2,Núñez\n")
+    assert load_table(csv_path, categorical=False, cache_dir=cache_dir)["AuthorLastname"].tolist() == \
+        ["Müller", "Núñez"]
+    assert os.listdir(cache_dir) == [os.path.basename(cache_path(csv_path, cache_dir))]
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from field_classifier import OTHER_FIELD, classify_articles, classify_fields
+
+FIELD_MAP = pd.DataFrame({"Keyword": ["antigen", "infection", "treatment", "parasite"],
+                          "Field": ["Immunology", "Medical Sciences", "Medical Sciences", "Parasitology"]})
+
+
+def articles(*texts):
+    return pd.DataFrame({"Title": [title for title, _ in texts], "Abstract": [abstract for _, abstract in texts]})
+
+
+def test_highest_count_wins():
+    df = articles(("antigen antigen", "infection"), ("infection", "treatment of a parasite"))
+    assert classify_articles(df, FIELD_MAP).tolist() == ["Immunology", "Medical Sciences"]
+
+
+def test_ties_go_to_the_first_field_of_the_map():
+    df = articles(("antigen", "infection"), ("parasite", "infection"))
+    assert classify_articles(df, FIELD_MAP).tolist() == ["Immunology", "Medical Sciences"]
+    reordered = FIELD_MAP.iloc[::-1].reset_index(drop=True)
+    assert classify_articles(df, reordered).tolist() == ["Medical Sciences", "Parasitology"]
+
+
+def test_ties_are_flagged_in_their_own_column():
+    df = articles(("antigen", "infection"), ("antigen antigen", "parasite"), ("nothing", "here"))
+    classified = classify_fields(df, FIELD_MAP)
+    assert classified["Field"].tolist() == ["Immunology", "Immunology", OTHER_FIELD]
+    assert classified["FieldTie"].tolist() == [True, False, False]
+    assert classify_articles(df, FIELD_MAP, tie_label="Mixed").tolist() == ["Mixed", "Immunology", OTHER_FIELD]
+
+
+def test_no_keyword_or_missing_text_is_other():
+    df = articles(("nothing here", "at all"), ("antigen", None))
+    assert classify_articles(df, FIELD_MAP).tolist() == [OTHER_FIELD, OTHER_FIELD]
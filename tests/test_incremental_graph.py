@@ -0,0 +1,63 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+from centrality import add_distance_weights, betweenness_centrality
+from coauthor_graph import build_coauthor_adjacency, to_networkx
+from incremental_graph import (add_papers, centrality_frame, empty_state, load_graph_state, save_graph_state,
+                               update_betweenness)
+
+
+def random_papers(n_papers, first_pmid=1, groups=8, group_size=25, seed=0):
+    """Author rows of papers whose authors come from separate groups, so the graph has several components."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for pmid in range(first_pmid, first_pmid + n_papers):
+        group = rng.integers(groups)
+        for author in rng.choice(group_size, size=rng.integers(1, 6), replace=False):
+            rows.append((pmid, group * group_size + author))
+    return pd.DataFrame(rows, columns=["PMID", "AuthorID"])
+
+
+def full_recompute(authors_df, weighted, endpoints):
+    adjacency, author_ids = build_coauthor_adjacency(authors_df, name_column="AuthorID")
+    G = to_networkx(adjacency, author_ids)
+    weight = add_distance_weights(G) if weighted else None
+    return nx.degree_centrality(G), betweenness_centrality(G, weight=weight, endpoints=endpoints, workers=1)
+
+
+@pytest.mark.parametrize("weighted", [True, False])
+@pytest.mark.parametrize("endpoints", [True, False])
+def test_appending_papers_matches_a_full_recompute(tmp_path, weighted, endpoints):
+    # Only the first three groups receive new papers, including authors never seen before
+    old = random_papers(300, seed=1)
+    new = random_papers(10, first_pmid=301, groups=3, group_size=30, seed=2)
+
+    state = empty_state()
+    assert add_papers(state, old) == 300
+    update_betweenness(state, weighted=weighted, endpoints=endpoints, workers=1)
+    save_graph_state(state, str(tmp_path))
+
+    state = load_graph_state(str(tmp_path))
+    # Papers already in the state are ignored
+    assert add_papers(state, pd.concat([old.tail(20), new])) == 10
+    n_updated = update_betweenness(state, weighted=weighted, endpoints=endpoints, workers=1)
+    metrics = centrality_frame(state, endpoints=endpoints).set_index("AuthorID")
+    assert 0 < n_updated < len(metrics)
+
+    degree, betweenness = full_recompute(pd.concat([old, new]), weighted, endpoints)
+    assert sorted(metrics.index) == sorted(degree)
+    np.testing.assert_allclose(metrics["Degree Centrality"], [degree[node] for node in metrics.index], atol=1e-12)
+    np.testing.assert_allclose(metrics["Betweenness Centrality"], [betweenness[node] for node in metrics.index],
+                               atol=1e-12)
+    paper_counts = pd.concat([old, new]).drop_duplicates().groupby("AuthorID").size()
+    assert (metrics["PaperCount"] == paper_counts.reindex(metrics.index)).all()
+
+
+def test_missing_state_and_empty_batches(tmp_path):
+    assert load_graph_state(str(tmp_path / "missing")) is None
+    state = empty_state()
+    assert add_papers(state, pd.DataFrame({"PMID": [1], "AuthorID": [pd.NA]})) == 0
+    assert update_betweenness(state) == 0
+    assert centrality_frame(state).empty
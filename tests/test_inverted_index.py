@@ -0,0 +1,75 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from field_classifier import keyword_counts
+from inverted_index import InvertedIndex, compact_index, load_segment, segment_paths, update_index
+from keyword_filter import DEFAULT_KEYWORDS, filter_articles, normalize_series
+
+TITLES = ["Snail-control in Hubei", "snail\ncontrol programmes", "Snail  control", "Snail control works",
+          "[Snail control] in lakes", "Schistosoma japonicum", "Schistosomes", "Parasitic diseases", None,
+          "Antischistosomal drugs", "The snail controlled", "Oncomelania snail", "Molluscicide trial", "",
+          "Control of snails", "Public health and the immune response"]
+ABSTRACTS = ["Snail control cut prevalence.", None, "We studied snails.", "", "Mass drug administration",
+             "Cercariae shedding", "snail\tcontrol", "Bilharzia in Egypt", "snail control", None,
+             "snail,control", "A snail control-programme", "S. mansoni", "Public  health", None,
+             "nitric oxide and tropical medicine"]
+
+
+@pytest.fixture
+def articles(tmp_path):
+    df = pd.DataFrame({"PMID": np.arange(100, 100 + len(TITLES)), "Title": TITLES, "Abstract": ABSTRACTS})
+    path = tmp_path / "articles.csv"
+    df.to_csv(path, index=False)
+    return df, str(path)
+
+
+def build_index(path, directory, chunksize):
+    update_index(path, str(directory), chunksize=chunksize)
+    return InvertedIndex(str(directory))
+
+
+@pytest.mark.parametrize("chunksize", [4, 100])
+def test_select_matches_filter_articles(articles, tmp_path, chunksize):
+    df, path = articles
+    index = build_index(path, tmp_path / "index", chunksize)
+    relevant, _, _ = filter_articles(pd.read_csv(path), DEFAULT_KEYWORDS)
+    np.testing.assert_array_equal(index.select(DEFAULT_KEYWORDS), np.sort(relevant["PMID"].to_numpy()))
+
+
+def test_phrases_only_match_their_own_separator(articles, tmp_path):
+    df, path = articles
+    index = build_index(path, tmp_path / "index", 100)
+    for keyword in ["snail control", "snail-control", "snail  control", "snail\tcontrol", "public  health"]:
+        pattern = r"\b" + re.escape(keyword) + r"\b"
+        expected = sum(normalize_series(df[column]).str.count(pattern) for column in ["Title", "Abstract"])
+        counts = index.count(keyword).reindex(df["PMID"], fill_value=0)
+        np.testing.assert_array_equal(counts.to_numpy(), expected.to_numpy(), err_msg=repr(keyword))
+
+
+def test_substring_counts_match_str_count(articles, tmp_path):
+    df, path = articles
+    index = build_index(path, tmp_path / "index", 4)
+    compact_index(str(tmp_path / "index"))
+    keywords = ["snail", "control", "public health", "immune response", "nitric oxide", "schistosom"]
+    counts = index.keyword_counts(keywords, substring=True).reindex(df["PMID"], fill_value=0)
+    # Title and abstract are counted separately, so matches never span the two
+    expected = sum(keyword_counts(normalize_series(df[column]), keywords) for column in ["Title", "Abstract"])
+    np.testing.assert_array_equal(counts.to_numpy(), expected)
+
+
+def test_outdated_segments_are_rebuilt(articles, tmp_path):
+    _, path = articles
+    directory = tmp_path / "index"
+    build_index(path, directory, 100)
+    segment = segment_paths(str(directory))[0]
+    with np.load(segment) as arrays:
+        old = {name: arrays[name] for name in arrays.files if name not in ("version", "separators", "separator_ptr",
+                                                                            "separator_codes")}
+    np.savez(segment, **old)
+    with pytest.raises(ValueError):
+        load_segment(segment)
+    assert update_index(path, str(directory)) == len(TITLES)
+    assert len(InvertedIndex(str(directory))) == len(TITLES)
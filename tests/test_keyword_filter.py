@@ -0,0 +1,77 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from keyword_filter import DEFAULT_KEYWORDS, filter_articles_file, generate_relevant_authors_file
+
+
+def contains_keywords(text, keywords):
+    """The per-keyword matcher the streaming filter replaced."""
+    if pd.isnull(text):
+        return False
+    text = re.sub(r'[\[\](){}]', '', text).strip().lower()
+    return any(re.search(rf'\b{re.escape(keyword)}\b', text) for keyword in keywords)
+
+
+def random_articles(n=400, seed=11):
+    """Titles and abstracts mixing keywords, near misses, brackets, case and missing values."""
+    rng = np.random.default_rng(seed)
+    pieces = DEFAULT_KEYWORDS + ["Schistosoma", "(schistosomiasis)", "[bilharzia]", "snail", "control",
+                                 "schistosomiasisx", "preschistosome", "parasitic", "disease", "malaria",
+                                 "tuberculosis", "snail-control", "Snail Control", "japonicum's"]
+
+    def text():
+        if rng.random() < 0.1:
+            return None
+        return " ".join(rng.choice(pieces, size=rng.integers(1, 6)))
+
+    return pd.DataFrame({
+        "PMID": np.arange(1, n + 1),
+        "Title": [text() for _ in range(n)],
+        "Abstract": [text() for _ in range(n)],
+        # Missing in some chunks only, so per-chunk type inference would write "2001.0" there
+        "Year": pd.array([None if i % 97 == 0 else 1990 + i % 30 for i in range(n)], dtype="Int64"),
+    })
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_filter_selects_the_same_articles_as_the_per_keyword_search(tmp_path, workers):
+    articles = random_articles()
+    articles_path = tmp_path / "articles.csv"
+    articles.to_csv(articles_path, index=False)
+
+    relevant_path, discarded_path = tmp_path / "relevant.csv", tmp_path / "discarded.csv"
+    n_relevant, n_discarded = filter_articles_file(str(articles_path), DEFAULT_KEYWORDS, str(relevant_path),
+                                                   str(discarded_path), chunksize=37, workers=workers)
+
+    expected = articles['Title'].apply(lambda x: contains_keywords(x, DEFAULT_KEYWORDS)) | \
+        articles['Abstract'].apply(lambda x: contains_keywords(x, DEFAULT_KEYWORDS))
+    assert 0 < expected.sum() < len(articles)
+    relevant, discarded = pd.read_csv(relevant_path), pd.read_csv(discarded_path)
+    assert relevant['PMID'].tolist() == articles.loc[expected, 'PMID'].tolist()
+    assert discarded['PMID'].tolist() == articles.loc[~expected, 'PMID'].tolist()
+    assert (n_relevant, n_discarded) == (len(relevant), len(discarded))
+
+
+def test_columns_are_written_as_in_the_source(tmp_path):
+    articles_path, authors_path = tmp_path / "articles.csv", tmp_path / "authors.csv"
+    random_articles().to_csv(articles_path, index=False)
+    pd.DataFrame({"PMID": np.repeat(np.arange(1, 401), 2),
+                  "AuthorForename": ["Ana", None] * 400,
+                  "AuthorLastname": ["Lee"] * 800,
+                  "AuthorOrder": pd.array([None if i > 700 else i % 2 + 1 for i in range(800)], dtype="Int64")
+                  }).to_csv(authors_path, index=False)
+    relevant_path, discarded_path = tmp_path / "relevant.csv", tmp_path / "discarded.csv"
+    filter_articles_file(str(articles_path), DEFAULT_KEYWORDS, str(relevant_path), str(discarded_path),
+                         chunksize=37, workers=1)
+    authors_output = tmp_path / "relevant_authors.csv"
+    n_rows = generate_relevant_authors_file(str(relevant_path), str(authors_path), str(authors_output),
+                                            chunksize=50)
+
+    years = pd.concat([pd.read_csv(path, dtype=str)['Year'] for path in (relevant_path, discarded_path)])
+    assert not years.str.endswith(".0").any()
+    authors = pd.read_csv(authors_output, dtype=str)
+    assert len(authors) == n_rows == 2 * len(pd.read_csv(relevant_path))
+    assert not authors['AuthorOrder'].str.endswith(".0").any()
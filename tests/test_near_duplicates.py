@@ -0,0 +1,112 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse.csgraph import connected_components
+from scipy import sparse
+
+from near_duplicates import (SHINGLE_SIZE, duplicate_clusters, find_duplicates_file, lsh_candidate_pairs,
+                             minhash_signatures, shingle_hashes, signature_similarity)
+
+BASE = ("schistosomiasis remains a major public health problem in sub saharan africa and mass drug administration "
+        "with praziquantel is the main control strategy for school aged children in endemic districts").split()
+
+
+def variants(n=30, seed=5):
+    """Texts that share a decreasing part of BASE, so their Jaccard similarities span the whole range."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for i in range(n):
+        words = list(BASE)
+        for position in rng.choice(len(words), size=i % len(words), replace=False):
+            words[position] = f"w{i}x{position}"
+        texts.append(" ".join(words))
+    return pd.Series(texts)
+
+
+def exact_jaccard(texts, size=SHINGLE_SIZE):
+    hashes, docs = shingle_hashes(texts, size)
+    sets = [set(hashes[docs == d].tolist()) for d in range(len(texts))]
+    return {(i, j): len(sets[i] & sets[j]) / len(sets[i] | sets[j]) for i, j in combinations(range(len(texts)), 2)}
+
+
+def test_shingles_are_word_ngrams():
+    texts = pd.Series(["a b c d e f g", "a b c", "", "b c d e f"])
+    hashes, docs = shingle_hashes(texts, size=5)
+    assert np.bincount(docs, minlength=4).tolist() == [3, 0, 0, 1]
+    # "b c d e f" is the second shingle of the first text
+    assert hashes[docs == 3][0] == hashes[docs == 0][1]
+
+
+def test_signature_similarity_estimates_jaccard():
+    texts = variants()
+    signatures = minhash_signatures(texts)
+    jaccard = exact_jaccard(texts)
+    first, second = np.array(list(jaccard)).T
+    estimate = signature_similarity(signatures, first, second)
+    errors = np.abs(estimate - np.array(list(jaccard.values())))
+    # 128 permutations: standard error at most 0.045
+    assert errors.max() < 0.2
+    assert errors.mean() < 0.05
+
+
+def test_lsh_finds_every_similar_pair():
+    texts = variants()
+    signatures = minhash_signatures(texts)
+    first, second = lsh_candidate_pairs(signatures)
+    assert np.all(first < second)
+    candidates = set(zip(first.tolist(), second.tolist()))
+    similar = {pair for pair, value in exact_jaccard(texts).items() if value >= 0.9}
+    assert similar and similar <= candidates
+
+
+def test_clusters_are_components_of_similar_pairs():
+    texts = variants()
+    signatures = minhash_signatures(texts)
+    pmids = np.arange(1000, 1000 + len(texts))
+    clusters = duplicate_clusters(pmids, signatures, threshold=0.8)
+
+    # Brute force over all pairs instead of LSH candidates
+    pairs = [(i, j) for i, j in combinations(range(len(texts)), 2)
+             if signature_similarity(signatures, np.array([i]), np.array([j]))[0] >= 0.8]
+    graph = sparse.csr_matrix((np.ones(len(pairs)), tuple(np.array(pairs).T)), shape=(len(texts), len(texts)))
+    _, labels = connected_components(graph, directed=False)
+    expected = {frozenset(pmids[labels == label].tolist()) for label in np.unique(labels)
+                if (labels == label).sum() > 1}
+    found = {frozenset(group["PMID"].tolist()) for _, group in clusters.groupby("ClusterID")}
+    assert found == expected
+    assert (clusters.groupby("ClusterID")["PMID"].min() == clusters.groupby("ClusterID")["CanonicalPMID"].first()).all()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_title_only_records_are_not_clustered(tmp_path, workers):
+    abstract = " ".join(BASE)
+    articles = pd.DataFrame({
+        "PMID": [1, 2, 3, 4, 5, 6],
+        "Year": [2001, 2002, 2003, 2003, 2004, 2004],
+        "Title": ["Praziquantel coverage", "Praziquantel coverage.", "Snail ecology", "Erratum", "Erratum",
+                  "Erratum to a study of snail control in lakes"],
+        "Abstract": [abstract, abstract + ".", "Oncomelania snails were sampled along the Yangtze river banks.",
+                     None, None, None],
+    })
+    articles_path, clusters_path, unique_path = (str(tmp_path / name) for name in
+                                                 ("articles.csv", "clusters.csv", "unique.csv"))
+    articles.to_csv(articles_path, index=False)
+    assert find_duplicates_file(articles_path, clusters_path, unique_path, chunksize=2, workers=workers) == (1, 1)
+    assert pd.read_csv(clusters_path)["PMID"].tolist() == [1, 2]
+    assert pd.read_csv(unique_path)["PMID"].tolist() == [1, 3, 4, 5, 6]
+
+
+def test_near_duplicates_behind_a_boilerplate_bucket_head_are_paired():
+    # B and C differ in one value of every band but the first, which they share with the boilerplate text A
+    rng = np.random.default_rng(0)
+    signatures = rng.integers(0, 2 ** 63, size=(3, 128), dtype=np.uint64)
+    signatures[2] = signatures[1]
+    signatures[2, 8::8] += np.uint64(1)
+    signatures[0, :8] = signatures[1, :8]
+
+    first, second = lsh_candidate_pairs(signatures)
+    assert set(zip(first.tolist(), second.tolist())) == {(0, 1), (0, 2), (1, 2)}
+    clusters = duplicate_clusters(np.array([10, 11, 12]), signatures)
+    assert clusters["PMID"].tolist() == [11, 12]
@@ -0,0 +1,57 @@
+import importlib
+import sys
+
+from pipeline import Stage, code_digest, run_pipeline
+
+STAGE_MODULE = '''
+from {helper_module} import transform
+
+
+def copy_stage(source_path, target_path):
+    with open(source_path) as source, open(target_path, "w") as target:
+        target.write(transform(source.read()))
+'''
+
+HELPER_MODULE = '''
+def transform(text):
+    return text.{method}()
+'''
+
+
+def write_modules(directory, method):
+    (directory / "stage_helpers.py").write_text(HELPER_MODULE.format(method=method))
+    (directory / "stage_module.py").write_text(STAGE_MODULE.format(helper_module="stage_helpers"))
+
+
+def load_stage(directory, monkeypatch):
+    monkeypatch.syspath_prepend(str(directory))
+    for name in ("stage_helpers", "stage_module"):
+        sys.modules.pop(name, None)
+    importlib.invalidate_caches()
+    return importlib.import_module("stage_module").copy_stage
+
+
+def test_editing_called_project_code_reruns_the_stage(tmp_path, monkeypatch):
+    source, target, state = tmp_path / "in.txt", tmp_path / "out.txt", tmp_path / "state.json"
+    source.write_text("Schistosoma")
+    write_modules(tmp_path, "upper")
+
+    def stages(func):
+        return [Stage("copy", func, inputs={"source_path": str(source)}, outputs={"target_path": str(target)})]
+
+    func = load_stage(tmp_path, monkeypatch)
+    digest = code_digest(func)
+    assert run_pipeline(stages(func), state_path=str(state)) == ["copy"]
+    assert run_pipeline(stages(func), state_path=str(state)) == []
+
+    write_modules(tmp_path, "lower")
+    changed = load_stage(tmp_path, monkeypatch)
+    assert code_digest(changed) != digest
+    assert run_pipeline(stages(changed), state_path=str(state)) == ["copy"]
+    assert target.read_text() == "schistosoma"
+
+
+def test_code_digest_is_stable_and_skips_builtins():
+    from prepare_stages import enrich_articles
+    assert code_digest(enrich_articles) == code_digest(enrich_articles)
+    assert code_digest(len) == ""
@@ -0,0 +1,191 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+import query_server
+from query_server import LRUCache, QueryEngine, ego_network
+
+# (PMID, Year, Field, authors); IDs follow the order of first appearance: Ana 0, Bo 1, Cy 2, Dee 3, Eli 4, Gus 5, Ivy 6
+PAPERS = [(1, 2001, "Immunology", ["Ana Lee", "Bo Chen", "Cy Diaz"]),
+          (2, 2002, "Immunology", ["Ana Lee", "Bo Chen"]),
+          (3, 2002, "Parasitology", ["Bo Chen", "Dee Evans"]),
+          (4, 2003, "Parasitology", ["Dee Evans", "Eli Fox"]),
+          (5, 2003, "Parasitology", ["Eli Fox", "Gus Hill"]),
+          (6, 2003, "Immunology", ["Ivy Jones"]),
+          (7, None, "Immunology", ["Ana Lee"])]
+SJR = {1: 1.0, 2: 2.0, 3: 0.5, 4: 0.7, 5: 0.9, 6: 3.0, 7: 1.5}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # The engine keeps its author index and table caches under data/
+    monkeypatch.chdir(tmp_path)
+    rows = [(pmid, field, *name.split(), name[0], SJR[pmid]) for pmid, _, field, names in PAPERS for name in names]
+    pd.DataFrame(rows, columns=["PMID", "Field", "AuthorForename", "AuthorLastname", "AuthorInitials", "SJR"]) \
+        .to_csv("authors.csv", index=False)
+    pd.DataFrame([(pmid, year, field) for pmid, year, field, _ in PAPERS], columns=["PMID", "Year", "Field"]) \
+        .astype({"Year": "Int64"}).to_csv("articles.csv", index=False)
+    pd.DataFrame({"Year": [2001, 2002, 2003], "Count": [1000, 2000, 0]}).to_csv("paper_counts.csv", index=False)
+    engine = QueryEngine("authors.csv", "articles.csv", "paper_counts.csv", cache_size=8, workers=1)
+    yield engine
+    engine.close()
+
+
+def field_graph(field):
+    G = nx.Graph()
+    for _, _, paper_field, names in PAPERS:
+        if paper_field == field:
+            G.add_edges_from((a, b) for i, a in enumerate(names) for b in names[i + 1:])
+    return G
+
+
+def query(engine, path, **params):
+    return asyncio.run(engine.query(path, {key: str(value) for key, value in params.items()}))
+
+
+def scores_by_name(result):
+    return {author["name"]: author["score"] for author in result["authors"]}
+
+
+@pytest.mark.parametrize("field", ["Immunology", "Parasitology"])
+def test_top_cheap_metrics(engine, field):
+    G = field_graph(field)
+    status, result = query(engine, "/top", field=field, metric="degree", k=10)
+    assert status == 200
+    assert scores_by_name(result) == pytest.approx(nx.degree_centrality(G))
+    assert [author["score"] for author in result["authors"]] == sorted(scores_by_name(result).values(), reverse=True)
+
+    _, result = query(engine, "/top", field=field, metric="papers", k=2)
+    assert len(result["authors"]) == 2
+    _, result = query(engine, "/top", field=field, metric="strength")
+    expected = {"Immunology": {"Ana Lee": 3, "Bo Chen": 3, "Cy Diaz": 2},
+                "Parasitology": {"Bo Chen": 1, "Dee Evans": 2, "Eli Fox": 2, "Gus Hill": 1}}[field]
+    assert scores_by_name(result) == expected
+
+
+def test_top_betweenness_runs_in_the_worker_pool(engine):
+    engine.start_pool()
+    status, result = query(engine, "/top", field="Parasitology", metric="betweenness", k=10)
+    assert status == 200
+    expected = nx.betweenness_centrality(field_graph("Parasitology"), endpoints=False)
+    assert scores_by_name(result) == pytest.approx(expected)
+
+
+def test_ego_depth_and_truncation(engine, monkeypatch):
+    engine.start_pool()
+    _, result = query(engine, "/ego", id=0, depth=1)
+    assert {node["name"]: node["distance"] for node in result["nodes"]} == {"Ana Lee": 0, "Bo Chen": 1, "Cy Diaz": 1}
+    assert sorted(map(tuple, result["edges"])) == [(0, 1, 2), (0, 2, 1), (1, 2, 1)]
+    assert not result["truncated"]
+
+    _, result = query(engine, "/ego", id=0, depth=3)
+    assert [node["distance"] for node in result["nodes"]] == [0, 1, 1, 2, 3]
+    assert [node["id"] for node in result["nodes"]][3:] == [3, 4]
+
+    monkeypatch.setattr(query_server, "MAX_EGO_NODES", 3)
+    _, result = query(engine, "/ego", id=3, depth=2)
+    assert result["truncated"]
+    assert [node["distance"] for node in result["nodes"]] == [0, 1, 1]
+    assert all(a in {1, 3, 4} and b in {1, 3, 4} for a, b, _ in result["edges"])
+
+    nodes, distance, _, truncated = ego_network(engine.adjacency, 0, 2, max_nodes=2)
+    assert truncated and distance.tolist() == [0, 1]
+
+
+def test_author_by_id_and_name(engine):
+    status, by_id = query(engine, "/author", id=0)
+    assert status == 200
+    assert by_id["name"] == "Ana Lee"
+    assert by_id["papers"] == 3 and by_id["fields"] == {"Immunology": 3}
+    assert (by_id["first_year"], by_id["last_year"]) == (2001, 2002)
+    assert by_id["mean_sjr"] == pytest.approx(1.5)
+    assert by_id["coauthors"] == 2
+    assert by_id["top_coauthors"][0] == {"id": 1, "name": "Bo Chen", "joint_papers": 2}
+    assert query(engine, "/author", name="ana LEE") == (200, by_id)
+
+
+def test_yearly_counts_per_pubmed_total(engine):
+    _, result = query(engine, "/yearly")
+    assert result["years"] == [
+        {"year": 2001, "count": 1, "pubmed_total": 1000, "per_10000": 10.0},
+        {"year": 2002, "count": 2, "pubmed_total": 2000, "per_10000": 10.0},
+        {"year": 2003, "count": 3, "pubmed_total": 0, "per_10000": None}]
+    _, result = query(engine, "/yearly", field="Parasitology")
+    assert [(year["year"], year["count"]) for year in result["years"]] == [(2001, 0), (2002, 1), (2003, 2)]
+
+
+@pytest.mark.parametrize("path, params, status", [
+    ("/missing", {}, 404),
+    ("/top", {"field": "Virology"}, 404),
+    ("/top", {"field": "Immunology", "k": 0}, 400),
+    ("/top", {"field": "Immunology", "metric": "closeness"}, 400),
+    ("/ego", {"id": 0, "depth": 4}, 400),
+    ("/ego", {"id": 0, "depth": 0}, 400),
+    ("/ego", {}, 400),
+    ("/author", {"id": "abc"}, 400),
+    ("/author", {"id": 99}, 404),
+    ("/author", {"name": "Nobody Here"}, 404),
+    ("/yearly", {"field": "Virology"}, 404),
+])
+def test_errors(engine, path, params, status):
+    code, body = query(engine, path, **params)
+    assert code == status
+    assert "error" in body
+    assert len(engine.cache.entries) == 0
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_results_are_cached_and_evicted(engine):
+    engine.cache = LRUCache(maxsize=2)
+    for author_id in (0, 1, 2):
+        query(engine, "/author", id=author_id)
+    assert len(engine.cache.entries) == 2
+    query(engine, "/author", id=2)
+    query(engine, "/author", id=0)
+    _, stats = query(engine, "/stats")
+    assert (stats["cached"], stats["hits"], stats["misses"]) == (2, 1, 4)
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool that counts the heavy computations submitted to it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_identical_heavy_queries_share_one_computation(engine):
+    engine.pool = CountingExecutor(max_workers=2, initializer=query_server._init_worker,
+                                   initargs=(engine.adjacency, engine.field_graphs))
+    top = {"field": "Parasitology", "metric": "betweenness"}
+    ego = {"id": "0", "depth": "2"}
+
+    async def run():
+        return await asyncio.gather(*[engine.query("/top", top) for _ in range(3)],
+                                    *[engine.query("/ego", ego) for _ in range(3)])
+
+    results = asyncio.run(run())
+    assert engine.pool.submitted == 2
+    assert all(result == results[0] for result in results[:3]) and all(result == results[3] for result in results[3:])
+    assert engine.pending == {}
+    # Answered from the cache afterwards
+    asyncio.run(run())
+    assert engine.pool.submitted == 2
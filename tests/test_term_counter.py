@@ -0,0 +1,68 @@
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from term_counter import DEFAULT_STOPWORDS, count_terms_file, top_terms, top_terms_by_group
+
+VOCABULARY = ["schistosomiasis", "praziquantel", "snail", "control", "mansoni", "the", "and", "of", "china",
+              "egg", "liver", "fibrosis", "children", "school", "treatment", "Schistosoma", "(japonicum)", "oncomelania"]
+
+
+def reference_terms(text):
+    """Unigrams and within-text bigrams of the kept words, counted with the same rules as the original script."""
+    words = [word for word in re.findall(r'\b\w+\b', text.lower()) if word not in DEFAULT_STOPWORDS and len(word) > 3]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+@pytest.fixture
+def articles(tmp_path):
+    rng = np.random.default_rng(4)
+    n = 300
+
+    def text():
+        return None if rng.random() < 0.1 else " ".join(rng.choice(VOCABULARY, size=rng.integers(1, 12)))
+
+    df = pd.DataFrame({"Title": [text() for _ in range(n)], "Abstract": [text() for _ in range(n)],
+                       "Year": rng.integers(2000, 2005, n).astype(float),
+                       "Field": rng.choice(["Immunology", "Parasitology", None], n)})
+    df.loc[::13, "Year"] = np.nan
+    path = tmp_path / "articles.csv"
+    df.to_csv(path, index=False)
+    return str(path), pd.read_csv(path)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_counts_match_a_plain_counter(articles, workers):
+    path, df = articles
+    counts = count_terms_file(path, group_by=("Year", "Field"), ngrams=(1, 2), chunksize=17, workers=workers)
+
+    expected_total = Counter()
+    expected_groups = {"Year": {}, "Field": {}}
+    for _, row in df.iterrows():
+        row_counts = Counter()
+        for text in (row["Title"], row["Abstract"]):
+            if isinstance(text, str):
+                row_counts.update(reference_terms(text))
+        expected_total.update(row_counts)
+        for column in ("Year", "Field"):
+            if not pd.isna(row[column]):
+                expected_groups[column].setdefault(row[column], Counter()).update(row_counts)
+
+    assert counts.total == expected_total
+    assert any(" " in term for term in counts.total)
+    assert counts.groups == expected_groups
+
+
+def test_top_terms_break_ties_alphabetically(articles):
+    path, _ = articles
+    runs = [count_terms_file(path, group_by=("Field",), ngrams=(1, 2), chunksize=7, workers=workers)
+            for workers in (1, 2, 2)]
+    tops = [top_terms(counts.total, k=40) for counts in runs]
+    for top in tops[1:]:
+        pd.testing.assert_frame_equal(top, tops[0])
+    pd.testing.assert_frame_equal(top_terms_by_group(runs[0], "Field"), top_terms_by_group(runs[1], "Field"))
+
+    assert top_terms(Counter({"b": 2, "c": 3, "a": 2, "d": 1}), k=3).values.tolist() == [["c", 3], ["a", 2], ["b", 2]]
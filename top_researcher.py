@@ -1,121 +1,157 @@
 import os
+import numpy as np
 import pandas as pd
 import networkx as nx
-import plotly.graph_objects as go
 
-# Create 'output' folder if it doesn't exist
+from author_index import attach_author_ids, author_names
+from centrality import add_distance_weights, sparse_centrality
+from centrality import betweenness_centrality as compute_betweenness
+from coauthor_graph import build_coauthor_adjacency, to_networkx
+from communities import community_summary, louvain
+from data_cache import load_table
+from instrumentation import stage
+from incremental_graph import (add_papers, centrality_frame, empty_state, load_graph_state, save_graph_state,
+                               state_adjacency, update_betweenness)
+from network_layout import cached_layout, level_of_detail, network_figure
+
 output_folder = "output"
-os.makedirs(output_folder, exist_ok=True)
-
-# Load the author dataset
-authors_path = "data/relevant_authors_with_field.csv"
-authors_df = pd.read_csv(authors_path)
-
-# Ensure necessary columns exist
-required_columns = ["PMID", "Field", "AuthorForename", "AuthorLastname"]
-if not all(col in authors_df.columns for col in required_columns):
-    raise KeyError(f"Missing one or more required columns: {required_columns}")
-
-# Create a full name column for authors
-authors_df["FullName"] = authors_df["AuthorForename"] + " " + authors_df["AuthorLastname"]
-
-# Build the co-authorship network
-G = nx.Graph()
-
-# Group by fields and construct networks
-for pmid, group in authors_df.groupby("PMID"):
-    authors = group["FullName"].tolist()
-    for i, author1 in enumerate(authors):
-        for author2 in authors[i + 1:]:
-            if G.has_edge(author1, author2):
-                G[author1][author2]["weight"] += 1
-            else:
-                G.add_edge(author1, author2, weight=1)
-
-# Calculate centrality metrics
-betweenness_centrality = nx.betweenness_centrality(G, weight="weight", endpoints=True)
-degree_centrality = nx.degree_centrality(G)
-
-# Save centrality metrics as a CSV file
-metrics_df = pd.DataFrame({
-    "Author": list(degree_centrality.keys()),
-    "Degree Centrality": list(degree_centrality.values()),
-    "Betweenness Centrality": list(betweenness_centrality.values())
-})
-metrics_output_path = os.path.join(output_folder, "author_centrality_metrics.csv")
-metrics_df.to_csv(metrics_output_path, index=False)
-print(f"Centrality metrics saved to: {metrics_output_path}")
-
-# Prepare data for visualization
-pos = nx.spring_layout(G, k=0.15, seed=42)
-node_x = []
-node_y = []
-node_size = []
-node_color = []
-node_text = []
-edge_x = []
-edge_y = []
-
-for node in G.nodes:
-    x, y = pos[node]
-    node_x.append(x)
-    node_y.append(y)
-    node_size.append(degree_centrality[node] * 1000)  # Scale for visibility
-    node_color.append(betweenness_centrality[node])
-    node_text.append(f"{node}<br>Degree Centrality: {degree_centrality[node]:.4f}<br>"
-                     f"Betweenness Centrality: {betweenness_centrality[node]:.4f}")
-
-for edge in G.edges(data=True):
-    x0, y0 = pos[edge[0]]
-    x1, y1 = pos[edge[1]]
-    edge_x.append(x0)
-    edge_y.append(y0)
-    edge_x.append(x1)
-    edge_y.append(y1)
-    edge_x.append(None)  # Line breaks for edges
-
-# Create the Plotly visualization
-edge_trace = go.Scatter(
-    x=edge_x,
-    y=edge_y,
-    line=dict(width=0.5, color="gray"),
-    hoverinfo="none",
-    mode="lines"
-)
-
-node_trace = go.Scatter(
-    x=node_x,
-    y=node_y,
-    mode="markers",
-    hoverinfo="text",
-    marker=dict(
-        showscale=True,
-        colorscale="Viridis",
-        color=node_color,
-        size=node_size,
-        colorbar=dict(
-            thickness=15,
-            title="Betweenness Centrality",
-            xanchor="left",
-            titleside="right"
-        )
-    ),
-    text=node_text
-)
-
-# Create layout and display the graph
-fig = go.Figure(data=[edge_trace, node_trace],
-                layout=go.Layout(
-                    title="Interactive Author Activity Network",
-                    titlefont_size=16,
-                    showlegend=False,
-                    hovermode="closest",
-                    margin=dict(b=0, l=0, r=0, t=40),
-                    xaxis=dict(showgrid=False, zeroline=False),
-                    yaxis=dict(showgrid=False, zeroline=False)
-                ))
-
-# Save the interactive visualization as an HTML file
-visualization_output_path = os.path.join(output_folder, "author_network_visualization.html")
-fig.write_html(visualization_output_path)
-print(f"Interactive visualization saved to: {visualization_output_path}")
\ No newline at end of file
+
+# Betweenness centrality settings: leave both unset for the exact scores, or set a
+# number of sampled pivots or a target error of the normalized scores to approximate
+BETWEENNESS_SAMPLE_SIZE = None
+BETWEENNESS_EPSILON = None
+# Number of worker processes for betweenness (None uses every core)
+BETWEENNESS_WORKERS = None
+
+# Append mode: keep the graph and metrics in GRAPH_STATE_DIR and only apply papers not seen before.
+# Betweenness is then exact and recomputed only for the connected components that changed.
+INCREMENTAL = False
+GRAPH_STATE_DIR = "data/graph_state"
+
+# Level of detail of the interactive network: draw only the PLOT_TOP_N authors with the highest
+# betweenness, only the PLOT_K_CORE core and only edges with at least PLOT_MIN_EDGE_WEIGHT joint papers
+PLOT_TOP_N = None
+PLOT_K_CORE = None
+PLOT_MIN_EDGE_WEIGHT = 1
+
+# Community detection on the weighted co-authorship graph: a Louvain-style modularity method whose
+# partition only depends on the seed. Higher resolutions give smaller communities.
+DETECT_COMMUNITIES = True
+COMMUNITY_RESOLUTION = 1.0
+COMMUNITY_SEED = 42
+# Color the interactive network by community instead of betweenness centrality
+COLOR_BY_COMMUNITY = False
+
+
+def main():
+    # Create 'output' folder if it doesn't exist
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Load the author dataset
+    authors_path = "data/relevant_authors_with_field.csv"
+    required_columns = ["PMID", "Field", "AuthorForename", "AuthorLastname"]
+    with stage("load") as record:
+        authors_df = load_table(authors_path, columns=required_columns + ["AuthorInitials", "SJR"])
+        record["rows"] = len(authors_df)
+
+    # Ensure necessary columns exist
+    if not all(col in authors_df.columns for col in required_columns):
+        raise KeyError(f"Missing one or more required columns: {required_columns}")
+
+    # Key authors by their integer ID; names are only looked up for the outputs
+    author_index = attach_author_ids(authors_df)
+
+    if INCREMENTAL:
+        # Add the new papers' author pairs to the persisted graph and update the metrics where it changed
+        with stage("build_graph", rows=len(authors_df)):
+            state = load_graph_state(GRAPH_STATE_DIR) or empty_state()
+            n_new = add_papers(state, authors_df)
+        with stage("centrality") as record:
+            n_updated = update_betweenness(state, workers=BETWEENNESS_WORKERS)
+            record["nodes"] = n_updated
+        save_graph_state(state, GRAPH_STATE_DIR)
+        print(f"Added {n_new} new papers, recomputed betweenness for {n_updated} authors")
+
+        adjacency, author_ids = state_adjacency(state)
+        metrics = centrality_frame(state)
+        degree_centrality = dict(zip(metrics["AuthorID"].tolist(), metrics["Degree Centrality"]))
+        betweenness_centrality = dict(zip(metrics["AuthorID"].tolist(), metrics["Betweenness Centrality"]))
+    else:
+        # Build the co-authorship network from a sparse PMID x author incidence matrix
+        with stage("build_graph", rows=len(authors_df)) as record:
+            adjacency, author_ids = build_coauthor_adjacency(authors_df, name_column="AuthorID")
+            G = to_networkx(adjacency, author_ids)
+            record.update(nodes=adjacency.shape[0], edges=adjacency.nnz // 2)
+
+        # Calculate centrality metrics
+        with stage("centrality", nodes=adjacency.shape[0], edges=adjacency.nnz // 2):
+            # Co-authorship counts are strengths, so shortest paths run over their inverse
+            distance = add_distance_weights(G)
+            betweenness_centrality = compute_betweenness(G, k=BETWEENNESS_SAMPLE_SIZE, epsilon=BETWEENNESS_EPSILON,
+                                                         weight=distance, endpoints=True,
+                                                         workers=BETWEENNESS_WORKERS)
+            degree_centrality = nx.degree_centrality(G)
+
+    # Weighted strength, PageRank, eigenvector and Katz centrality by sparse power iteration
+    with stage("sparse_centrality", nodes=adjacency.shape[0], edges=adjacency.nnz // 2):
+        weighted_centrality = sparse_centrality(adjacency, author_ids).reindex(list(degree_centrality.keys()))
+
+    # Save centrality metrics as a CSV file
+    metrics_df = pd.DataFrame({
+        "Author": author_names(list(degree_centrality.keys()), author_index),
+        "Degree Centrality": list(degree_centrality.values()),
+        "Betweenness Centrality": list(betweenness_centrality.values()),
+        **{column: values.to_numpy() for column, values in weighted_centrality.items()}
+    })
+    metrics_output_path = os.path.join(output_folder, "author_centrality_metrics.csv")
+    metrics_df.to_csv(metrics_output_path, index=False)
+    print(f"Centrality metrics saved to: {metrics_output_path}")
+
+    # Keep only the part of the network worth drawing, then lay it out (cached by graph hash)
+    degree = np.array([degree_centrality[node] for node in author_ids.tolist()])
+    betweenness = np.array([betweenness_centrality[node] for node in author_ids.tolist()])
+
+    if DETECT_COMMUNITIES or COLOR_BY_COMMUNITY:
+        with stage("communities", nodes=adjacency.shape[0], edges=adjacency.nnz // 2):
+            community = louvain(adjacency, resolution=COMMUNITY_RESOLUTION, seed=COMMUNITY_SEED)
+
+        # Save every author's community and a summary per community
+        all_names = author_names(author_ids, author_index)
+        communities_output_path = os.path.join(output_folder, "author_communities.csv")
+        pd.DataFrame({"AuthorID": author_ids, "Author": all_names, "Community": community}) \
+            .to_csv(communities_output_path, index=False)
+        summary_df = community_summary(community, author_ids, betweenness, all_names, authors_df)
+        summary_output_path = os.path.join(output_folder, "community_summary.csv")
+        summary_df.to_csv(summary_output_path, index=False)
+        print(f"{len(summary_df)} communities saved to: {communities_output_path} and {summary_output_path}")
+    with stage("layout") as record:
+        plot_adjacency, kept = level_of_detail(adjacency, scores=betweenness, top_n=PLOT_TOP_N, k_core=PLOT_K_CORE,
+                                               min_edge_weight=PLOT_MIN_EDGE_WEIGHT)
+        pos = cached_layout(plot_adjacency, author_ids[kept])
+        record.update(nodes=plot_adjacency.shape[0], edges=plot_adjacency.nnz // 2)
+
+    names = author_names(author_ids[kept], author_index)
+    node_text = [f"{name}<br>Degree Centrality: {d:.4f}<br>Betweenness Centrality: {b:.4f}"
+                 for name, d, b in zip(names, degree[kept], betweenness[kept])]
+    if COLOR_BY_COMMUNITY:
+        node_text = [f"{text}<br>Community: {c}" for text, c in zip(node_text, community[kept])]
+
+    with stage("render", nodes=plot_adjacency.shape[0], edges=plot_adjacency.nnz // 2):
+        # Create the Plotly visualization with WebGL traces
+        fig = network_figure(plot_adjacency, pos,
+                             node_size=degree[kept] * 1000,  # Scale for visibility
+                             node_color=community[kept] if COLOR_BY_COMMUNITY else betweenness[kept],
+                             node_text=node_text,
+                             title="Interactive Author Activity Network",
+                             colorscale="Turbo" if COLOR_BY_COMMUNITY else "Viridis",
+                             colorbar_title="Community" if COLOR_BY_COMMUNITY else "Betweenness Centrality")
+
+        # Save the interactive visualization as an HTML file
+        visualization_output_path = os.path.join(output_folder, "author_network_visualization.html")
+        fig.write_html(visualization_output_path)
+    print(f"Interactive visualization saved to: {visualization_output_path}")
+
+
+# The betweenness worker pool re-imports this module, so only run the analysis as a script
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,105 @@
 import pandas as pd
 import networkx as nx
 import os
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 
-# Load data
+from author_index import attach_author_ids, author_names
+from centrality import sparse_centrality
+from coauthor_graph import build_field_adjacencies, to_networkx
+from data_cache import load_table
+from instrumentation import add_records, run_traced, stage
+from incremental_graph import add_papers, centrality_frame, empty_state, load_graph_state, save_graph_state, \
+    state_adjacency, update_betweenness
+
+# Input data and output directory
 authors_with_field_path = 'data/relevant_authors_with_field.csv'
-authors_df = pd.read_csv(authors_with_field_path)
+output_dir = "output"
 
-# Ensure necessary columns exist
-required_columns = ["PMID", "Field", "AuthorForename", "AuthorLastname"]
-if not all(col in authors_df.columns for col in required_columns):
-    raise KeyError(f"Missing one or more required columns: {required_columns}")
+# Number of fields analyzed at once (None uses every core)
+FIELD_WORKERS = None
 
-# Create output directory
-output_dir = "output"
-os.makedirs(output_dir, exist_ok=True)
-
-# Group articles by fields
-fields = authors_df["Field"].unique()
-
-# Initialize a dictionary to store metrics for each field
-field_scholar_metrics = {}
-
-# Process each field
-for field in fields:
-    # Filter authors for the current field
-    field_authors = authors_df[authors_df["Field"] == field]
-
-    # Build a co-authorship network
-    G = nx.Graph()
-    for pmid, group in field_authors.groupby("PMID"):
-        authors = group["AuthorForename"] + " " + group["AuthorLastname"]
-        authors = authors.tolist()
-        for i, author1 in enumerate(authors):
-            for author2 in authors[i + 1:]:
-                if G.has_edge(author1, author2):
-                    G[author1][author2]["weight"] += 1
-                else:
-                    G.add_edge(author1, author2, weight=1)
+# Append mode: keep each field's graph and metrics under GRAPH_STATE_DIR and only apply papers not seen
+# before, recomputing betweenness only for the connected components that changed
+INCREMENTAL = False
+GRAPH_STATE_DIR = "data/graph_state/fields"
+
+
+def field_slug(field):
+    """File name prefix of a field's outputs."""
+    return field.replace(' ', '_').lower()
+
+
+def analyze_field(field, adjacency, author_ids, names):
+    """
+    Compute the centrality metrics of one field and render its top-10 chart.
+
+    Runs in a worker process, so every field is analyzed concurrently. The
+    graph is keyed by integer author IDs; `names` holds their display names.
+    """
+    G = to_networkx(adjacency, author_ids)
+    display_names = dict(zip(author_ids.tolist(), names))
 
     # Calculate centrality metrics
-    degree_centrality = nx.degree_centrality(G)
-    betweenness_centrality = nx.betweenness_centrality(G)
+    with stage(f"centrality:{field}", nodes=adjacency.shape[0], edges=adjacency.nnz // 2):
+        degree_centrality = nx.degree_centrality(G)
+        betweenness_centrality = nx.betweenness_centrality(G)
+        # Weighted strength, PageRank, eigenvector and Katz centrality by sparse power iteration
+        weighted_centrality = sparse_centrality(adjacency, author_ids).reindex(list(degree_centrality.keys()))
 
     # Store metrics in a DataFrame
     metrics_df = pd.DataFrame({
-        "Author": list(degree_centrality.keys()),
+        "Author": [display_names[author] for author in degree_centrality],
         "Degree Centrality": list(degree_centrality.values()),
-        "Betweenness Centrality": list(betweenness_centrality.values())
+        "Betweenness Centrality": list(betweenness_centrality.values()),
+        **{column: values.to_numpy() for column, values in weighted_centrality.items()}
+    })
+    with stage(f"render:{field}", rows=len(metrics_df)):
+        return save_field_outputs(field, metrics_df)
+
+
+def analyze_field_incremental(field, field_authors, display_names):
+    """
+    Apply a field's new papers to its persisted graph and render its top-10 chart.
+
+    Runs in a worker process. `display_names` holds the display name of every
+    author ID.
+    """
+    state_dir = os.path.join(GRAPH_STATE_DIR, field_slug(field))
+    state = load_graph_state(state_dir) or empty_state()
+    with stage(f"build_graph:{field}", rows=len(field_authors)):
+        n_new = add_papers(state, field_authors)
+    with stage(f"centrality:{field}") as record:
+        # Same unweighted betweenness without endpoints as the full analysis
+        n_updated = update_betweenness(state, weighted=False, endpoints=False, workers=1)
+        record["nodes"] = n_updated
+        # Strength, PageRank, eigenvector and Katz centrality are cheap enough to recompute on the whole graph
+        weighted_centrality = sparse_centrality(*state_adjacency(state))
+    save_graph_state(state, state_dir)
+    print(f"{field}: added {n_new} new papers, recomputed betweenness for {n_updated} authors")
+
+    metrics = centrality_frame(state, endpoints=False)
+    metrics_df = pd.DataFrame({
+        "Author": display_names[metrics["AuthorID"].to_numpy()],
+        "Degree Centrality": metrics["Degree Centrality"].to_numpy(),
+        "Betweenness Centrality": metrics["Betweenness Centrality"].to_numpy(),
+        **{column: values.to_numpy() for column, values in weighted_centrality.items()}
     })
+    with stage(f"render:{field}", rows=len(metrics_df)):
+        return save_field_outputs(field, metrics_df)
 
+
+def save_field_outputs(field, metrics_df):
+    """Rank a field's scholars, save their metrics and render the top-10 chart."""
     # Rank scholars by degree centrality
     metrics_df.sort_values(by="Degree Centrality", ascending=False, inplace=True)
 
     # Save the metrics for the current field
-    metrics_output_path = os.path.join(output_dir, f"{field.replace(' ', '_').lower()}_scholar_metrics.csv")
+    metrics_output_path = os.path.join(output_dir, f"{field_slug(field)}_scholar_metrics.csv")
     metrics_df.to_csv(metrics_output_path, index=False)
     print(f"Metrics for {field} saved to: {metrics_output_path}")
 
-    # Store for tabular summary
-    field_scholar_metrics[field] = metrics_df
-
     # Visualize the top 10 scholars in this field
     top_authors = metrics_df.head(10)
     fig, ax1 = plt.subplots(figsize=(10, 6))
@@ -90,14 +128,66 @@ for field in fields:
     plt.legend(loc="upper left")
 
     # Save visualization
-    visualization_output_path = os.path.join(output_dir, f"{field.replace(' ', '_').lower()}_centrality_chart.png")
+    visualization_output_path = os.path.join(output_dir, f"{field_slug(field)}_centrality_chart.png")
     plt.savefig(visualization_output_path, dpi=300)
     plt.close()
     print(f"Visualization for {field} saved to: {visualization_output_path}")
 
-# Combine summaries for all fields
-summary_df = pd.concat(field_scholar_metrics, names=["Field"])
-summary_output_path = os.path.join(output_dir, "scholar_summary_by_field.csv")
-summary_df.to_csv(summary_output_path, index=False)
-
-print(f"Summary of top scholars by field saved to: {summary_output_path}")
\ No newline at end of file
+    return metrics_df
+
+
+def main():
+    # Load data
+    required_columns = ["PMID", "Field", "AuthorForename", "AuthorLastname"]
+    with stage("load") as record:
+        authors_df = load_table(authors_with_field_path, columns=required_columns + ["AuthorInitials"])
+        record["rows"] = len(authors_df)
+
+    # Ensure necessary columns exist
+    if not all(col in authors_df.columns for col in required_columns):
+        raise KeyError(f"Missing one or more required columns: {required_columns}")
+
+    # Create output directory
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Key authors by their integer ID; names are only looked up for the outputs
+    author_index = attach_author_ids(authors_df)
+
+    if INCREMENTAL:
+        # Each worker applies its field's new papers to the persisted field graph
+        display_names = author_index["DisplayName"].to_numpy()
+        field_rows = {field: rows[["PMID", "AuthorID"]]
+                      for field, rows in authors_df.groupby("Field", sort=False, observed=True)}
+        jobs = {field: (analyze_field_incremental, field, rows, display_names) for field, rows in field_rows.items()}
+        sizes = {field: len(rows) for field, rows in field_rows.items()}
+    else:
+        # Build every field's co-authorship network from one global incidence matrix
+        with stage("build_graph", rows=len(authors_df)) as record:
+            field_graphs = build_field_adjacencies(authors_df, field_column="Field", name_column="AuthorID")
+            record["edges"] = sum(adjacency.nnz // 2 for adjacency, _ in field_graphs.values())
+        jobs = {field: (analyze_field, field, adjacency, author_ids, author_names(author_ids, author_index))
+                for field, (adjacency, author_ids) in field_graphs.items()}
+        sizes = {field: adjacency.nnz for field, (adjacency, _) in field_graphs.items()}
+
+    # Analyze all fields concurrently, largest first so the slowest field starts right away
+    with stage("analyze_fields"), ProcessPoolExecutor(max_workers=FIELD_WORKERS) as executor:
+        # Workers return the stages they traced alongside their metrics
+        futures = {field: executor.submit(run_traced, *jobs[field])
+                   for field in sorted(jobs, key=sizes.get, reverse=True)}
+        # Initialize a dictionary to store metrics for each field, in the original field order
+        field_scholar_metrics = {}
+        for field in jobs:
+            field_scholar_metrics[field], records = futures[field].result()
+            add_records(records)
+
+    # Combine summaries for all fields, keeping the field of every row
+    summary_df = pd.concat(field_scholar_metrics, names=["Field"]).reset_index(level="Field")
+    summary_output_path = os.path.join(output_dir, "scholar_summary_by_field.csv")
+    summary_df.to_csv(summary_output_path, index=False)
+
+    print(f"Summary of top scholars by field saved to: {summary_output_path}")
+
+
+# The worker pool re-imports this module, so only run the analysis as a script
+if __name__ == "__main__":
+    main()